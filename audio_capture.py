@@ -0,0 +1,226 @@
+import collections
+import threading
+import time
+from queue import Queue, Empty, Full
+import speech_recognition as sr
+from noise_floor import rms
+
+
+class ContinuousCapture:
+    # mantiene un unico stream del microfono abierto en un hilo de fondo y lo corta en frases
+    # con barge_in el microfono sigue escuchando mientras el TTS habla: la voz que supera claramente el eco
+    # durante barge_in_seconds llama a on_barge_in (para cortar el TTS) y se graba como una frase normal
+    # con stream_factory cada frase se reconoce mientras se graba y a la cola llega el texto (str) en vez del audio;
+    # early_match(parcial) devuelve un comando cuando el texto parcial ya es inequivoco y se despacha sin esperar la pausa
+    def __init__(self, recognizer, is_muted=None, pre_roll=0.3, max_phrase_seconds=15, max_pending=5,
+                 stream_factory=None, early_match=None, barge_in=False, on_barge_in=None,
+                 echo_ratio=2.0, barge_in_seconds=0.09, noise_floor=None):
+        self.recognizer = recognizer
+        self.noise_floor = noise_floor  # NoiseFloor que ajusta energy_threshold con el audio que pasa
+        self.is_muted = is_muted or (lambda: False)  # ej: mientras el TTS habla se descarta el audio
+        self.stream_factory = stream_factory
+        self.early_match = early_match
+        self.early_dispatches = 0
+        self.barge_in = barge_in
+        self.on_barge_in = on_barge_in
+        self.echo_ratio = echo_ratio  # cuanto debe superar la voz al nivel de eco del TTS
+        self.barge_in_seconds = barge_in_seconds
+        self.echo_level = None  # energia que llega al microfono desde los parlantes mientras el TTS habla
+        self.barge_ins = 0
+        self.pre_roll = pre_roll  # segundos de audio previos al inicio de la voz que se conservan
+        self.max_phrase_seconds = max_phrase_seconds
+        self.utterances = Queue(maxsize=max_pending)  # frases listas para reconocer
+        self.running = False
+        self.in_phrase = False  # True mientras se esta grabando una frase
+        self.thread = None
+        self.error = None
+        self._mute_until = 0.0
+        self._ready = threading.Event()
+
+    # abre el microfono y empieza a capturar; devuelve False si no se pudo abrir
+    def start(self, calibration=0.5, timeout=5):
+        if self.running:
+            return True
+        self.running = True
+        self.error = None
+        self._ready.clear()
+        self.thread = threading.Thread(target=self._capture_loop, args=(calibration,), daemon=True)
+        self.thread.start()
+        self._ready.wait(timeout)
+        return self.running and self.error is None
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    # ignora el audio durante unos segundos (ej: el pitido de escucha)
+    def mute_for(self, seconds):
+        self._mute_until = max(self._mute_until, time.monotonic() + seconds)
+
+    # True si no hay frases pendientes ni una en curso (momento seguro para el pitido)
+    def is_idle(self):
+        return not self.in_phrase and self.utterances.empty()
+
+    # descarta frases pendientes (ej: antes de pedir una confirmacion)
+    def clear(self):
+        while True:
+            try:
+                self.utterances.get_nowait()
+            except Empty:
+                break
+
+    # espera la siguiente frase; devuelve None si se agota el timeout o la captura se detuvo
+    def get_utterance(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.running:
+            wait = 0.5 if deadline is None else min(0.5, deadline - time.monotonic())
+            if wait <= 0:
+                return None
+            try:
+                return self.utterances.get(timeout=wait)
+            except Empty:
+                continue
+        return None
+
+    def _capture_loop(self, calibration):
+        try:
+            with sr.Microphone() as source:
+                if calibration:
+                    try:
+                        self.recognizer.adjust_for_ambient_noise(source, duration=calibration)
+                    except Exception:
+                        pass
+                self._ready.set()
+                self._segment(source)
+        except Exception as e:
+            self.error = e
+            print(f"Error en la captura continua: {e}")
+        finally:
+            self.running = False
+            self._ready.set()
+
+    # detector de voz por energia: corta el stream en frases usando pause_threshold como silencio final
+    def _segment(self, source):
+        chunk = source.CHUNK
+        width = source.SAMPLE_WIDTH
+        rate = source.SAMPLE_RATE
+        seconds_per_chunk = chunk / rate
+        ring = collections.deque(maxlen=max(1, int(self.pre_roll / seconds_per_chunk)))  # buffer circular de pre-roll
+        max_chunks = int(self.max_phrase_seconds / seconds_per_chunk)
+        phrase = []
+        silent_chunks = 0
+        voiced_chunks = 0
+        stream = None
+        dispatched = False
+        barge_in_chunks = max(1, round(self.barge_in_seconds / seconds_per_chunk))
+        voiced_run = 0
+
+        while self.running:
+            buffer = source.stream.read(chunk)
+            if not buffer:
+                break
+
+            playing = self.is_muted()
+            if time.monotonic() < self._mute_until or (playing and not self.barge_in):
+                ring.clear()
+                voiced_run = 0
+                phrase = []
+                silent_chunks = voiced_chunks = 0
+                stream = None
+                self.in_phrase = False
+                continue
+
+            energy = rms(buffer, width)
+            is_voice = energy > self.recognizer.energy_threshold
+
+            if not phrase:
+                if self.noise_floor and not playing and not is_voice:
+                    # solo entre frases: ni la voz ni el eco del TTS cuentan como ruido del ambiente
+                    self.noise_floor.feed(buffer, width, rate)
+                ring.append(buffer)
+                if playing:
+                    # mientras habla el TTS solo cuenta la voz que supera el eco durante varios bloques seguidos
+                    voiced_run = voiced_run + 1 if self._above_echo(energy) else 0
+                    if voiced_run < barge_in_chunks:
+                        continue
+                    self.barge_ins += 1
+                    if self.on_barge_in:
+                        self.on_barge_in()
+                    is_voice = True
+                voiced_run = 0
+                if is_voice:
+                    phrase = list(ring)
+                    ring.clear()
+                    voiced_chunks = 1
+                    silent_chunks = 0
+                    self.in_phrase = True
+                    dispatched = False
+                    if self.stream_factory:
+                        stream = self.stream_factory(rate, width)
+                        for pending in phrase:
+                            stream.feed(pending)
+                continue
+
+            phrase.append(buffer)
+            if stream and not dispatched:
+                dispatched = self._try_early_dispatch(stream.feed(buffer))
+            if is_voice:
+                voiced_chunks += 1
+                silent_chunks = 0
+            else:
+                silent_chunks += 1
+
+            pause_over = silent_chunks * seconds_per_chunk >= self.recognizer.pause_threshold
+            noise = False
+            if not pause_over and len(phrase) >= max_chunks and self.noise_floor and not playing:
+                # una "frase" que no termina suele ser ruido que subio: se mide para que el umbral lo siga
+                # y no se manda a reconocer (evita el ciclo de escuchar y reconocer "sin comando")
+                self.noise_floor.feed(b"".join(phrase), width, rate)
+                noise = True
+            if pause_over or len(phrase) >= max_chunks:
+                # descarta ruidos muy cortos (clics, golpes)
+                if voiced_chunks * seconds_per_chunk >= self.recognizer.phrase_threshold and not dispatched and not noise:
+                    if stream:
+                        text = stream.finish()
+                        if text is not None:  # None: la compuerta de la palabra de activacion la descarto
+                            self._emit(text)
+                    else:
+                        self._emit(sr.AudioData(b"".join(phrase), rate, width))
+                phrase = []
+                silent_chunks = voiced_chunks = 0
+                stream = None
+                self.in_phrase = False
+
+    # compara la energia con el eco del TTS; el nivel de eco se actualiza con los bloques que no lo superan
+    def _above_echo(self, energy):
+        if self.echo_level is None:
+            self.echo_level = self.recognizer.energy_threshold
+        gate = max(self.recognizer.energy_threshold, self.echo_level * self.echo_ratio)
+        if energy > gate:
+            return True
+        self.echo_level = 0.9 * self.echo_level + 0.1 * energy
+        return False
+
+    # despacha el comando en cuanto el texto parcial coincide con un comando cerrado
+    def _try_early_dispatch(self, partial):
+        if not self.early_match or not partial:
+            return False
+        command = self.early_match(partial)
+        if not command:
+            return False
+        self.early_dispatches += 1
+        self._emit(command)
+        return True
+
+    def _emit(self, audio):
+        try:
+            self.utterances.put_nowait(audio)
+        except Full:
+            # si nadie consume, se descarta la frase mas vieja
+            try:
+                self.utterances.get_nowait()
+            except Empty:
+                pass
+            self.utterances.put_nowait(audio)
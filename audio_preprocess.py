@@ -0,0 +1,103 @@
+import math
+import time
+import speech_recognition as sr
+from noise_floor import frame_energies
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy el audio se envia tal como se capturo
+    np = None
+
+AVAILABLE = np is not None
+
+
+# prepara una frase antes del reconocimiento: recorta el silencio de los extremos, quita el zumbido grave,
+# normaliza el volumen y baja la frecuencia de muestreo a la que prefiere el motor
+# el recorte es una vista sobre los bytes capturados; filtro y remuestreo se hacen juntos en el dominio
+# de la frecuencia (una rfft y una irfft por frase)
+# se aplica a las frases completas (microfono por comando, o captura continua sin streaming); en streaming los
+# bloques van directo al motor local, que remuestrea por su cuenta y no sube nada por la red
+class AudioPreprocessor:
+    def __init__(self, target_rate=16000, frame_ms=20, padding_ms=150, highpass_hz=100.0, peak=0.9,
+                 max_gain=8.0, threshold=None, on_processed=None, taper_ms=10, guard_ms=100):
+        self.target_rate = target_rate
+        self.frame_ms = frame_ms
+        self.padding_ms = padding_ms  # silencio que se conserva antes y despues de la voz
+        self.highpass_hz = highpass_hz
+        self.peak = peak  # pico final como fraccion del maximo de 16 bits
+        self.max_gain = max_gain  # no se amplifica mas que esto (evita subir el ruido de frases muy bajas)
+        self.threshold = threshold or (lambda: 300)  # energia minima de una trama con voz (ej: energy_threshold)
+        self.on_processed = on_processed  # on_processed(bytes_antes, bytes_despues, ms)
+        self.taper_ms = taper_ms  # fundido en los extremos: la frase empieza y termina en cero
+        self.guard_ms = guard_ms  # ceros agregados antes de la FFT para que el final no se mezcle con el inicio
+        self.phrases = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def stats(self):
+        return {
+            "phrases": self.phrases,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_out / self.bytes_in if self.bytes_in else 1.0,
+        }
+
+    def process(self, audio):
+        started = time.monotonic()
+        rate = audio.sample_rate
+        raw = audio.frame_data if audio.sample_width == 2 else audio.get_raw_data(convert_width=2)
+        samples = self._trim(np.frombuffer(raw, dtype="<i2"), raw, rate)  # vistas sobre el buffer capturado
+        target = min(self.target_rate or rate, rate)  # nunca se sube la frecuencia
+        output = self._filter_and_resample(samples.astype(np.float32), rate, target)
+        data = self._normalize(output).tobytes()
+        processed = sr.AudioData(data, target, 2)
+        ms = (time.monotonic() - started) * 1000
+        self.phrases += 1
+        self.bytes_in += len(audio.frame_data)
+        self.bytes_out += len(data)
+        if self.on_processed:
+            self.on_processed(len(audio.frame_data), len(data), ms)
+        return processed
+
+    # deja desde la primera hasta la ultima trama con voz, con padding_ms de margen a cada lado
+    def _trim(self, samples, raw, rate):
+        frame = max(1, rate * self.frame_ms // 1000)
+        energies = frame_energies(raw, 2, frame)
+        voiced = np.flatnonzero(np.asarray(energies) > self.threshold())
+        if len(voiced) == 0:
+            return samples  # nada supera el umbral: mejor no recortar que perder la frase
+        padding = rate * self.padding_ms // 1000
+        start = max(0, voiced[0] * frame - padding)
+        end = min(len(samples), (voiced[-1] + 1) * frame + padding)
+        return samples[start:end]
+
+    # pasa altos y remuestreo: se anulan las frecuencias bajo highpass_hz (con una rampa suave de una octava)
+    # y se conservan solo las que caben en la nueva frecuencia de muestreo
+    # la FFT trata la frase como periodica: con los extremos fundidos y guard_ms de ceros detras, lo que el
+    # filtro desparrama mas alla del final cae en los ceros (que se descartan) y no al comienzo de la frase
+    def _filter_and_resample(self, samples, rate, target):
+        count = len(samples)
+        if count < 2:
+            return samples
+        taper = min(count // 2, rate * self.taper_ms // 1000)
+        if taper:
+            ramp = (0.5 - 0.5 * np.cos(np.linspace(0.0, np.pi, taper))).astype(np.float32)
+            samples[:taper] *= ramp
+            samples[count - taper:] *= ramp[::-1]
+        step = rate // math.gcd(rate, target)  # largo multiplo de step: la nueva frecuencia cae en un bin exacto
+        size = -(-(count + rate * self.guard_ms // 1000) // step) * step
+        spectrum = np.fft.rfft(samples, size)  # rfft completa con ceros hasta size
+        frequencies = np.fft.rfftfreq(size, 1.0 / rate)
+        if self.highpass_hz:
+            spectrum *= np.clip(np.log2(np.maximum(frequencies, 1e-6) / self.highpass_hz) + 1.0, 0.0, 1.0)
+        out_count = max(1, count * target // rate)
+        out_size = size * target // rate
+        if out_size == size:
+            return np.fft.irfft(spectrum, size)[:count]
+        kept = spectrum[:out_size // 2 + 1]
+        return np.fft.irfft(kept, out_size)[:out_count] * (out_size / size)
+
+    def _normalize(self, samples):
+        peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+        gain = min(self.max_gain, self.peak * 32767 / peak) if peak else 1.0
+        return np.clip(samples * gain, -32768, 32767).astype("<i2")
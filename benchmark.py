@@ -0,0 +1,462 @@
+# mediciones del asistente sin microfono, parlantes ni interfaz
+# uso: python benchmark.py listado --tamanos 10000 100000
+#      python benchmark.py extremo --tamanos 2000 [--guion comandos.txt] [--json resultados.json]
+#      python benchmark.py despertar --guion frases.txt [--palabra asistente] [--modelo ruta_vosk]
+#      python benchmark.py preproceso [--guion frases.txt] [--motor google|vosk] [--json resultados.json]
+import argparse
+import asyncio
+import json
+import math
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import tracemalloc
+import wave
+
+from command_handlers import split_entries, spoken_name
+from directory_cache import DirectoryCache
+
+
+# crea un directorio temporal con count elementos (una parte son carpetas)
+def make_tree(count, folder_ratio=0.1):
+    root = tempfile.mkdtemp(prefix="asistente_bench_")
+    extensions = [".txt", ".pdf", ".jpg", ".png", ".docx", ".xlsx", ".mp3", ".mp4", ""]
+    folders = int(count * folder_ratio)
+    for i in range(folders):
+        os.mkdir(os.path.join(root, f"carpeta_{i}"))
+    for i in range(count - folders):
+        open(os.path.join(root, f"archivo-{i}_final{extensions[i % len(extensions)]}"), "w").close()
+    return root
+
+
+# el listado original: os.listdir, dos pasadas con os.path.isdir y diez str.replace por nombre
+def legacy_listing(path):
+    files = os.listdir(path)
+    folders = [f for f in files if os.path.isdir(os.path.join(path, f))]
+    files_only = [f for f in files if not os.path.isdir(os.path.join(path, f))]
+    spoken = [f.replace('.txt', ' punto txt').replace('.pdf', ' punto pdf').replace('.jpg', ' punto jpg').replace('.png', ' punto png').replace('.docx', ' punto docx').replace('.xlsx', ' punto excel').replace('.mp3', ' punto mp3').replace('.mp4', ' punto mp4').replace('_', ' ').replace('-', ' ') for f in files_only]
+    return folders, spoken
+
+
+def snapshot_listing(cache, path):
+    folders, files_only = split_entries(cache.get(path))
+    return folders, [spoken_name(f) for f in files_only]
+
+
+def best_of(function, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def bench_listing(sizes, repeat):
+    print(f"{'elementos':>10} {'antes (ms)':>12} {'scandir (ms)':>13} {'en cache (ms)':>14}")
+    for size in sizes:
+        root = make_tree(size)
+        try:
+            before = best_of(lambda: legacy_listing(root), repeat)
+            cold = best_of(lambda: snapshot_listing(DirectoryCache(watch=False), root), repeat)
+            cache = DirectoryCache(watch=False)
+            cache.get(root)
+            warm = best_of(lambda: snapshot_listing(cache, root), repeat)
+            print(f"{size:>10} {before:>12.1f} {cold:>13.1f} {warm:>14.1f}")
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+# guion por defecto del recorrido completo: (transcripcion, comando esperado)
+# los nombres corresponden a los que crea make_tree
+DEFAULT_SCRIPT = [
+    ("dónde estoy", "location"),
+    ("listar archivos", "list"),
+    ("crear carpeta pruebas", "create_folder"),
+    ("mover archivo-3_final.png a pruebas", "move"),
+    ("renombrar archivo-4_final.docx como informe", "rename"),
+    ("eliminar archivo-1_final.pdf", "delete"),
+    ("sí", None),  # respuesta a la confirmacion anterior
+    ("crear archivo de texto llamado notas", "create_file"),
+    ("mover todos los mp3 a musica", "move_many"),
+    ("sí", None),
+    ("buscar archivo 12", "search"),
+    ("entrar a pruebas", "enter"),
+    ("volver", "go_back"),
+    ("comandos", "help"),
+    ("algo que no es un comando", None),
+]
+
+
+# efectos esperados del guion por defecto sobre el arbol creado por make_tree
+def default_script_checks(root):
+    return [
+        ("carpeta creada", os.path.isdir(os.path.join(root, "pruebas"))),
+        ("archivo movido", os.path.exists(os.path.join(root, "pruebas", "archivo-3_final.png"))),
+        ("archivo renombrado", os.path.exists(os.path.join(root, "informe.docx"))),
+        ("archivo eliminado", not os.path.exists(os.path.join(root, "archivo-1_final.pdf"))),
+        ("archivo de texto creado", os.path.exists(os.path.join(root, "notas.txt"))),
+        ("movimiento masivo", not any(name.endswith(".mp3") for name in os.listdir(root))),
+    ]
+
+
+# escribe un WAV corto por linea del guion; el tono cambia por linea para que cada grabacion sea distinta
+def write_script(lines, directory, seconds=0.5, rate=16000):
+    path = os.path.join(directory, "guion.txt")
+    with open(path, "w", encoding="utf-8") as script:
+        for i, (transcript, expected) in enumerate(lines):
+            wav_name = f"comando_{i:03d}.wav"
+            frequency = 200 + 20 * i
+            samples = (int(8000 * math.sin(2 * math.pi * frequency * n / rate)) for n in range(int(seconds * rate)))
+            with wave.open(os.path.join(directory, wav_name), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(rate)
+                wav.writeframes(b"".join(struct.pack("<h", sample) for sample in samples))
+            script.write(f"{wav_name}|{transcript}|{expected or ''}\n")
+    return path
+
+
+def read_expected(script_path):
+    expected = []
+    with open(script_path, encoding="utf-8") as script:
+        for line in script:
+            line = line.strip()
+            if line and not line.startswith("#") and "|" in line:
+                parts = line.split("|")
+                expected.append((parts[1].strip(), parts[2].strip() if len(parts) > 2 else ""))
+    return expected
+
+
+# pagina y panel de logs de mentira: cuentan las actualizaciones en vez de dibujar
+class FakePage:
+    def __init__(self):
+        self.controls = []
+        self.updates = 0
+
+    def update(self, *controls):
+        self.updates += 1
+
+
+class FakeLog:
+    def __init__(self):
+        self.controls = []
+        self.value = ""
+
+
+def run_end_to_end(size, script_path=None, speech_ms_per_char=0.0, paced=True, keep=False):
+    # se importa aqui para que "listado" funcione sin las dependencias de audio
+    from voice_assistant import VoiceAssistant
+    from pipeline import CommandPipeline
+    from ui_updates import UpdateScheduler
+    from metrics import LatencyMetrics
+
+    # asistente sin microfono ni parlantes: audio del guion, voz registrada en una lista
+    class HeadlessAssistant(VoiceAssistant):
+        def __init__(self, root, **options):
+            self.spoken = []
+            self.in_flight = 0
+            self.flight_lock = threading.Lock()
+            super().__init__(**options)
+            self.root_directory = self.current_directory = root
+
+        def setup_tts_in_thread(self, fresh=False):
+            self.tts_engine = self  # el propio asistente hace de motor: _say solo registra
+
+        def _say(self, text):
+            self.spoken.append(text)
+            if speech_ms_per_char:
+                time.sleep(len(text) * speech_ms_per_char / 1000)
+
+        def _beep(self):
+            pass
+
+        # con paced se espera como lo haria una persona: a que termine el comando anterior y su respuesta
+        def capture_audio(self, timeout=None):
+            if paced:
+                while self.in_flight and not self.awaiting_reply.is_set():
+                    time.sleep(0.002)
+                # hasta el silencio: wait_for_speech_to_finish vuelve en cuanto la cola se vacia una vez
+                deadline = time.monotonic() + 30
+                while (self.is_speaking or self.pending_utterances) and time.monotonic() < deadline:
+                    self.wait_for_speech_to_finish(deadline - time.monotonic())
+            audio = super().capture_audio(timeout)
+            if audio is not None:
+                with self.flight_lock:
+                    self.in_flight += 1
+            return audio
+
+        def deliver_reply(self, command):
+            delivered = super().deliver_reply(command)
+            if delivered:
+                with self.flight_lock:
+                    self.in_flight -= 1
+            return delivered
+
+        def handle_command(self, *args):
+            try:
+                super().handle_command(*args)
+            finally:
+                with self.flight_lock:
+                    self.in_flight -= 1
+
+    root = make_tree(size)
+    script_dir = tempfile.mkdtemp(prefix="asistente_guion_")
+    default = script_path is None
+    script_path = script_path or write_script(DEFAULT_SCRIPT, script_dir)
+    try:
+        assistant = HeadlessAssistant(root, capture_mode="replay", recognition_backend="replay", script_path=script_path,
+                                      listening_beep=False, tts_cache=False, desktop_index=False)
+        page, output = FakePage(), FakeLog()
+        assistant.ui = UpdateScheduler(page)
+        assistant.log_row_factory = lambda message: message
+        assistant.metrics = LatencyMetrics(history=100000)  # se conservan todos los comandos del guion
+        pipeline = CommandPipeline(assistant, output, page)
+        assistant.pipeline = pipeline
+
+        tracemalloc.start()
+        cpu = time.process_time()
+        asyncio.run(pipeline.run())
+        assistant.wait_for_speech_to_finish(30)
+        while assistant.file_jobs.active() or (assistant.search and not assistant.search.done.is_set()):
+            time.sleep(0.01)
+        cpu = time.process_time() - cpu
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        stats = pipeline.stats()
+        commands = list(assistant.metrics.recent)
+        routed = {}
+        for entry in commands:
+            routed.setdefault(entry["command"], entry["intent"])
+        failures = [f"'{text}': se esperaba {intent}, se obtuvo {routed.get(text.lower())}"
+                    for text, intent in read_expected(script_path) if intent and routed.get(text.lower()) != intent]
+        if default and paced:  # en rafaga las confirmaciones llegan antes de la pregunta
+            failures += [f"falló: {name}" for name, ok in default_script_checks(root) if not ok]
+        return {
+            "elementos": size,
+            "comandos": stats["commands"],
+            "segundos": round(stats["seconds"], 3),
+            "comandos_por_minuto": round(stats["commands_per_minute"], 1),
+            "cpu_segundos": round(cpu, 3),
+            "memoria_pico_mb": round(peak / 1024 / 1024, 2),
+            "actualizaciones_ui": page.updates,
+            "frases_dichas": len(assistant.spoken),
+            "latencias": assistant.metrics.summary(),
+            "por_comando": [{"comando": c["command"], "intent": c["intent"], "total_ms": c["total_ms"], "etapas": c["spans"]} for c in commands],
+            "fallas": failures,
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(script_dir, ignore_errors=True)
+
+
+def bench_end_to_end(sizes, script_path, speech_ms_per_char, paced, json_path):
+    results = []
+    for size in sizes:
+        result = run_end_to_end(size, script_path, speech_ms_per_char, paced)
+        results.append(result)
+        print(f"\n== {size} elementos: {result['comandos']} comandos en {result['segundos']} s "
+              f"({result['comandos_por_minuto']} por minuto), CPU {result['cpu_segundos']} s, "
+              f"memoria pico {result['memoria_pico_mb']} MB")
+        print(f"{'comando':<45} {'intent':<14} {'total (ms)':>10}")
+        for command in result["por_comando"]:
+            print(f"{command['comando'][:45]:<45} {str(command['intent']):<14} {command['total_ms']:>10.1f}")
+        total = result["latencias"].get("total")
+        if total:
+            print(f"total p50 {total['p50']:.1f} ms, p95 {total['p95']:.1f} ms, p99 {total['p99']:.1f} ms")
+        for failure in result["fallas"]:
+            print(f"FALLA {failure}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as output:
+            json.dump(results, output, ensure_ascii=False, indent=2)
+    return all(not result["fallas"] for result in results)
+
+
+# falsas aceptaciones y fallos del detector de la palabra de activacion sobre grabaciones con transcripcion
+# lo esperado sale de la transcripcion: con la palabra de activacion se acepta, una palabra directa
+# ("iniciar", "parar") pasa sola, cualquier otra frase se descarta
+def bench_wake_word(script_path, wake_word, model_path, json_path):
+    import speech_recognition as sr
+    from intent_router import IntentRouter
+    from metrics import Histogram
+    from voice_assistant import ReplayBackend
+    from wake_word import VoskKeywordSpotter, WakeWordGate
+
+    direct_words = [keyword for intent in IntentRouter().intents if intent.always_active
+                    for keyword in intent.keywords if " " not in keyword]
+    try:
+        spotter = VoskKeywordSpotter(wake_word.lower().split() + direct_words, model_path=model_path)
+    except sr.RequestError as e:
+        print(f"No se puede medir la palabra de activacion: {e}")
+        return False
+    spot_times = Histogram(window=100000)
+    gate = WakeWordGate(spotter, wake_word, direct_words, on_spot=spot_times.record)
+    replay = ReplayBackend(script_path)
+    wake = wake_word.lower().split()
+    counts = {"frases": 0, "con_palabra": 0, "sin_palabra": 0, "falsas_aceptaciones": 0, "fallos": 0}
+    errors = []
+    for _, transcript in replay.entries:
+        audio = replay.next_audio()
+        words = transcript.lower().split()
+        expected_direct = len(words) == 1 and words[0] in direct_words
+        expected = expected_direct or any(words[i:i + len(wake)] == wake for i in range(len(words)))
+        gate.close()  # cada frase se juzga sola, sin la ventana de conversacion
+        accepted_before = gate.accepted
+        passed = gate.filter(audio) is not None or gate.accepted > accepted_before
+        counts["frases"] += 1
+        counts["con_palabra" if expected else "sin_palabra"] += 1
+        if passed and not expected:
+            counts["falsas_aceptaciones"] += 1
+            errors.append(f"aceptada sin palabra: {transcript}")
+        elif expected and not passed:
+            counts["fallos"] += 1
+            errors.append(f"no detectada: {transcript}")
+    result = dict(counts)
+    result["tasa_falsas_aceptaciones"] = counts["falsas_aceptaciones"] / counts["sin_palabra"] if counts["sin_palabra"] else 0.0
+    result["tasa_fallos"] = counts["fallos"] / counts["con_palabra"] if counts["con_palabra"] else 0.0
+    result["detector_ms"] = spot_times.summary()
+    result["errores"] = errors
+    print(f"{counts['frases']} frases ({counts['con_palabra']} para el asistente, {counts['sin_palabra']} no)")
+    print(f"falsas aceptaciones {counts['falsas_aceptaciones']} ({result['tasa_falsas_aceptaciones']:.1%}), "
+          f"fallos {counts['fallos']} ({result['tasa_fallos']:.1%})")
+    print(f"detector p50 {result['detector_ms']['p50']:.1f} ms, p95 {result['detector_ms']['p95']:.1f} ms")
+    for error in errors:
+        print(error)
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as output:
+            json.dump(result, output, ensure_ascii=False, indent=2)
+    return True
+
+
+# frases de prueba como las de un microfono a 44.1 kHz: silencio, zumbido de 50 Hz y ruido alrededor de la voz
+def synthetic_phrases(count=5, rate=44100):
+    import numpy as np
+    import speech_recognition as sr
+    rng = np.random.default_rng(0)
+    phrases = []
+    for i in range(count):
+        lead, voice, tail = 0.4 + 0.2 * i, 0.8 + 0.3 * i, 0.6
+        t = np.arange(int((lead + voice + tail) * rate)) / rate
+        speech = (t > lead) & (t < lead + voice)
+        signal = np.where(speech, 3000 * np.sin(2 * np.pi * (300 + 60 * i) * t) * np.sin(2 * np.pi * 3 * t) ** 2, 0)
+        signal += 600 * np.sin(2 * np.pi * 50 * t) + rng.normal(0, 80, len(t))
+        phrases.append((f"sintetica {i + 1}", sr.AudioData(signal.astype("<i2").tobytes(), rate, 2)))
+    return phrases
+
+
+# bytes que llegan al motor y tiempo de reconocimiento con y sin el preprocesado de audio_preprocess
+def bench_preprocess(script_path, engine, json_path):
+    import speech_recognition as sr
+    from audio_preprocess import AudioPreprocessor, AVAILABLE
+    from noise_floor import NoiseFloor
+    from voice_assistant import ReplayBackend, create_recognizer_backend
+
+    if not AVAILABLE:
+        print("El preprocesado necesita NumPy (pip install numpy)")
+        return False
+    if script_path:
+        replay = ReplayBackend(script_path)
+        phrases = [(transcript, replay.next_audio()) for _, transcript in list(replay.entries)]
+    else:
+        phrases = synthetic_phrases()
+    backend = None
+    if engine:
+        try:
+            backend = create_recognizer_backend(engine, sr.Recognizer())
+        except (sr.RequestError, OSError, ValueError) as e:
+            print(f"Sin motor de reconocimiento, solo se miden bytes: {e}")
+
+    # el motor puede fallar con una frase; se anota el error en vez del texto
+    def recognize(audio):
+        started = time.perf_counter()
+        try:
+            text = backend.recognize(audio)
+        except (sr.UnknownValueError, sr.RequestError) as e:
+            text = f"<{type(e).__name__}>"
+        return text, (time.perf_counter() - started) * 1000
+
+    rows = []
+    for label, audio in phrases:
+        floor = NoiseFloor(sr.Recognizer())  # el umbral de voz sale del ruido de la propia frase
+        floor.feed_audio(audio)
+        preprocessor = AudioPreprocessor(target_rate=getattr(backend, "preferred_rate", None) or 16000,
+                                         threshold=lambda: floor.threshold)
+        started = time.perf_counter()
+        processed = preprocessor.process(audio)
+        row = {
+            "frase": label,
+            "bytes_antes": len(audio.frame_data),
+            "bytes_despues": len(processed.frame_data),
+            "segundos_antes": round(len(audio.frame_data) / (audio.sample_rate * audio.sample_width), 2),
+            "segundos_despues": round(len(processed.frame_data) / (processed.sample_rate * 2), 2),
+            "preproceso_ms": round((time.perf_counter() - started) * 1000, 2),
+        }
+        if backend:
+            row["texto_antes"], row["reconocer_ms_antes"] = recognize(audio)
+            row["texto_despues"], row["reconocer_ms_despues"] = recognize(processed)
+        rows.append(row)
+
+    print(f"{'frase':<28} {'bytes antes':>12} {'despues':>9} {'s antes':>8} {'despues':>8} {'prep ms':>8}"
+          + (f" {'rec ms antes':>13} {'despues':>8}" if backend else ""))
+    for row in rows:
+        line = (f"{row['frase'][:28]:<28} {row['bytes_antes']:>12} {row['bytes_despues']:>9} "
+                f"{row['segundos_antes']:>8.2f} {row['segundos_despues']:>8.2f} {row['preproceso_ms']:>8.1f}")
+        if backend:
+            line += f" {row['reconocer_ms_antes']:>13.0f} {row['reconocer_ms_despues']:>8.0f}"
+        print(line)
+        if backend and row["texto_antes"] != row["texto_despues"]:
+            print(f"    texto distinto: '{row['texto_antes']}' -> '{row['texto_despues']}'")
+    before = sum(row["bytes_antes"] for row in rows)
+    after = sum(row["bytes_despues"] for row in rows)
+    print(f"total {before} -> {after} bytes ({after / before:.0%})" if before else "sin frases")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as output:
+            json.dump(rows, output, ensure_ascii=False, indent=2)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mediciones del asistente de voz")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    listing = subparsers.add_parser("listado", help="listado de un directorio (handle_list_command)")
+    listing.add_argument("--tamanos", type=int, nargs="+", default=[10000, 100000])
+    listing.add_argument("--repeticiones", type=int, default=5)
+
+    end_to_end = subparsers.add_parser("extremo", help="recorrido completo con audio grabado, voz y pantalla simuladas")
+    end_to_end.add_argument("--tamanos", type=int, nargs="+", default=[1000])
+    end_to_end.add_argument("--guion", help="lineas archivo.wav|transcripcion|comando_esperado (por defecto se genera uno)")
+    end_to_end.add_argument("--voz-ms-por-letra", type=float, default=0.0, help="duracion simulada de la voz")
+    end_to_end.add_argument("--rafaga", action="store_true", help="no esperar a cada respuesta (mide rendimiento, no latencia)")
+    end_to_end.add_argument("--json", help="guardar los resultados en este archivo")
+
+    wake = subparsers.add_parser("despertar", help="falsas aceptaciones y fallos de la palabra de activacion")
+    wake.add_argument("--guion", required=True, help="lineas archivo.wav|transcripcion de frases reales")
+    wake.add_argument("--palabra", default="asistente")
+    wake.add_argument("--modelo", default=os.environ.get("ASISTENTE_MODELO_VOSK", "model"), help="carpeta del modelo de Vosk")
+    wake.add_argument("--json", help="guardar los resultados en este archivo")
+
+    preprocess = subparsers.add_parser("preproceso", help="bytes y tiempo de reconocimiento con y sin preprocesar el audio")
+    preprocess.add_argument("--guion", help="lineas archivo.wav|transcripcion (por defecto frases sinteticas)")
+    preprocess.add_argument("--motor", choices=["google", "vosk"], help="medir tambien el reconocimiento")
+    preprocess.add_argument("--json", help="guardar los resultados en este archivo")
+
+    args = parser.parse_args()
+    if args.benchmark == "listado":
+        bench_listing(args.tamanos, args.repeticiones)
+    elif args.benchmark == "extremo":
+        ok = bench_end_to_end(args.tamanos, args.guion, args.voz_ms_por_letra, not args.rafaga, args.json)
+        raise SystemExit(0 if ok else 1)
+    elif args.benchmark == "despertar":
+        raise SystemExit(0 if bench_wake_word(args.guion, args.palabra, args.modelo, args.json) else 1)
+    elif args.benchmark == "preproceso":
+        raise SystemExit(0 if bench_preprocess(args.guion, args.motor, args.json) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,258 @@
 import os
-import shutil
-import send2trash
 import time
+from datetime import datetime, timedelta
+from file_index import FileIndex
+from tree_search import TreeSearch
+from speech_queue import PRIORITY_URGENT, PRIORITY_LOW
+
+AMBIGUITY_MARGIN = 0.05  # si los dos mejores puntajes estan asi de cerca se pregunta cual
+DELETE_MIN_SCORE = 0.7  # para eliminar se exige algo mas que un parecido (ej: contener lo dicho)
+# como se leen en voz alta las extensiones de un nombre de archivo
+SPOKEN_EXTENSIONS = {
+    'txt': ' punto txt', 'pdf': ' punto pdf', 'jpg': ' punto jpg', 'png': ' punto png',
+    'docx': ' punto docx', 'xlsx': ' punto excel', 'mp3': ' punto mp3', 'mp4': ' punto mp4',
+}
+
+
+# nombre listo para el TTS: una busqueda de la extension en la tabla y guiones como espacios
+def spoken_name(name):
+    stem, dot, extension = name.rpartition('.')
+    if dot and extension in SPOKEN_EXTENSIONS:
+        name = stem + SPOKEN_EXTENSIONS[extension]
+    return name.replace('_', ' ').replace('-', ' ')
+
+
+# separa carpetas y archivos de una foto del directorio en una sola pasada, ordenados por nombre
+def split_entries(snapshot):
+    folders, files = [], []
+    for entry in sorted(snapshot.entries.values(), key=lambda entry: entry.name.lower()):
+        (folders if entry.is_dir else files).append(entry.name)
+    return folders, files
+
+
+# lista de ayuda; tambien se pre-renderiza en el cache de frases del TTS al iniciar
+HELP_COMMANDS = [
+    "Comandos disponibles:",
+    "• Eliminar [nombre_archivo] - Elimina un archivo o carpeta", 
+    "• Mover [nombre_archivo] a [nombre_carpeta] - Mueve archivo",
+    "• Eliminar todos los [png, pdf, imágenes...] [de hoy/ayer/esta semana] - Elimina varios archivos de una vez",
+    "• Mover todos los [pdf] [de ayer] a [carpeta] - Mueve varios archivos de una vez",
+    "• Buscar [nombre] - Busca en todo el Escritorio, incluidas las subcarpetas",
+    "• Ir al resultado [N] - Va a la carpeta de un resultado de la búsqueda",
+    "• Cancelar [trabajo N] - Detiene un movimiento o eliminación en curso",
+    "• Renombrar [nombre_archivo] como [nuevo_nombre] - Cambia nombre",
+    "• Listar archivos - Muestra todos los archivos",
+    "• Entrar [carpeta_destino] - Entra en una carpeta",
+    "• Volver - Regresa a la carpeta anterior",
+    "• Dónde estoy - Muestra la ubicación actual",
+    "• Crear carpeta [nombre] - Crea nueva carpeta",
+    "• Crear archivo de texto/word/excel/powerpoint llamado [nombre]",
+    "• Parar - Detiene el asistente",
+    "• Iniciar - Reinicia el asistente"
+]
+HELP_SPEECH = ". ".join(HELP_COMMANDS) # se lee como un solo mensaje para que el cache de frases lo tenga completo
+
+# tamaño legible para los avisos de progreso
+def human_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+# nombres de grupos de archivos que se pueden decir en los comandos masivos -> extensiones
+FILE_GROUPS = {
+    'imágenes': {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'}, 'imagenes': {'png', 'jpg', 'jpeg', 'gif', 'bmp', 'webp'},
+    'fotos': {'png', 'jpg', 'jpeg', 'heic'}, 'capturas': {'png'},
+    'documentos': {'pdf', 'doc', 'docx', 'txt', 'odt', 'rtf'}, 'textos': {'txt'}, 'texto': {'txt'},
+    'word': {'doc', 'docx'}, 'excel': {'xls', 'xlsx', 'csv'}, 'powerpoint': {'ppt', 'pptx'},
+    'videos': {'mp4', 'avi', 'mkv', 'mov'}, 'vídeos': {'mp4', 'avi', 'mkv', 'mov'},
+    'música': {'mp3', 'wav', 'flac', 'm4a'}, 'musica': {'mp3', 'wav', 'flac', 'm4a'}, 'canciones': {'mp3', 'wav', 'flac', 'm4a'},
+    'comprimidos': {'zip', 'rar', '7z'},
+}
+# extensiones que se aceptan dichas sueltas ("todos los png"); cualquier otra palabra se toma como nombre
+KNOWN_EXTENSIONS = set().union(*FILE_GROUPS.values()) | set(SPOKEN_EXTENSIONS) | {
+    'xls', 'ppt', 'csv', 'svg', 'tif', 'tiff', 'ico', 'md', 'log', 'json', 'xml', 'html', 'htm', 'py',
+    'exe', 'msi', 'iso', 'tar', 'gz', 'epub', 'ogg', 'webm', 'ods', 'odp',
+}
+PATTERN_FILLER = {'archivos', 'archivo', 'los', 'las', 'de', 'del', 'tipo', 'punto', 'y', 'con', 'extensión', 'extension'}
+
+
+# interpreta "png", "pdf de ayer", "de esta semana", "imágenes de hoy"...
+# devuelve (extensiones o None, desde, hasta, descripcion); None si no se entendio ningun filtro
+def parse_file_pattern(text, now=None):
+    now = now or datetime.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    periods = {
+        'hoy': (today, None),
+        'ayer': (today - timedelta(days=1), today),
+        'esta semana': (today - timedelta(days=today.weekday()), None),
+        'la semana pasada': (today - timedelta(days=today.weekday() + 7), today - timedelta(days=today.weekday())),
+        'este mes': (today.replace(day=1), None),
+    }
+    text = " " + " ".join(text.lower().replace('.', ' ').split()) + " "
+    since = until = None
+    period = ""
+    for words, (start, end) in periods.items():
+        if f" {words} " in text:
+            text = text.replace(f" {words} ", " ")
+            since, until, period = start.timestamp(), end.timestamp() if end else None, words
+            break
+    extensions = set()
+    named = []  # como lo dijo el usuario, para la confirmacion
+    for word in text.split():
+        if word in PATTERN_FILLER:
+            continue
+        if word in FILE_GROUPS:
+            extensions |= FILE_GROUPS[word]
+            named.append(word)
+        elif word in KNOWN_EXTENSIONS:
+            extensions.add(word)
+            named.append(word)
+        else:
+            return None  # algo que no es un filtro: mejor no adivinar sobre muchos archivos
+    if not extensions and since is None:
+        return None
+    description = "archivos " + " y ".join(named) if named else "archivos"
+    if period:
+        description += " de " + period
+    return (extensions or None), since, until, description
+
+
+# elige en una sola pasada por la foto del directorio los archivos que cumplen el filtro
+def select_files(snapshot, extensions=None, since=None, until=None):
+    selected = []
+    for entry in snapshot.entries.values():
+        if entry.is_dir:
+            continue
+        if extensions is not None and entry.name.rpartition('.')[2].lower() not in extensions:
+            continue
+        if since is not None or until is not None:
+            modified = snapshot.modified(entry.name)
+            if (since is not None and modified < since) or (until is not None and modified >= until):
+                continue
+        selected.append(entry.name)
+    return selected
+
+
+NUMBERS = {"uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6, "siete": 7, "ocho": 8, "nueve": 9, "diez": 10}
+
+ORDINALS = {"uno": 0, "1": 0, "primero": 0, "primera": 0, "dos": 1, "2": 1, "segundo": 1, "segunda": 1, "tres": 2, "3": 2, "tercero": 2, "tercera": 2}
 
 class CommandHandlers:
     def __init__(self, voice_assistant):
         self.assistant = voice_assistant
         # self.assistant.current_directory = voice_assistant.current_directory
     def get_current_files(self):
+        return self.assistant.get_current_files() # usa el cache de directorios del asistente
+    
+    # consulta en el cache si un elemento del directorio es una carpeta (sin llamar a os.path.isdir)
+    def is_folder(self, current_dir, name):
         try:
-            files = os.listdir(self.assistant.current_directory) #obtiene los archivos y carpetas del directorio actual
-            return files, self.assistant.current_directory #devuelve los archivos encontrados y el directorio de donde los extrajo
-        except Exception:
-            return [], ""   #controla el error que se genera en caso de no encontrar nada    
+            return self.assistant.directory_cache.get(current_dir).is_dir(name)
+        except OSError:
+            return False
         
-    def find_file(self, target, files):
-        target = target.lower().strip()
-        # Si no se especifica un archivo, retornar None
+    # indice de nombres del directorio; se crea una vez por foto y el cache lo mantiene al dia
+    def get_index(self, current_dir):
+        snapshot = self.assistant.directory_cache.get(current_dir)
+        if snapshot.index is None:
+            snapshot.index = FileIndex(snapshot.names())
+        return snapshot, snapshot.index
+    
+    # devuelve [(nombre, puntaje)] de los elementos de files que mas se parecen a lo dicho
+    def find_candidates(self, target, files, limit=3):
+        target = target.strip()
+        # Si no se especifica un archivo, no hay candidatos
         if not target:
+            return []
+        try:
+            snapshot, index = self.get_index(self.assistant.current_directory)
+        except OSError:
+            return []
+        allowed = None if files is snapshot.names() else set(files) # ej: solo las carpetas
+        return index.search(target, limit=limit, allowed=allowed)
+    
+    def find_file(self, target, files):
+        candidates = self.find_candidates(target, files, limit=1)
+        return candidates[0][0] if candidates else None
+    
+    # como find_file, pero si hay dos coincidencias casi iguales pregunta al usuario cual quiere
+    # con min_score se descarta la mejor coincidencia si no se parece lo suficiente a lo dicho
+    def resolve_file(self, target, files, output_widget, min_score=0.0):
+        candidates = self.find_candidates(target, files)
+        if not candidates:
             return None
-            
-        files_lower = {f.lower(): f for f in files}
+        if candidates[0][1] < min_score:
+            self.assistant.log_message(f"❓ No hay una coincidencia segura para {target} (la más parecida es {candidates[0][0]})", output_widget)
+            return None
+        close = [name for name, score in candidates if candidates[0][1] - score < AMBIGUITY_MARGIN]
+        if len(close) < 2 or candidates[0][1] >= 1.0:
+            return candidates[0][0]
         
-        for low, orig in files_lower.items():# Recorre cada archivo
-            if target in low:               # verifica si el nombre está contenido en el nombre del archivo
-                return orig 
+        self.assistant.log_message("❓ Varias coincidencias: " + ", ".join(close), output_widget)
+        options = ", ".join(f"{i} {name}" for i, name in enumerate(close, 1))
+        self.assistant.speak(f"Encontré varias coincidencias: {options}. ¿Cuál quieres?", priority=PRIORITY_URGENT)
+        self.assistant.wait_for_speech_to_finish()
+        answer = self.assistant.recognize_reply()
+        if not answer or answer == "sin comando":
+            return None
+        for word in answer.split():
+            if word in ORDINALS and ORDINALS[word] < len(close):
+                return close[ORDINALS[word]]
+        chosen = FileIndex(close).search(answer, limit=1)
+        return chosen[0][0] if chosen else None
+    
+    # avisos de un trabajo en segundo plano: progreso en el panel y resultado por voz
+    def job_callbacks(self, output_widget, done_message):
+        def on_progress(job):
+            detail = f"{job.done_files}/{job.total_files} elementos"
+            if job.total_bytes:
+                detail = f"{human_size(job.done_bytes)} de {human_size(job.total_bytes)}, " + detail
+            self.assistant.log_message(f"⏳ Trabajo {job.id}: {job.progress():.0%} ({detail})", output_widget)
         
-        return None
+        def on_finished(job):
+            if job.status == "done":
+                self.assistant.log_message(f"✅ Trabajo {job.id} terminado: {job.describe()}", output_widget)
+                self.assistant.speak(done_message)
+            elif job.status == "cancelled":
+                self.assistant.log_message(f"⛔ Trabajo {job.id} cancelado ({len(job.completed)} de {len(job.sources)} elementos listos)", output_widget)
+                self.assistant.speak(f"Trabajo {job.id} cancelado", priority=PRIORITY_URGENT)
+            else:
+                self.assistant.log_message(f"❌ Error en el trabajo {job.id}: {job.error}", output_widget)
+                self.assistant.speak(f"Error en el trabajo {job.id}. Verifica los permisos", priority=PRIORITY_URGENT)
+        
+        return on_progress, on_finished
     
-    def handle_delete_command(self, cmd, files, current_dir, output_widget):
-        target = cmd.replace("eliminar", "").replace("borrar", "").strip()
+    # True (y lo avisa) si el elemento ya esta siendo movido o eliminado por otro trabajo
+    def is_busy(self, current_dir, name, output_widget):
+        if not self.assistant.file_jobs.busy(os.path.join(current_dir, name)):
+            return False
+        self.assistant.log_message(f"⏳ {name} está siendo procesado por otro trabajo", output_widget)
+        self.assistant.speak(f"{name} todavía se está procesando. Espera o di cancelar", priority=PRIORITY_URGENT)
+        return True
+    
+    def handle_delete_command(self, target, files, current_dir, output_widget):
                 
         if not target:
             self.assistant.speak("Debes especificar qué archivo o carpeta quieres eliminar")
             return
             
-        found_file = self.find_file(target, files)
+        found_file = self.resolve_file(target, files, output_widget, min_score=DELETE_MIN_SCORE)
         
         if not found_file:
             self.assistant.speak("Archivo o carpeta no encontrada")
             return
+        if self.is_busy(current_dir, found_file, output_widget):
+            return
         
         try:
             filepath = os.path.join(current_dir, found_file)
-            item_type = "carpeta" if os.path.isdir(filepath) else "archivo"
+            item_type = "carpeta" if self.is_folder(current_dir, found_file) else "archivo"
             
             
             # Pedir confirmación
-            self.assistant.speak(f"¿Estás seguro que deseas eliminar {item_type} {found_file}? Di 'sí' para confirmar o 'no' para cancelar")
-            
-            time.sleep(0.1)
+            self.assistant.speak(f"¿Estás seguro que deseas eliminar {item_type} {found_file}? Di 'sí' para confirmar o 'no' para cancelar", priority=PRIORITY_URGENT)
             
             # CRÍTICO: Esperar a que termine de hablar ANTES de hacer el beep
             self.assistant.wait_for_speech_to_finish()
@@ -57,7 +260,7 @@ class CommandHandlers:
             
             
             # Esperar respuesta de confirmación
-            confirmation = self.assistant.recognize_speech()
+            confirmation = self.assistant.recognize_reply()
             
             if not confirmation:
                 self.assistant.log_message(f"❌ No se recibió respuesta. Eliminación cancelada", output_widget)
@@ -67,10 +270,10 @@ class CommandHandlers:
             confirmation = confirmation.lower().strip()
             
             if confirmation in ["sí", "si", "yes", "afirmativo"]:
-                send2trash.send2trash(filepath)
-                
-                self.assistant.log_message(f"🗑️ {item_type.capitalize()} enviado a la papelera: {found_file}", output_widget)
-                self.assistant.speak(f"{item_type.capitalize()} {found_file} enviado a la papelera de reciclaje")
+                # en segundo plano: el asistente vuelve a escuchar mientras se envia a la papelera
+                job = self.assistant.file_jobs.submit_trash(
+                    [filepath], *self.job_callbacks(output_widget, f"{item_type.capitalize()} {found_file} enviado a la papelera de reciclaje"))
+                self.assistant.log_message(f"🗑️ Trabajo {job.id}: enviando a la papelera {item_type} {found_file}", output_widget)
             else:
                 self.assistant.log_message(f"❌ Eliminación cancelada: {found_file}", output_widget)
                 self.assistant.speak("Eliminación cancelada")
@@ -78,46 +281,130 @@ class CommandHandlers:
         except Exception as e:
             error_msg = f"Error enviando a la papelera: {str(e)}"
             self.assistant.log_message(f"❌ {error_msg}", output_widget)
-            self.assistant.speak("Error al enviar a la papelera. Verifica los permisos")
+            self.assistant.speak("Error al enviar a la papelera. Verifica los permisos", priority=PRIORITY_URGENT)
+    
+    # pregunta si/no por voz; devuelve True, False o None si no hubo respuesta
+    def ask_confirmation(self, question):
+        self.assistant.speak(f"{question} Di 'sí' para confirmar o 'no' para cancelar", priority=PRIORITY_URGENT)
+        self.assistant.wait_for_speech_to_finish()
+        answer = self.assistant.recognize_reply()
+        if not answer or answer == "sin comando":
+            return None
+        return answer.lower().strip() in ["sí", "si", "yes", "afirmativo"]
+    
+    # archivos del directorio que cumplen el patron dicho, sin los que ya esta procesando otro trabajo
+    def select_pattern(self, pattern, current_dir, output_widget):
+        parsed = parse_file_pattern(pattern)
+        if parsed is None:
+            self.assistant.speak("No entendí qué archivos. Por ejemplo: todos los png, o archivos de ayer")
+            return None, ""
+        extensions, since, until, description = parsed
+        try:
+            snapshot = self.assistant.directory_cache.get(current_dir)
+        except OSError:
+            return [], description
+        names = select_files(snapshot, extensions, since, until)
+        names = [name for name in names if not self.assistant.file_jobs.busy(os.path.join(current_dir, name))]
+        if not names:
+            self.assistant.log_message(f"No hay {description} en {os.path.basename(current_dir)}", output_widget)
+            self.assistant.speak(f"No encontré {description}")
+        return names, description
+    
+    #funcion para eliminar varios archivos con una sola confirmacion ("eliminar todos los png")
+    # con files, lo que no es un filtro se elimina como un solo elemento ("eliminar los apuntes")
+    def handle_bulk_delete_command(self, pattern, current_dir, output_widget, files=None):
+        if not pattern:
+            self.assistant.speak("Debes decir qué archivos eliminar, por ejemplo: eliminar todos los png")
+            return
+        if files is not None and parse_file_pattern(pattern) is None:
+            return self.handle_delete_command(pattern, files, current_dir, output_widget)
+        names, description = self.select_pattern(pattern, current_dir, output_widget)
+        if not names:
+            return
+        self.assistant.log_message(f"🗑️ {len(names)} {description}: " + ", ".join(names[:10]) + (" ..." if len(names) > 10 else ""), output_widget)
+        confirmed = self.ask_confirmation(f"¿Enviar a la papelera {len(names)} {description}?")
+        if not confirmed:
+            self.assistant.log_message("❌ Eliminación cancelada", output_widget)
+            self.assistant.speak("No se recibió respuesta. Operación cancelada" if confirmed is None else "Eliminación cancelada")
+            return
+        # un solo trabajo y una sola llamada a send2trash con todas las rutas
+        job = self.assistant.file_jobs.submit_trash(
+            [os.path.join(current_dir, name) for name in names],
+            *self.job_callbacks(output_widget, f"{len(names)} archivos enviados a la papelera"))
+        self.assistant.log_message(f"🗑️ Trabajo {job.id}: enviando {len(names)} archivos a la papelera", output_widget)
     
-    def handle_move_command(self, cmd, files, current_dir, output_widget):
+    #funcion para mover varios archivos con una sola confirmacion ("mover todos los pdf a facturas")
+    # con files, lo que no es un filtro se mueve como un solo elemento ("mover los apuntes a archivo")
+    def handle_bulk_move_command(self, pattern, dest_folder, current_dir, output_widget, files=None):
+        if not pattern or not dest_folder:
+            self.assistant.speak("Debes decir: mover todos los pdf a carpeta")
+            return
+        if files is not None and parse_file_pattern(pattern) is None:
+            return self.handle_move_command(pattern, dest_folder, files, current_dir, output_widget)
+        names, description = self.select_pattern(pattern, current_dir, output_widget)
+        if not names:
+            return
+        dest_path = os.path.join(current_dir, dest_folder)
+        skipped = [name for name in names if os.path.exists(os.path.join(dest_path, name))] # ya existen en el destino
+        names = [name for name in names if name not in skipped]
+        if skipped:
+            self.assistant.log_message(f"⚠️ Ya existen en {dest_folder}, se omiten: " + ", ".join(skipped), output_widget)
+        if not names:
+            self.assistant.speak(f"Todos esos archivos ya existen en {dest_folder}")
+            return
+        confirmed = self.ask_confirmation(f"¿Mover {len(names)} {description} a {dest_folder}?")
+        if not confirmed:
+            self.assistant.log_message("❌ Movimiento cancelado", output_widget)
+            self.assistant.speak("No se recibió respuesta. Operación cancelada" if confirmed is None else "Movimiento cancelado")
+            return
+        try:
+            os.makedirs(dest_path, exist_ok=True)
+            self.assistant.directory_cache.add_entry(current_dir, dest_folder)
+            job = self.assistant.file_jobs.submit_move(
+                [os.path.join(current_dir, name) for name in names], dest_path,
+                *self.job_callbacks(output_widget, f"{len(names)} archivos movidos a {dest_folder}"))
+            self.assistant.log_message(f"📁 Trabajo {job.id}: moviendo {len(names)} archivos a {dest_folder}", output_widget)
+        except Exception as e:
+            self.assistant.log_message(f"❌ Error moviendo: {e}", output_widget)
+            self.assistant.speak("Error al mover los archivos", priority=PRIORITY_URGENT)
     
-        if " a " not in cmd: # si a no se encuentra en el mensaje 
+    def handle_move_command(self, target, dest_folder, files, current_dir, output_widget):
+    
+        if not target or not dest_folder: # el enrutador no encontro "archivo a carpeta"
             self.assistant.speak("Debes decir: mover archivo a carpeta")
             return
         
-        parts = cmd.split(" a ") 
-        target = parts[0].replace("mover", "").strip() # quita la palabra mover y elimina espacios
-        dest_folder = parts[1].strip() # elimina espacios de la ruta destino
-        
-        found_file = self.find_file(target, files) #fucnion auxiliar para encontrar el archivo
+        found_file = self.resolve_file(target, files, output_widget) #fucnion auxiliar para encontrar el archivo
         if found_file:
+            if self.is_busy(current_dir, found_file, output_widget):
+                return
             dest_path = os.path.join(current_dir, dest_folder)
-            os.makedirs(dest_path, exist_ok=True)
             
             try:
-                shutil.move(os.path.join(current_dir, found_file), dest_path) # recibe como parametro la direccion en la que esta y la direccion a la que se quiere mover el archivo
-                self.assistant.log_message(f"📁 {found_file} movido a {dest_folder}", output_widget) # accion agregada al log
-                self.assistant.speak(f"{found_file} movido a {dest_folder}") # output de voz por parte de el asistente
+                os.makedirs(dest_path, exist_ok=True)
+                self.assistant.directory_cache.add_entry(current_dir, dest_folder)
+                # la copia entre unidades puede tardar minutos: se hace en segundo plano con progreso en el log
+                job = self.assistant.file_jobs.submit_move(
+                    [os.path.join(current_dir, found_file)], dest_path,
+                    *self.job_callbacks(output_widget, f"{found_file} movido a {dest_folder}")) # output de voz por parte de el asistente
+                self.assistant.log_message(f"📁 Trabajo {job.id}: moviendo {found_file} a {dest_folder}", output_widget) # accion agregada al log
             except Exception as e:
                 self.assistant.log_message(f"❌ Error moviendo: {e}", output_widget)
-                self.assistant.speak("Error al mover el archivo")
+                self.assistant.speak("Error al mover el archivo", priority=PRIORITY_URGENT)
         else:
             self.assistant.speak("Archivo no encontrado")
  
     #funcion para renombrar archivo   
-    def handle_rename_command(self, cmd, files, current_dir, output_widget):
+    def handle_rename_command(self, target, new_name, files, current_dir, output_widget):
  
-        if " como " not in cmd:
+        if not target or not new_name:
             self.assistant.speak("Debes decir: renombrar archivo como nuevo nombre")
             return
         
-        parts = cmd.split(" como ")
-        target = parts[0].replace("renombrar", "").strip() # quita la palabra renombrar y elimina espacios
-        new_name = parts[1].strip() # elimina espacios del nuevo nombre
-        
-        found_file = self.find_file(target, files) # busca si el archivo existe
+        found_file = self.resolve_file(target, files, output_widget) # busca si el archivo existe
         if found_file:
+            if self.is_busy(current_dir, found_file, output_widget):
+                return
             try:
                 old_path = os.path.join(current_dir, found_file)
                 
@@ -146,18 +433,19 @@ class CommandHandlers:
                     return
                 
                 os.rename(old_path, new_path)
+                self.assistant.directory_cache.rename_entry(current_dir, found_file, final_new_name)
                 
                 self.assistant.log_message(f"✏️ {found_file} renombrado a {final_new_name}", output_widget)
                 self.assistant.speak(f"{found_file} renombrado a {final_new_name}")
                 
             except Exception as e:
                 self.assistant.log_message(f"❌ Error renombrando: {e}", output_widget)
-                self.assistant.speak("Error al renombrar el archivo")
+                self.assistant.speak("Error al renombrar el archivo", priority=PRIORITY_URGENT)
         else:
             self.assistant.speak("Archivo no encontrado")
             
     # funcion para crear un archivo (txt,word.excel, powerpoint)
-    def handle_create_file_with_type_command(self, cmd, current_dir, output_widget):
+    def handle_create_file_with_type_command(self, type_name, file_name, current_dir, output_widget):
         
         
         # Mapeo de tipos permitidos únicamente
@@ -172,19 +460,7 @@ class CommandHandlers:
             'presentacion': '.pptx'
         }
         
-        # Buscar el tipo en el comando
-        file_type = None
-        file_name = None
-        
-        for type_name, ext in type_extensions.items():
-            if type_name in cmd.lower(): # verifica si el comando trae la clave ej:texto
-                file_type = ext #si trae la clave entonces se le asigna una extencion  ej:.txt
-                # Extraer el nombre después de "llamado"
-                if "llamado" in cmd:
-                    parts = cmd.split("llamado") 
-                    if len(parts) > 1:
-                        file_name = parts[1].strip()
-                break
+        file_type = type_extensions.get(type_name) # el enrutador ya separo el tipo y el nombre ej: texto -> .txt
         
         if not file_type:
             self.assistant.speak("Solo puedo crear archivos usando: crear archivo de texto llamado nombre, crear archivo word llamado nombre, crear archivo excel llamado nombre, o crear archivo powerpoint llamado nombre")
@@ -231,17 +507,21 @@ class CommandHandlers:
                 self.assistant.log_message(f"📄 Archivo PowerPoint creado: {full_file_name}", output_widget)
                 self.assistant.speak(f"Archivo PowerPoint {file_name} creado. Ábrelo en Microsoft PowerPoint para editarlo")
             
+            self.assistant.directory_cache.add_entry(current_dir, full_file_name)
+            
         except Exception as e:
             self.assistant.log_message(f"❌ Error creando archivo: {e}", output_widget)
-            self.assistant.speak("Error al crear el archivo")
+            self.assistant.speak("Error al crear el archivo", priority=PRIORITY_URGENT)
         
     #funcion para leer los archivos y carpetas del directorio en el que se encuetre
     def handle_list_command(self, files, current_dir, output_widget):
        
         if files: # verifica si hay archivos
-            total_count = len(files)
-            folders = [f for f in files if os.path.isdir(os.path.join(current_dir, f))] #verifica si es una carpeta
-            files_only = [f for f in files if not os.path.isdir(os.path.join(current_dir, f))]
+            try:
+                folders, files_only = split_entries(self.assistant.directory_cache.get(current_dir)) # carpetas y archivos sin volver a consultar el disco
+            except OSError:
+                folders, files_only = [], list(files)
+            total_count = len(folders) + len(files_only)
             folder_count = len(folders)
             file_count = total_count - folder_count 
             
@@ -256,19 +536,19 @@ class CommandHandlers:
             # lectura de folders en caso de existier alguno
             if folders:
                 self.assistant.log_message("📁 CARPETAS:", output_widget)
-                self.assistant.speak("Carpetas disponibles:")
+                self.assistant.speak("Carpetas disponibles:", priority=PRIORITY_LOW, category="listing")
                 for i, folder in enumerate(folders, 1):
                     self.assistant.log_message(f"  {i}. 📁 {folder}", output_widget)
-                    self.assistant.speak(f"Carpeta {i}: {folder}")
+                    self.assistant.speak(f"Carpeta {i}: {folder}", priority=PRIORITY_LOW, category="listing")
             
             # mostrar archivos
             if files_only:
                 self.assistant.log_message("📄 ARCHIVOS:", output_widget)
-                self.assistant.speak("Archivos disponibles:")
+                self.assistant.speak("Archivos disponibles:", priority=PRIORITY_LOW, category="listing")
                 for i, file in enumerate(files_only, 1):
                     self.assistant.log_message(f"  {i}. 📄 {file}", output_widget)
-                    format_file = file.replace('.txt', ' punto txt').replace('.pdf', ' punto pdf').replace('.jpg', ' punto jpg').replace('.png', ' punto png').replace('.docx', ' punto docx').replace('.xlsx', ' punto excel').replace('.mp3', ' punto mp3').replace('.mp4', ' punto mp4').replace('_', ' ').replace('-', ' ')
-                    self.assistant.speak(f"Archivo {i}: {format_file}")
+                    format_file = spoken_name(file)
+                    self.assistant.speak(f"Archivo {i}: {format_file}", priority=PRIORITY_LOW, category="listing")
      
                     
         else:
@@ -277,28 +557,25 @@ class CommandHandlers:
             self.assistant.speak(f"No hay elementos en {current_folder_name}")
     
     #funcion para entrar a una carpeta
-    def handle_enter_folder_command(self, cmd, files, output_widget):
-    
-        # extraccion del nombre de la carpeta
-        folder_name = cmd.replace("entrar a", "").replace("entrar","").replace("ir a", "").replace("en", "").replace("a la", "").replace("al", "").strip()
+    def handle_enter_folder_command(self, folder_name, files, output_widget):
         
         if not folder_name:
             self.assistant.speak("Debes especificar el nombre de la carpeta")
             return
         
-        folders_only = [f for f in files if os.path.isdir(os.path.join(self.assistant.current_directory, f))] # filtra y almacena solo los directorios
+        folders_only = [f for f in files if self.is_folder(self.assistant.current_directory, f)] # filtra y almacena solo los directorios
         
         if not folders_only:
             self.assistant.log_message("❌ No hay carpetas en esta ubicación", output_widget)
             self.assistant.speak("No hay carpetas disponibles en esta ubicación")
             return
         
-        found_folder = self.find_file(folder_name, folders_only) # busca el directorio al que se quiere ir
+        found_folder = self.resolve_file(folder_name, folders_only, output_widget) # busca el directorio al que se quiere ir
         
         if found_folder: #verifica que lo encontro
             folder_path = os.path.join(self.assistant.current_directory, found_folder)
             
-            if os.path.isdir(folder_path): #verifica que sea un directorio
+            if self.is_folder(self.assistant.current_directory, found_folder): #verifica que sea un directorio
                 self.assistant.current_directory = folder_path #cambia el directorio
                 self.assistant.log_message(f"📂 Entrando a: {found_folder}", output_widget)
                 self.assistant.speak(f"Entrando a la carpeta {found_folder}")
@@ -315,13 +592,13 @@ class CommandHandlers:
             self.assistant.log_message(f"❌ No se encontró carpeta que coincida con: '{folder_name}'", output_widget)
             self.assistant.speak(f"No encontré una carpeta llamada {folder_name}. recuerda que las carptas disponibles son")
             for i, folder in enumerate(folders_only, 1):
-                self.assistant.speak(folder)
+                self.assistant.speak(folder, priority=PRIORITY_LOW, category="listing")
             
     #funcion para volver a un directorio anterior
     def handle_go_back_command(self, output_widget):
         parent_dir = os.path.dirname(self.assistant.current_directory) #devuelve directorio padre
 
-        home_dir = os.path.join(os.path.expanduser('~'), 'Desktop') 
+        home_dir = self.assistant.root_directory
         if os.path.commonpath([home_dir, parent_dir]) == home_dir and parent_dir != self.assistant.current_directory: # valida que la ruta actual no sea el escritorio 
             self.assistant.current_directory = parent_dir
             folder_name = os.path.basename(self.assistant.current_directory)
@@ -344,38 +621,132 @@ class CommandHandlers:
     
     #funcion para manejar el listado de comandos por parte del asistente de voz
     def handle_help_command(self, output_widget):
-        commands = [
-            "Comandos disponibles:",
-            "• Eliminar [nombre_archivo] - Elimina un archivo o carpeta", 
-            "• Mover [nombre_archivo] a [nombre_carpeta] - Mueve archivo",
-            "• Renombrar [nombre_archivo] como [nuevo_nombre] - Cambia nombre",
-            "• Listar archivos - Muestra todos los archivos",
-            "• Entrar [carpeta_destino] - Entra en una carpeta",
-            "• Volver - Regresa a la carpeta anterior",
-            "• Dónde estoy - Muestra la ubicación actual",
-            "• Crear carpeta [nombre] - Crea nueva carpeta",
-            "• Crear archivo de texto/word/excel/powerpoint llamado [nombre]",
-            "• Parar - Detiene el asistente",
-            "• Iniciar - Reinicia el asistente"
-        ]
-        
-        for cmd in commands:
+        for cmd in HELP_COMMANDS:
             self.assistant.log_message(cmd, output_widget)
         
-        for cmd in commands:
-            self.assistant.speak(cmd)
+        self.assistant.speak(HELP_SPEECH, priority=PRIORITY_LOW, category="help")
     
     #funcion para crear carpetas
-    def handle_create_folder_command(self, cmd, current_dir, output_widget):
-        folder_name = cmd.replace("crear carpeta", "").strip()
+    def handle_create_folder_command(self, folder_name, current_dir, output_widget):
         if folder_name:
             try:
                 folder_path = os.path.join(current_dir, folder_name)
                 os.makedirs(folder_path, exist_ok=True)
+                self.assistant.directory_cache.add_entry(current_dir, folder_name)
                 self.assistant.log_message(f"📁 Carpeta creada: {folder_name}", output_widget)
                 self.assistant.speak(f"Carpeta {folder_name} creada")
             except Exception as e:
                 self.assistant.log_message(f"❌ Error creando carpeta: {e}", output_widget)
-                self.assistant.speak("Error al crear la carpeta")
+                self.assistant.speak("Error al crear la carpeta", priority=PRIORITY_URGENT)
+        else:
+            self.assistant.speak("Debes especificar el nombre de la carpeta")
+    
+    #funcion para cancelar trabajos de archivos en segundo plano ("cancelar" o "cancelar trabajo 2")
+    def handle_cancel_command(self, target, output_widget):
+        job_id = None
+        if target and target not in ("trabajo", "todo", "todos"):
+            job_id = int(target) if target.isdigit() else NUMBERS.get(target)
+            if job_id is None:
+                self.assistant.speak("Di cancelar, o cancelar trabajo y su número")
+                return
+        cancelled = self.assistant.file_jobs.cancel(job_id)
+        search = self.assistant.search
+        if job_id is None and search and not search.done.is_set():
+            search.cancel()
+            self.assistant.log_message("⛔ Búsqueda cancelada", output_widget)
+            if not cancelled:
+                self.assistant.speak("Búsqueda cancelada")
+                return
+        if not cancelled:
+            self.assistant.log_message("No hay trabajos en curso para cancelar", output_widget)
+            self.assistant.speak("No hay trabajos en curso")
+            return
+        for job in cancelled:
+            self.assistant.log_message(f"⛔ Cancelando trabajo {job.id}: {job.describe()}", output_widget)
+        # el aviso final lo da cada trabajo al detenerse
+    
+    # carpeta de una ruta dicha respecto al Escritorio
+    def folder_label(self, path):
+        folder = os.path.relpath(os.path.dirname(path), self.assistant.root_directory)
+        return "el Escritorio" if folder == "." else folder.replace(os.sep, " / ")
+    
+    # guarda los resultados ordenados para "ir al resultado N" y lee los mejores
+    def report_search_results(self, query, results, detail, output_widget):
+        self.assistant.search_results = [result.path for result in results]
+        if not results:
+            self.assistant.log_message(f"❌ No se encontró '{query}' ({detail})", output_widget)
+            self.assistant.speak(f"No encontré nada parecido a {query}")
+            return
+        self.assistant.log_message(f"🔎 Resultados para '{query}' ({detail}):", output_widget)
+        for i, result in enumerate(results, 1):
+            self.assistant.log_message(f"  {i}. {os.path.basename(result.path)} — {self.folder_label(result.path)}", output_widget)
+        best = ". ".join(f"Resultado {i}: {spoken_name(os.path.basename(result.path))}, en {self.folder_label(result.path)}"
+                         for i, result in enumerate(results[:3], 1))
+        self.assistant.speak(f"Encontré {len(results)} resultados. {best}. Di ir al resultado y el número")
+    
+    #funcion para buscar un archivo o carpeta en todo el Escritorio ("buscar informe")
+    def handle_search_command(self, query, output_widget):
+        if not query:
+            self.assistant.speak("Debes decir qué buscar, por ejemplo: buscar informe")
+            return
+        previous = self.assistant.search
+        if previous and not previous.done.is_set():
+            previous.cancel() # solo una busqueda a la vez
+        
+        # con el indice del Escritorio listo la busqueda es una consulta; si no, se recorre el arbol
+        index = self.assistant.desktop_index
+        if index and index.ready.is_set():
+            import sqlite3
+            started = time.perf_counter()
+            try:
+                results = [result for result in index.search(query) if os.path.exists(result.path)]
+            except sqlite3.Error as e:
+                print(f"Error consultando el indice, se recorrera el arbol: {e}")
+            else:
+                self.report_search_results(query, results, f"índice, {(time.perf_counter() - started) * 1000:.0f} ms", output_widget)
+                return
+        
+        # las coincidencias aparecen en el panel a medida que se encuentran
+        def on_result(result):
+            icon = "📁" if result.is_dir else "📄"
+            self.assistant.log_message(f"  🔎 {icon} {os.path.basename(result.path)} en {self.folder_label(result.path)}", output_widget)
+        
+        def on_finished(search):
+            if not search.cancelled:
+                elapsed = (search.finished_at or 0) - (search.started_at or 0)
+                self.report_search_results(query, search.results(), f"{search.directories} carpetas en {elapsed:.1f} s", output_widget)
+        
+        self.assistant.search_results = []
+        self.assistant.search = TreeSearch(self.assistant.root_directory, query, on_result, on_finished).start()
+        self.assistant.log_message(f"🔎 Buscando '{query}' en el Escritorio...", output_widget)
+        self.assistant.speak(f"Buscando {query}")
+    
+    #funcion para ir a la carpeta de un resultado de la ultima busqueda ("ir al resultado 2")
+    def handle_go_to_result_command(self, target, output_widget):
+        results = self.assistant.search_results
+        if not results:
+            self.assistant.speak("No hay resultados de búsqueda. Di buscar y el nombre")
+            return
+        if target.isdigit():
+            position = int(target) - 1
+        elif target in NUMBERS:
+            position = NUMBERS[target] - 1
+        else:
+            position = ORDINALS.get(target, -1)
+        if not 0 <= position < len(results):
+            self.assistant.speak(f"Di un número de resultado entre 1 y {len(results)}")
+            return
+        path = results[position]
+        if not os.path.exists(path):
+            self.assistant.speak("Ese resultado ya no existe")
+            return
+        name = os.path.basename(path)
+        if os.path.isdir(path):
+            self.assistant.current_directory = path
+            self.assistant.log_message(f"📂 Entrando a: {name}", output_widget)
+            self.assistant.speak(f"Entrando a la carpeta {name}")
         else:
-            self.assistant.speak("Debes especificar el nombre de la carpeta")
\ No newline at end of file
+            self.assistant.current_directory = os.path.dirname(path)
+            folder = os.path.basename(self.assistant.current_directory)
+            self.assistant.log_message(f"📂 En {folder}, donde está {name}", output_widget)
+            self.assistant.speak(f"Estás en la carpeta {folder}, donde está {spoken_name(name)}")
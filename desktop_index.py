@@ -0,0 +1,279 @@
+import os
+import sqlite3
+import threading
+import time
+from file_index import QueryMatcher, normalize_query, tokens, MIN_SCORE
+from tree_search import SearchResult
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # sin watchdog el indice se pone al dia comparando el mtime de cada carpeta
+    Observer = None
+    FileSystemEventHandler = object
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser('~'), '.asistente_voz', 'indice_escritorio.sqlite3')
+MAX_MATCHES = 2000  # filas de FTS que se puntuan por busqueda
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent);
+CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS builds (root TEXT PRIMARY KEY, finished REAL NOT NULL);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS names USING fts5(
+    name, content='entries', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS entries_ai AFTER INSERT ON entries BEGIN
+    INSERT INTO names(rowid, name) VALUES (new.rowid, new.name);
+END;
+CREATE TRIGGER IF NOT EXISTS entries_ad AFTER DELETE ON entries BEGIN
+    INSERT INTO names(names, rowid, name) VALUES ('delete', old.rowid, old.name);
+END;
+"""
+
+
+# marca como pendiente la carpeta donde ocurrio cada cambio
+class _IndexEventHandler(FileSystemEventHandler):
+    def __init__(self, index):
+        self.index = index
+
+    def on_any_event(self, event):
+        self.index.mark_dirty(os.path.dirname(event.src_path))
+        if event.is_directory and event.event_type in ("created", "moved"):
+            self.index.mark_dirty(getattr(event, "dest_path", "") or event.src_path, recursive=True)
+        elif getattr(event, "dest_path", ""):
+            self.index.mark_dirty(os.path.dirname(event.dest_path))
+
+
+# indice persistente (SQLite + FTS5) de todo lo que hay bajo el Escritorio: ruta, tipo, tamaño y fecha
+# se construye en segundo plano; despues solo se releen las carpetas cuyo mtime cambio o que avisan cambios
+# si la base ya tiene una pasada completa (de una ejecucion anterior) se busca en ella mientras se pone al dia
+class DesktopIndex:
+    def __init__(self, root, path=DEFAULT_INDEX_PATH, batch_dirs=200, refresh_interval=600, watch=True):
+        self.root = os.path.normpath(root)
+        self.path = path
+        self.batch_dirs = batch_dirs  # carpetas por transaccion: lo ya recorrido queda guardado aunque se cierre
+        self.refresh_interval = refresh_interval  # sin watchdog, cada cuanto se repasa el mtime de las carpetas
+        self.watch = watch
+        self.fts = True
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.dirty = {}  # carpeta -> True si hay que recorrer tambien sus subcarpetas
+        self.wake = threading.Event()
+        self.ready = threading.Event()  # hay una pasada completa en la base (de esta ejecucion o de una anterior)
+        self.running = False
+        self.thread = None
+        self.observer = None
+        self.directories_scanned = 0
+        self.directories_skipped = 0
+        self.entries_written = 0
+        self.build_seconds = None
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+
+    def mark_dirty(self, path, recursive=False):
+        path = os.path.normpath(path)
+        if path != self.root and not path.startswith(self.root + os.sep):
+            return
+        with self.lock:
+            self.dirty[path] = self.dirty.get(path, False) or recursive
+        self.wake.set()
+
+    # busqueda por nombre en todo el arbol: FTS5 da los candidatos y se ordenan con el mismo puntaje que FileIndex
+    def search(self, query, limit=10):
+        words = [word for word in tokens(normalize_query(query)) if len(word) > 1] or tokens(normalize_query(query))
+        if not words:
+            return []
+        conn = self._reader()
+        if self.fts:
+            match = " OR ".join(f'"{word}"*' for word in words)
+            rows = conn.execute(
+                "SELECT e.path, e.name, e.is_dir FROM names JOIN entries e ON e.rowid = names.rowid "
+                "WHERE names MATCH ? ORDER BY names.rank LIMIT ?", (match, MAX_MATCHES))  # las mas relevantes primero
+        else:
+            where = " OR ".join("name LIKE ?" for _ in words)
+            rows = conn.execute(f"SELECT path, name, is_dir FROM entries WHERE {where} ORDER BY length(name) LIMIT ?",
+                                [f"%{word}%" for word in words] + [MAX_MATCHES])
+        matcher = QueryMatcher(query)
+        results = []
+        for path, name, is_dir in rows:
+            score = matcher.score(name)
+            if score >= MIN_SCORE:
+                depth = path.count(os.sep) - self.root.count(os.sep) - 1
+                results.append(SearchResult(path, score, bool(is_dir), depth))
+        results.sort(reverse=True)
+        return results[:limit]
+
+    def stats(self):
+        conn = self._reader()
+        return {
+            "ready": self.ready.is_set(),
+            "entries": conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0],
+            "directories": conn.execute("SELECT COUNT(*) FROM dirs").fetchone()[0],
+            "directories_scanned": self.directories_scanned,
+            "directories_skipped": self.directories_skipped,
+            "entries_written": self.entries_written,
+            "build_seconds": self.build_seconds,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")  # las busquedas leen mientras el hilo del indice escribe
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # una conexion de lectura por hilo
+    def _reader(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = self.local.conn = self._connect()
+        return conn
+
+    def _create_schema(self, conn):
+        conn.executescript(SCHEMA)
+        try:
+            conn.executescript(FTS_SCHEMA)
+        except sqlite3.OperationalError as e:  # SQLite compilado sin FTS5: se busca con LIKE
+            print(f"FTS5 no disponible, el indice usara LIKE: {e}")
+            self.fts = False
+        conn.commit()
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            self._create_schema(conn)
+            if conn.execute("SELECT 1 FROM builds WHERE root = ?", (self.root,)).fetchone():
+                self.ready.set()  # lo guardado sirve ya; el repaso por mtime sigue en segundo plano
+            started = time.monotonic()
+            self._refresh_tree(conn, self.root)
+            if not self.running:
+                return  # pasada incompleta: no se marca, la proxima ejecucion sigue recorriendo
+            self.build_seconds = time.monotonic() - started
+            conn.execute("INSERT OR REPLACE INTO builds VALUES (?, ?)", (self.root, time.time()))
+            conn.commit()
+            self.ready.set()
+            self._start_watching()
+            while self.running:
+                woke = self.wake.wait(None if self.observer else self.refresh_interval)
+                if not self.running:
+                    break
+                if not woke:
+                    self._refresh_tree(conn, self.root)  # repaso periodico por mtime
+                    continue
+                time.sleep(0.5)  # junta los eventos de una misma operacion
+                self.wake.clear()
+                with self.lock:
+                    dirty, self.dirty = self.dirty, {}
+                for path, recursive in dirty.items():
+                    if recursive:
+                        self._refresh_tree(conn, path, force=True)
+                    else:
+                        self._refresh_dir(conn, path, force=True)
+                conn.commit()
+        except Exception as e:
+            print(f"Error en el indice del Escritorio: {e}")
+
+    def _start_watching(self):
+        if not self.watch or Observer is None:
+            return
+        try:
+            self.observer = Observer()
+            self.observer.daemon = True
+            self.observer.schedule(_IndexEventHandler(self), self.root, recursive=True)
+            self.observer.start()
+        except Exception as e:
+            print(f"No se pudo vigilar el Escritorio, se usara el mtime: {e}")
+            self.observer = None
+
+    # recorre el arbol releyendo solo las carpetas que cambiaron desde la ultima vez
+    def _refresh_tree(self, conn, top, force=False):
+        pending = [top]
+        done = 0
+        while pending and self.running:
+            path = pending.pop()
+            pending.extend(self._refresh_dir(conn, path, force))
+            done += 1
+            if done % self.batch_dirs == 0:
+                conn.commit()
+        conn.commit()
+
+    # pone al dia las filas de una carpeta; devuelve sus subcarpetas
+    # sin force, una carpeta con el mismo mtime no se relee: los nombres siguen al dia (crear, borrar o renombrar
+    # cambia el mtime de la carpeta) pero el tamaño y la fecha de un archivo editado en el lugar no; con watchdog
+    # ese cambio llega como evento y fuerza la relectura, en el repaso periodico queda hasta el siguiente cambio
+    def _refresh_dir(self, conn, path, force=False):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._delete_tree(conn, path)
+            return []
+        row = conn.execute("SELECT mtime FROM dirs WHERE path = ?", (path,)).fetchone()
+        if row and row[0] == mtime and not force:
+            self.directories_skipped += 1
+            return [r[0] for r in conn.execute("SELECT path FROM entries WHERE parent = ? AND is_dir = 1", (path,))]
+        known = {name: (is_dir, size, entry_mtime) for name, is_dir, size, entry_mtime in
+                 conn.execute("SELECT name, is_dir, size, mtime FROM entries WHERE parent = ?", (path,))}
+        subdirs = []
+        seen = set()
+        try:
+            with os.scandir(path) as iterator:
+                for entry in iterator:
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    seen.add(entry.name)
+                    current = (int(is_dir), 0 if is_dir else st.st_size, st.st_mtime)
+                    if is_dir:
+                        subdirs.append(entry.path)
+                    old = known.get(entry.name)
+                    if old == current:
+                        continue
+                    if old is not None and old[0] != current[0]:
+                        self._delete_tree(conn, entry.path)  # cambio de archivo a carpeta o al reves
+                        old = None
+                    if old is None:
+                        conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                     (entry.path, path, entry.name) + current)
+                    else:
+                        conn.execute("UPDATE entries SET size = ?, mtime = ? WHERE path = ?",
+                                     (current[1], current[2], entry.path))
+                    self.entries_written += 1
+        except OSError:
+            self._delete_tree(conn, path)
+            return []
+        for name in known.keys() - seen:
+            self._delete_tree(conn, os.path.join(path, name))
+        conn.execute("INSERT OR REPLACE INTO dirs VALUES (?, ?)", (path, mtime))
+        self.directories_scanned += 1
+        return subdirs
+
+    # borra una ruta y todo lo que hay debajo
+    def _delete_tree(self, conn, path):
+        prefix = path + os.sep
+        for table in ("entries", "dirs"):
+            conn.execute(f"DELETE FROM {table} WHERE path = ? OR (path >= ? AND path < ?)",
+                         (path, prefix, prefix + "\U0010ffff"))
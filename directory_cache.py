@@ -0,0 +1,243 @@
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:  # sin watchdog se valida el cache con el mtime del directorio
+    Observer = None
+    FileSystemEventHandler = object
+
+# en Windows os.scandir ya trae tamaño y fecha; en otros sistemas pedirlos es un stat extra por archivo
+STAT_IS_FREE = os.name == "nt"
+
+
+# un elemento del directorio: nombre, si es carpeta, tamaño en bytes y fecha de modificacion (None si aun no se consulto)
+class DirectoryEntry:
+    __slots__ = ("name", "is_dir", "size", "mtime")
+
+    def __init__(self, name, is_dir, size=0, mtime=None):
+        self.name = name
+        self.is_dir = is_dir
+        self.size = size
+        self.mtime = mtime
+
+
+# foto de un directorio en memoria; se mantiene al dia con los eventos del sistema de archivos
+class DirectorySnapshot:
+    def __init__(self, path, entries, mtime):
+        self.path = path
+        self.entries = entries  # OrderedDict nombre -> DirectoryEntry, en el orden de os.scandir
+        self.mtime = mtime
+        self.version = 0  # aumenta con cada cambio, sirve para invalidar indices derivados
+        self.index = None  # FileIndex de los nombres, se crea la primera vez que se busca un archivo
+        self._names = None
+
+    def names(self):
+        if self._names is None:
+            self._names = list(self.entries)
+        return self._names
+
+    def is_dir(self, name):
+        entry = self.entries.get(name)
+        return bool(entry and entry.is_dir)
+
+    def size(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return 0
+        if entry.size is None:
+            self._stat(entry)
+        return entry.size
+
+    def modified(self, name):
+        entry = self.entries.get(name)
+        if entry is None:
+            return 0.0
+        if entry.mtime is None:
+            self._stat(entry)
+        return entry.mtime
+
+    def _stat(self, entry):
+        try:
+            st = os.stat(os.path.join(self.path, entry.name))
+            entry.size = 0 if entry.is_dir else st.st_size
+            entry.mtime = st.st_mtime
+        except OSError:
+            entry.size, entry.mtime = 0, 0.0
+
+    def _changed(self):
+        self.version += 1
+        self._names = None
+
+
+def _scan(path):
+    entries = OrderedDict()
+    with os.scandir(path) as iterator:
+        for entry in iterator:
+            try:
+                is_dir = entry.is_dir()  # usa el d_type de scandir, sin stat
+                size, mtime = None, None
+                if STAT_IS_FREE:
+                    st = entry.stat()
+                    size, mtime = (0 if is_dir else st.st_size), st.st_mtime
+                elif is_dir:
+                    size = 0
+            except OSError:
+                is_dir, size, mtime = False, 0, 0.0
+            entries[entry.name] = DirectoryEntry(entry.name, is_dir, size, mtime)
+    return entries
+
+
+def _stat_entry(path, name):
+    try:
+        st = os.stat(os.path.join(path, name))
+    except OSError:
+        return None
+    is_dir = os.path.isdir(os.path.join(path, name))
+    return DirectoryEntry(name, is_dir, 0 if is_dir else st.st_size, st.st_mtime)
+
+
+# aplica los eventos de watchdog sobre las fotos en memoria
+class _SnapshotEventHandler(FileSystemEventHandler):
+    def __init__(self, cache):
+        self.cache = cache
+
+    def on_created(self, event):
+        self.cache.add_entry(*os.path.split(event.src_path))
+
+    def on_deleted(self, event):
+        self.cache.remove_entry(*os.path.split(event.src_path))
+
+    def on_modified(self, event):
+        if not event.is_directory:
+            self.cache.add_entry(*os.path.split(event.src_path))
+
+    def on_moved(self, event):
+        self.cache.remove_entry(*os.path.split(event.src_path))
+        self.cache.add_entry(*os.path.split(event.dest_path))
+
+
+# cache de directorios: un comando repetido en la misma carpeta no vuelve a leer el disco
+class DirectoryCache:
+    def __init__(self, max_directories=16, watch=True):
+        self.max_directories = max_directories
+        self.lock = threading.RLock()
+        self.snapshots = OrderedDict()  # ruta -> DirectorySnapshot (LRU)
+        self.watches = {}
+        self.observer = None
+        self.scans = 0  # lecturas completas del disco, util para medir aciertos del cache
+        if watch and Observer is not None:
+            try:
+                self.observer = Observer()
+                self.observer.daemon = True
+                self.observer.start()
+            except Exception as e:
+                print(f"No se pudo iniciar watchdog, se usara el mtime: {e}")
+                self.observer = None
+        self.handler = _SnapshotEventHandler(self)
+
+    # devuelve la foto del directorio, leyendo el disco solo si no esta en cache
+    def get(self, path):
+        path = os.path.normpath(path)
+        with self.lock:
+            snapshot = self.snapshots.get(path)
+            if snapshot is not None and self._is_fresh(snapshot):
+                self.snapshots.move_to_end(path)
+                return snapshot
+            self._watch(path)  # se vigila antes de leer para no perder cambios intermedios
+        entries = _scan(path)  # lanza OSError si el directorio no existe
+        mtime = os.stat(path).st_mtime_ns
+        with self.lock:
+            self.scans += 1
+            snapshot = DirectorySnapshot(path, entries, mtime)
+            self.snapshots[path] = snapshot
+            self.snapshots.move_to_end(path)
+            while len(self.snapshots) > self.max_directories:
+                old_path, _ = self.snapshots.popitem(last=False)
+                self._unwatch(old_path)
+        return snapshot
+
+    def invalidate(self, path):
+        with self.lock:
+            self.snapshots.pop(os.path.normpath(path), None)
+
+    # actualiza (o agrega) un elemento consultando solo ese archivo
+    def add_entry(self, path, name):
+        path = os.path.normpath(path)
+        with self.lock:
+            snapshot = self.snapshots.get(path)
+            if snapshot is None:
+                return
+            entry = _stat_entry(path, name)
+            if entry is None:
+                return
+            if snapshot.index is not None:
+                snapshot.index.add(name)
+            snapshot.entries[name] = entry
+            self._changed(snapshot)
+
+    def remove_entry(self, path, name):
+        path = os.path.normpath(path)
+        with self.lock:
+            snapshot = self.snapshots.get(path)
+            if snapshot is not None and snapshot.entries.pop(name, None) is not None:
+                if snapshot.index is not None:
+                    snapshot.index.remove(name)
+                self._changed(snapshot)
+
+    def rename_entry(self, path, old_name, new_name):
+        path = os.path.normpath(path)
+        with self.lock:
+            snapshot = self.snapshots.get(path)
+            if snapshot is None:
+                return
+            entry = snapshot.entries.pop(old_name, None)
+            if entry is None:
+                return
+            entry.name = new_name
+            snapshot.entries[new_name] = entry
+            if snapshot.index is not None:
+                snapshot.index.remove(old_name)
+                snapshot.index.add(new_name)
+            self._changed(snapshot)
+
+    def stop(self):
+        if self.observer:
+            self.observer.stop()
+            self.observer = None
+
+    # sin watchdog se guarda el nuevo mtime para que nuestros propios cambios no obliguen a releer
+    def _changed(self, snapshot):
+        snapshot._changed()
+        if snapshot.path not in self.watches:
+            try:
+                snapshot.mtime = os.stat(snapshot.path).st_mtime_ns
+            except OSError:
+                pass
+
+    # con watchdog las fotos se mantienen solas; sin watchdog se compara el mtime del directorio
+    def _is_fresh(self, snapshot):
+        if snapshot.path in self.watches:
+            return True
+        try:
+            return os.stat(snapshot.path).st_mtime_ns == snapshot.mtime
+        except OSError:
+            return False
+
+    def _watch(self, path):
+        if self.observer is None or path in self.watches:
+            return
+        try:
+            self.watches[path] = self.observer.schedule(self.handler, path, recursive=False)
+        except Exception as e:
+            print(f"No se pudo vigilar {path}: {e}")
+
+    def _unwatch(self, path):
+        watch = self.watches.pop(path, None)
+        if watch is not None:
+            try:
+                self.observer.unschedule(watch)
+            except Exception:
+                pass
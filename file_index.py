@@ -0,0 +1,203 @@
+import re
+import heapq
+import itertools
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r"[a-z0-9ñ]+")
+SPOKEN_DOT_RE = re.compile(r"\s*\bpunto\s+")  # "reporte punto pdf" -> "reporte.pdf"
+
+MIN_SCORE = 0.45  # por debajo de este puntaje no se considera coincidencia
+MAX_CANDIDATES = 100  # nombres que se puntuan en detalle por consulta
+RARE_GRAMS = 4  # trigramas menos frecuentes de la consulta usados para generar candidatos
+COMMON_POSTINGS = 500  # listas mas largas (ej: "pdf") no ayudan a elegir candidatos
+
+
+# minusculas sin tildes (la ñ se conserva)
+def fold(text):
+    text = text.lower()
+    if text.isascii():
+        return text
+    text = text.replace("ñ", "\0")
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return text.replace("\0", "ñ")
+
+
+# normaliza lo que dijo el usuario: tildes, "punto pdf", guiones y espacios
+def normalize_query(text):
+    text = fold(text).strip()
+    text = SPOKEN_DOT_RE.sub(".", text)
+    return " ".join(text.replace("_", " ").replace("-", " ").split())
+
+
+def tokens(text):
+    return TOKEN_RE.findall(text)
+
+
+# clave fonetica sencilla para el español: letras que suenan igual y plural final
+@lru_cache(maxsize=65536)
+def phonetic_key(token):
+    key = token
+    for a, b in (("ch", "X"), ("qu", "k"), ("ll", "y"), ("ce", "se"), ("ci", "si"), ("ge", "je"), ("gi", "ji")):
+        key = key.replace(a, b)
+    key = key.replace("c", "k").replace("z", "s").replace("v", "b").replace("w", "b").replace("h", "").replace("x", "ks")
+    key = re.sub(r"(.)\1+", r"\1", key)  # letras repetidas
+    if len(key) > 3 and key.endswith("s"):
+        key = key[:-1]  # "reportes" ~ "reporte"
+    return key
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# indice de nombres de un directorio: se construye una vez por foto del directorio
+# se actualiza en el lugar con add/remove cuando cambia el directorio (los ids borrados quedan como None)
+# add/remove llegan desde el hilo de watchdog mientras otro hilo busca: las tres operaciones toman lock
+class FileIndex:
+    def __init__(self, names):
+        self.lock = threading.RLock()
+        self.names = []
+        self.folded = []
+        self.ids = {}  # nombre -> id
+        self.exact = defaultdict(set)  # nombre normalizado (con y sin extension) -> ids
+        self.by_token = defaultdict(set)  # palabra o clave fonetica -> ids
+        self.by_gram = defaultdict(set)  # trigrama -> ids
+        self.token_sets = []
+        self.gram_sets = []
+        for name in names:
+            self.add(name)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, name):
+        with self.lock:
+            self._add(name)
+
+    def _add(self, name):
+        if name in self.ids:
+            return
+        i = len(self.names)
+        folded = normalize_query(name)
+        self.names.append(name)
+        self.folded.append(folded)
+        self.ids[name] = i
+        stem = folded.rsplit(".", 1)[0] if "." in folded else folded
+        self.exact[folded].add(i)
+        if stem != folded:
+            self.exact[stem].add(i)
+        keys = set()
+        for token in tokens(folded):
+            keys.add(token)
+            keys.add(phonetic_key(token))
+        for key in keys:
+            self.by_token[key].add(i)
+        self.token_sets.append(keys)
+        grams = trigrams(folded)
+        for gram in grams:
+            self.by_gram[gram].add(i)
+        self.gram_sets.append(grams)
+
+    def remove(self, name):
+        with self.lock:
+            i = self.ids.pop(name, None)
+            if i is not None:
+                self.names[i] = None
+
+    # devuelve [(nombre, puntaje)] ordenado de mayor a menor
+    def search(self, query, limit=5, allowed=None):
+        with self.lock:
+            return self._search(query, limit, allowed)
+
+    def _search(self, query, limit, allowed):
+        query = normalize_query(query)
+        if not query:
+            return []
+        query_tokens = tokens(query)
+        query_grams = trigrams(query)
+
+        # candidatos: coincidencias exactas, palabras/claves foneticas y los trigramas mas raros
+        postings = [(self.exact[query], 1000)] if query in self.exact else []
+        for token in query_tokens:
+            for key in {token, phonetic_key(token)}:
+                if key in self.by_token:
+                    postings.append((self.by_token[key], 10))
+        rare = sorted((self.by_gram[g] for g in query_grams if g in self.by_gram), key=len)[:RARE_GRAMS]
+        postings.extend((ids, 1) for ids in rare)
+        postings.sort(key=lambda item: len(item[0]))
+
+        # las listas selectivas se suman con peso
+        hits = defaultdict(int)
+        common = []
+        for ids, weight in postings:
+            if len(ids) > COMMON_POSTINGS:
+                common.append(ids)
+                continue
+            for i in ids:
+                hits[i] += weight
+        candidates = heapq.nlargest(MAX_CANDIDATES, hits, key=hits.get) if len(hits) > MAX_CANDIDATES else hits
+        results = self._rank(candidates, query, query_tokens, query_grams, allowed)
+
+        # si las selectivas no alcanzan (ej: "captura_5" entre 100.000 capturas, o "pdf") se intersectan las comunes:
+        # se recorre la lista mas corta y se corta en cuanto hay suficientes nombres que esten en todas
+        if len(results) < limit and common:
+            smallest, others = common[0], common[1:]
+            extra = itertools.islice((i for i in smallest if i not in hits and all(i in ids for ids in others)),
+                                     MAX_CANDIDATES)
+            results += self._rank(extra, query, query_tokens, query_grams, allowed)
+        results.sort(key=lambda item: -item[1])
+        return results[:limit]
+
+    def _rank(self, candidates, query, query_tokens, query_grams, allowed):
+        results = []
+        for i in candidates:
+            name = self.names[i]
+            if name is None or (allowed is not None and name not in allowed):
+                continue
+            score = self._score(i, query, query_tokens, query_grams)
+            if score >= MIN_SCORE:
+                results.append((name, score))
+        return results
+
+    def _score(self, i, query, query_tokens, query_grams):
+        if i in self.exact.get(query, ()):
+            return 1.0
+        return similarity(query, query_tokens, query_grams, self.folded[i], self.gram_sets[i], self.token_sets[i])
+
+
+# puntaje de un nombre normalizado frente a la consulta (sin contar la coincidencia exacta)
+def similarity(query, query_tokens, query_grams, folded, grams, keys):
+    dice = 2 * len(query_grams & grams) / (len(query_grams) + len(grams))
+    score = dice
+    if query in folded:  # el comportamiento anterior: el nombre contiene lo dicho
+        score = max(score, 0.75 + 0.2 * len(query) / len(folded))
+    if query_tokens:
+        matched = sum(1 for t in query_tokens if t in keys or phonetic_key(t) in keys)
+        score = max(score, 0.5 * dice + 0.45 * matched / len(query_tokens))
+    return min(score, 0.99)
+
+
+# puntua nombres sueltos con el mismo criterio que FileIndex, para recorridos sin indice
+class QueryMatcher:
+    def __init__(self, query):
+        self.query = normalize_query(query)
+        self.tokens = tokens(self.query)
+        self.grams = trigrams(self.query)
+
+    def score(self, name):
+        folded = normalize_query(name)
+        if folded == self.query or folded.rsplit(".", 1)[0] == self.query:
+            return 1.0
+        grams = trigrams(folded)
+        if not grams & self.grams and self.query not in folded:
+            return 0.0  # descarte rapido: ni un trigrama en comun
+        keys = set()
+        for token in tokens(folded):
+            keys.add(token)
+            keys.add(phonetic_key(token))
+        return similarity(self.query, self.tokens, self.grams, folded, grams, keys)
@@ -0,0 +1,255 @@
+import errno
+import itertools
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import send2trash
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# una operacion de archivos en segundo plano (mover o enviar a la papelera) con su progreso
+class FileJob:
+    def __init__(self, job_id, kind, sources, destination=None, on_progress=None, on_finished=None):
+        self.id = job_id
+        self.kind = kind  # "move" o "trash"
+        self.sources = sources  # rutas completas
+        self.destination = destination
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.status = "pending"  # pending, running, done, cancelled, failed
+        self.error = None
+        self.completed = []  # fuentes ya procesadas
+        self.total_files = 0
+        self.total_bytes = 0
+        self.done_files = 0
+        self.done_bytes = 0
+        self.cancel_event = threading.Event()
+        self.created_at = time.time()
+        self.finished_at = None
+        self._last_report = 0.0
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    @property
+    def active(self):
+        return self.status in ("pending", "running")
+
+    # fraccion terminada; por bytes si se conocen, si no por elementos
+    def progress(self):
+        if self.total_bytes:
+            return self.done_bytes / self.total_bytes
+        if self.total_files:
+            return self.done_files / self.total_files
+        return len(self.completed) / len(self.sources) if self.sources else 1.0
+
+    def describe(self):
+        names = ", ".join(os.path.basename(source) for source in self.sources[:3])
+        if len(self.sources) > 3:
+            names += f" y {len(self.sources) - 3} más"
+        if self.kind == "move":
+            return f"mover {names} a {os.path.basename(self.destination)}"
+        return f"enviar a la papelera {names}"
+
+
+# ejecuta las operaciones de archivos en hilos propios para que el asistente siga escuchando
+# mantiene el cache de directorios al dia a medida que cada elemento termina
+class FileJobRunner:
+    def __init__(self, directory_cache=None, max_workers=2, progress_interval=2.0, chunk_size=1024 * 1024,
+                 trash_batch=500, history=20):
+        self.directory_cache = directory_cache
+        self.trash_batch = trash_batch  # rutas por llamada a send2trash (una sola llamada en los casos normales)
+        self.progress_interval = progress_interval  # segundos entre avisos de progreso
+        self.chunk_size = chunk_size
+        self.history = history
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="archivos")
+        self.lock = threading.Lock()
+        self.jobs = {}  # id -> FileJob, los terminados se conservan hasta history
+        self.ids = itertools.count(1)
+
+    def submit_move(self, sources, destination, on_progress=None, on_finished=None):
+        return self._submit("move", sources, destination, on_progress, on_finished)
+
+    def submit_trash(self, sources, on_progress=None, on_finished=None):
+        return self._submit("trash", sources, None, on_progress, on_finished)
+
+    # cancela un trabajo por id, o todos los activos si no se indica; devuelve los trabajos cancelados
+    def cancel(self, job_id=None):
+        with self.lock:
+            jobs = [job for job in self.jobs.values() if job.active and (job_id is None or job.id == job_id)]
+        for job in jobs:
+            job.cancel()
+        return jobs
+
+    def active(self):
+        with self.lock:
+            return [job for job in self.jobs.values() if job.active]
+
+    # True si la ruta (o una carpeta que la contiene) es parte de un trabajo en curso
+    def busy(self, path):
+        path = os.path.normcase(os.path.abspath(path))
+        for job in self.active():
+            for source in job.sources:
+                source = os.path.normcase(os.path.abspath(source))
+                if path == source or path.startswith(source + os.sep):
+                    return True
+        return False
+
+    def shutdown(self, cancel=True):
+        if cancel:
+            self.cancel()
+        self.executor.shutdown(wait=False)
+
+    def _submit(self, kind, sources, destination, on_progress, on_finished):
+        with self.lock:
+            job = FileJob(next(self.ids), kind, list(sources), destination, on_progress, on_finished)
+            self.jobs[job.id] = job
+            finished = [old.id for old in self.jobs.values() if not old.active]
+            for old_id in finished[:max(0, len(finished) - self.history)]:
+                del self.jobs[old_id]
+        self.executor.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        job.status = "running"
+        try:
+            if job.kind == "move":
+                self._move(job)
+            else:
+                self._trash(job)
+            job.status = "done"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = e
+        finally:
+            job.finished_at = time.time()
+            if job.status != "done":
+                self._invalidate(job)  # pudo quedar algo a medias: se relee al volver a consultar
+        if job.on_finished:
+            try:
+                job.on_finished(job)
+            except Exception as e:
+                print(f"Error avisando el fin del trabajo {job.id}: {e}")
+
+    def _check(self, job):
+        if job.cancel_event.is_set():
+            raise JobCancelled()
+
+    def _report(self, job, force=False):
+        now = time.monotonic()
+        if job.on_progress and (force or now - job._last_report >= self.progress_interval):
+            job._last_report = now
+            try:
+                job.on_progress(job)
+            except Exception as e:
+                print(f"Error informando el progreso del trabajo {job.id}: {e}")
+
+    # mover: renombrar si es la misma unidad; si no, copiar por bloques (cancelable) y borrar el original
+    def _move(self, job):
+        job.total_files = len(job.sources)
+        for source in job.sources:
+            self._check(job)
+            target = os.path.join(job.destination, os.path.basename(source))
+            if os.path.exists(target):
+                raise shutil.Error(f"Ya existe {target}")
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise  # permisos, archivo en uso, etc.: copiar no lo arreglaria
+                self._copy_across(job, source, target)
+            else:
+                job.done_files += 1
+            self._item_moved(job, source)
+            self._report(job)
+
+    def _copy_across(self, job, source, target):
+        sizes = self._measure(source)
+        job.total_files += len(sizes) - 1
+        job.total_bytes += sum(sizes)
+        self._report(job, force=True)
+        try:
+            if os.path.isdir(source):
+                for root, dirs, files in os.walk(source):
+                    self._check(job)
+                    relative = os.path.relpath(root, source)
+                    os.makedirs(os.path.normpath(os.path.join(target, relative)), exist_ok=True)
+                    for name in files:
+                        self._copy_file(job, os.path.join(root, name), os.path.normpath(os.path.join(target, relative, name)))
+                shutil.copystat(source, target)
+            else:
+                self._copy_file(job, source, target)
+        except BaseException:
+            # la copia incompleta se borra; el original sigue intacto
+            if os.path.isdir(target):
+                shutil.rmtree(target, ignore_errors=True)
+            elif os.path.exists(target):
+                os.remove(target)
+            raise
+        if os.path.isdir(source):
+            shutil.rmtree(source)
+        else:
+            os.remove(source)
+
+    def _copy_file(self, job, source, target):
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            while True:
+                self._check(job)
+                chunk = src.read(self.chunk_size)
+                if not chunk:
+                    break
+                dst.write(chunk)
+                job.done_bytes += len(chunk)
+                self._report(job)
+        shutil.copystat(source, target)
+        job.done_files += 1
+
+    def _measure(self, path):
+        if not os.path.isdir(path):
+            return [os.path.getsize(path)]
+        sizes = []
+        for root, _, files in os.walk(path):
+            for name in files:
+                try:
+                    sizes.append(os.path.getsize(os.path.join(root, name)))
+                except OSError:
+                    sizes.append(0)
+        return sizes or [0]
+
+    # una llamada a send2trash por lote: en Windows cada llamada es una operacion del shell completa
+    def _trash(self, job):
+        job.total_files = len(job.sources)
+        for start in range(0, len(job.sources), self.trash_batch):
+            self._check(job)
+            batch = job.sources[start:start + self.trash_batch]
+            send2trash.send2trash(batch if len(batch) > 1 else batch[0])
+            job.done_files += len(batch)
+            for source in batch:
+                self._item_removed(job, source)
+            self._report(job)
+
+    def _item_moved(self, job, source):
+        job.completed.append(source)
+        if self.directory_cache:
+            folder, name = os.path.split(source)
+            self.directory_cache.remove_entry(folder, name)
+            self.directory_cache.add_entry(job.destination, name)
+
+    def _item_removed(self, job, source):
+        job.completed.append(source)
+        if self.directory_cache:
+            self.directory_cache.remove_entry(*os.path.split(source))
+
+    def _invalidate(self, job):
+        if self.directory_cache:
+            for folder in {os.path.dirname(source) for source in job.sources}:
+                self.directory_cache.invalidate(folder)
+            if job.destination:
+                self.directory_cache.invalidate(job.destination)
@@ -0,0 +1,111 @@
+import re
+
+
+# definicion declarativa de un comando: palabras clave que lo activan y expresion para extraer sus datos
+class Intent:
+    def __init__(self, name, keywords, slots=None, closed=False, always_active=False):
+        self.name = name
+        self.keywords = keywords
+        self.slots = re.compile(slots) if slots else None  # se aplica al texto que sigue a la palabra clave
+        self.closed = closed  # sin argumentos: se puede despachar con el texto parcial
+        self.always_active = always_active  # funciona aunque el asistente este detenido
+
+
+# resultado de enrutar una frase: el comando, los datos extraidos y el texto original
+class Route:
+    def __init__(self, intent, slots, text, complete=True):
+        self.intent = intent
+        self.slots = slots
+        self.text = text
+        self.complete = complete  # False si el comando necesita datos que no se dijeron
+
+    @property
+    def name(self):
+        return self.intent.name if self.intent else None
+
+    def get(self, slot, default=""):
+        return self.slots.get(slot) or default
+
+
+FILE_TYPES = r"archivo de texto|texto|word|excel|power ?point|presentaci[oó]n"
+
+# tabla de comandos; si hay varias palabras clave en la frase gana la que aparece primero
+INTENTS = [
+    Intent("no_command", ["sin comando"]),
+    Intent("start", ["iniciar", "empezar", "activar"], closed=True, always_active=True),
+    Intent("stop", ["parar", "detener", "terminar"], closed=True, always_active=True),
+    # comandos sobre un conjunto de archivos: "eliminar todos los png", "borrar las imágenes de hoy",
+    # "mover archivos de ayer a archivo"; si lo que sigue no es un filtro se trata como un solo elemento
+    Intent("delete_many", ["eliminar todos los", "eliminar todas las", "borrar todos los", "borrar todas las",
+                           "eliminar los archivos", "borrar los archivos", "eliminar archivos", "borrar archivos",
+                           "eliminar los", "eliminar las", "borrar los", "borrar las"],
+           slots=r"^(?P<pattern>.+)$"),
+    Intent("move_many", ["mover todos los", "mover todas las", "mover los archivos", "mover archivos",
+                         "mover los", "mover las"],
+           slots=r"^(?P<pattern>.+?)\s+a\s+(?:la\s+carpeta\s+)?(?P<destination>.+)$"),
+    Intent("delete", ["eliminar", "borrar"], slots=r"^(?P<target>.+)$"),
+    Intent("move", ["mover"], slots=r"^(?P<target>.+?)\s+a\s+(?P<destination>.+)$"),
+    Intent("rename", ["renombrar"], slots=r"^(?P<target>.+?)\s+como\s+(?P<new_name>.+)$"),
+    Intent("cancel", ["cancelar"], slots=r"^(?:el\s+)?(?:trabajo\s+)?(?:n[uú]mero\s+)?(?P<target>\w+)$"),
+    Intent("search", ["buscar"], slots=r"^(?:el\s+|la\s+)?(?:archivo\s+|carpeta\s+)?(?P<target>.+)$"),
+    Intent("go_to_result", ["ir al resultado", "ir a resultado", "abrir resultado", "abrir el resultado"],
+           slots=r"^(?:n[uú]mero\s+)?(?P<target>\w+)$"),
+    Intent("list", ["listar", "mostrar", "qué archivos", "que archivos"], closed=True),
+    Intent("enter", ["entrar a", "entrar en", "entrar", "ir a"], slots=r"^(?:la\s+|al\s+|a\s+la\s+|a\s+|en\s+)?(?:carpeta\s+)?(?P<target>.+)$"),
+    Intent("go_back", ["volver", "salir", "regresar"], closed=True),
+    Intent("location", ["dónde estoy", "donde estoy", "ubicación", "ubicacion"], closed=True),
+    Intent("help", ["comandos", "ayuda"], closed=True),
+    Intent("create_folder", ["crear carpeta"], slots=r"^(?P<target>.+)$"),
+    Intent("create_file", ["crear archivo", "crear un archivo"], slots=r"^(?:de\s+)?(?P<file_type>" + FILE_TYPES + r")\s+llamado\s+(?P<new_name>.+)$"),
+]
+
+# palabras que pueden acompañar a un comando cerrado sin cambiar su significado
+FILLER_WORDS = {"archivos", "hay", "los", "las", "el", "la", "por", "favor", "ahora"}
+
+
+# enrutador compilado una sola vez: una busqueda con una expresion regular para toda la tabla
+class IntentRouter:
+    def __init__(self, intents=None):
+        self.intents = intents or INTENTS
+        self._by_group = {}
+        alternatives = []
+        keywords = []
+        for index, intent in enumerate(self.intents):
+            for keyword in intent.keywords:
+                keywords.append((keyword, index))
+        # las frases largas primero para que "entrar a" gane a "entrar" en la misma posicion
+        keywords.sort(key=lambda item: -len(item[0]))
+        for number, (keyword, index) in enumerate(keywords):
+            group = f"k{number}"
+            self._by_group[group] = self.intents[index]
+            words = r"\s+".join(re.escape(word) for word in keyword.split())
+            alternatives.append(rf"(?P<{group}>{words})")
+        self._pattern = re.compile(r"(?<!\w)(?:" + "|".join(alternatives) + r")(?!\w)")
+
+    # devuelve la Route de la frase o None si no coincide con ningun comando
+    def route(self, text):
+        text = " ".join(text.lower().split())
+        match = self._pattern.search(text)
+        if not match:
+            return None
+        intent = self._by_group[match.lastgroup]
+        rest = text[match.end():].strip(" ,.")
+        if not intent.slots:
+            return Route(intent, {}, text)
+        slot_match = intent.slots.search(rest)
+        if not slot_match:
+            return Route(intent, {}, text, complete=False)
+        slots = {name: value.strip(" ,.") for name, value in slot_match.groupdict().items() if value}
+        return Route(intent, slots, text)
+
+    # devuelve la Route solo si la frase es exactamente un comando cerrado (para el despacho temprano)
+    def match_closed(self, text):
+        route = self.route(text.replace("¿", "").replace("?", ""))
+        if not route or not route.intent.closed:
+            return None
+        match = self._pattern.search(route.text)
+        before = route.text[:match.start()].split()
+        after = route.text[match.end():].split()
+        if all(word in FILLER_WORDS for word in before + after):
+            return route
+        return None
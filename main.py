@@ -1,15 +1,15 @@
 import flet as ft
 from voice_assistant import VoiceAssistant
+from ui_updates import UpdateScheduler
 import threading
+import time
 def main(page: ft.Page):
     # configuracion de la ventana
     page.title = "🎤 Asistente de Voz"
     page.window.width = 600
     page.window.height = 750
     page.theme_mode = ft.ThemeMode.DARK
-    
-    # inicializa el asistente
-    assistant = VoiceAssistant()
+    launch = time.monotonic()
     
     # commponentes de la interfaz del usuario
     title = ft.Text(
@@ -25,28 +25,69 @@ def main(page: ft.Page):
         color=ft.colors.GREEN_400
     )
     
-    log_output = ft.Text(
-        value="",
-        size=12,
-        color=ft.colors.WHITE,
-        font_family="Courier New"
+    # panel de logs: una fila por mensaje, solo se envian al cliente las filas nuevas
+    log_output = ft.ListView(
+        spacing=0,
+        auto_scroll=True
     )
     
     log_container = ft.Container(
-        content=ft.Column([log_output], scroll=ft.ScrollMode.AUTO),
+        content=log_output,
         height=400,
         bgcolor=ft.colors.BLACK26,
         border_radius=10,
         padding=10
     )
     
+    # panel de metricas opcional: percentiles de latencia por etapa, se refresca mientras esta visible
+    metrics_text = ft.Text(
+        "",
+        size=11,
+        color=ft.colors.GREY_300,
+        font_family="Courier New"
+    )
+    metrics_container = ft.Container(
+        content=metrics_text,
+        bgcolor=ft.colors.BLACK26,
+        border_radius=10,
+        padding=10,
+        visible=False
+    )
+    
+    def refresh_metrics():
+        while metrics_container.visible:
+            health = assistant.speech_health()
+            metrics_text.value = (
+                "Latencia por etapa (ms)\n" + assistant.metrics.format_summary() +
+                f"\n\nVoz: activa {health['uptime'] / 60:.0f} min, reinicios {health['restarts']}, "
+                f"en cola {health['depth']} (más viejo {health['oldest_age']:.0f} s)"
+            )
+            if assistant.noise_floor and assistant.noise_floor.floor is not None:
+                metrics_text.value += (f"\nRuido: piso {assistant.noise_floor.floor:.0f}, "
+                                       f"umbral de voz {assistant.noise_floor.threshold:.0f}")
+            if assistant.preprocessor and assistant.preprocessor.phrases:
+                audio = assistant.preprocessor.stats()
+                metrics_text.value += (f"\nAudio al reconocimiento: {audio['bytes_in'] // 1024} KB -> "
+                                       f"{audio['bytes_out'] // 1024} KB ({audio['ratio']:.0%})")
+            assistant.update_ui(page, metrics_text)
+            time.sleep(2)
+    
+    metrics_thread = [None]
+    
+    def toggle_metrics_click(e):
+        metrics_container.visible = not metrics_container.visible
+        assistant.update_ui(page, urgent=True)
+        if metrics_container.visible and not (metrics_thread[0] and metrics_thread[0].is_alive()):
+            metrics_thread[0] = threading.Thread(target=refresh_metrics, daemon=True)
+            metrics_thread[0].start()
+    
     def stop_assistant_click(e):
         assistant.stop_assistant(log_output, page)
         status_text.value = "🔴 Asistente detenido - Di 'iniciar' para reactivar"
         status_text.color = ft.colors.RED_400
         start_button.disabled = False
         stop_button.disabled = True
-        page.update()
+        assistant.update_ui(page, urgent=True)
     
     def start_assistant_click(e):
         assistant.start_assistant(log_output, page)
@@ -54,7 +95,7 @@ def main(page: ft.Page):
         status_text.color = ft.colors.GREEN_400
         start_button.disabled = True
         stop_button.disabled = False
-        page.update()
+        assistant.update_ui(page, urgent=True)
     
     start_button = ft.ElevatedButton(
         "🟢 Iniciar Asistente",
@@ -64,11 +105,20 @@ def main(page: ft.Page):
         disabled=True
     )
     
+    # los botones se habilitan cuando el asistente ya existe (se crea despues de dibujar la ventana)
     stop_button = ft.ElevatedButton(
         "🛑 Detener Asistente",
         on_click=stop_assistant_click,
         bgcolor=ft.colors.RED_600,
-        color=ft.colors.WHITE
+        color=ft.colors.WHITE,
+        disabled=True
+    )
+    
+ 
+    metrics_button = ft.TextButton(
+        "📊 Métricas",
+        on_click=toggle_metrics_click,
+        disabled=True
     )
     
     # texto de instrucciones 
@@ -88,13 +138,21 @@ def main(page: ft.Page):
             instructions,
             ft.Divider(),
             log_container,
-            ft.Row([start_button, stop_button], alignment=ft.MainAxisAlignment.CENTER)
+            metrics_container,
+            ft.Row([start_button, stop_button, metrics_button], alignment=ft.MainAxisAlignment.CENTER)
         ], spacing=15, expand=True)
     )
     
-    # mensaje de bienvenida
-    assistant.log_message("🚀 Asistente iniciado", log_output)
-    assistant.speak("Hola! Soy tu asistente de voz. Di 'comandos' para conocer las opciones disponibles. el primer comando talvez necesite ser dicho dos veces.")
+    # inicializa el asistente cuando la ventana ya esta dibujada; voz, microfono y directorio se preparan en paralelo
+    assistant = VoiceAssistant()
+    assistant.started_at = launch
+    assistant.ui = UpdateScheduler(page) # agrupa los page.update() de los hilos del asistente
+    assistant.log_row_factory = lambda message: ft.Text(
+        message,
+        size=12,
+        color=ft.colors.WHITE,
+        font_family="Courier New"
+    )
     
     # inicializacion del asistente
     assistant.assistant_thread = threading.Thread(
@@ -103,6 +161,13 @@ def main(page: ft.Page):
         daemon=True
     )
     assistant.assistant_thread.start()
+    stop_button.disabled = False
+    metrics_button.disabled = False
+    assistant.update_ui(page, urgent=True)
+    
+    # mensaje de bienvenida
+    assistant.log_message("🚀 Asistente iniciado", log_output)
+    assistant.speak("Hola! Soy tu asistente de voz. Di 'comandos' para conocer las opciones disponibles.")
 
 if __name__ == "__main__":
     ft.app(target=main)
\ No newline at end of file
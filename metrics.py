@@ -0,0 +1,155 @@
+import itertools
+import json
+import logging
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+
+# ventana movil de duraciones en ms; los percentiles se calculan solo al consultarlos
+class Histogram:
+    def __init__(self, window=500):
+        self.values = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, ms):
+        self.values.append(ms)
+        self.count += 1
+
+    def summary(self):
+        values = sorted(self.values)
+        if not values:
+            return {"count": self.count, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+        last = len(values) - 1
+        return {
+            "count": self.count,
+            "p50": values[round(last * 0.50)],
+            "p95": values[round(last * 0.95)],
+            "p99": values[round(last * 0.99)],
+            "max": values[-1],
+        }
+
+
+# tiempos de un comando: cada mark cierra la etapa que empezo en el mark anterior
+class CommandTrace:
+    def __init__(self, trace_id, metrics):
+        self.id = trace_id
+        self.metrics = metrics
+        self.start = time.monotonic()
+        self.wall_start = time.time()
+        self.last = self.start
+        self.spans = []  # [(etapa, ms)]
+        self.command = ""
+        self.intent = None
+        self.utterances = 0  # respuestas encoladas por este comando
+        self.first_audio = None  # cuando empezo a sonar la primera respuesta
+        self.released = False  # el comando termino de ejecutarse
+        self.finished = False
+
+    def mark(self, stage):
+        now = time.monotonic()
+        self.spans.append((stage, (now - self.last) * 1000))
+        self.last = now
+
+    # etapa medida por fuera de la secuencia de marks (ej: la espera hasta que suena la respuesta)
+    def add(self, stage, ms):
+        self.spans.append((stage, ms))
+
+
+# metricas de latencia por etapa: histogramas moviles y, opcionalmente, una linea JSON por comando
+class LatencyMetrics:
+    def __init__(self, window=500, log_file=None, history=50):
+        self.window = window
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.recent = deque(maxlen=history)  # ultimos comandos terminados
+        self.events = deque(maxlen=history)  # eventos sueltos (ej: adaptaciones del umbral de ruido)
+        self.ids = itertools.count(1)
+        self.logger = None
+        if log_file:
+            self.logger = logging.getLogger("asistente.metricas")
+            self.logger.setLevel(logging.INFO)
+            self.logger.propagate = False
+            handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.logger.addHandler(handler)
+
+    def begin(self):
+        return CommandTrace(next(self.ids), self)
+
+    # duracion suelta que no pertenece a un comando (ej: el pitido, la reproduccion de una frase)
+    def record(self, stage, ms):
+        with self.lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram(self.window)
+            histogram.record(ms)
+
+    # evento que no es una duracion; queda en el historial y en el archivo JSON
+    def note(self, kind, **data):
+        entry = {"event": kind, "time": time.time(), **data}
+        with self.lock:
+            self.events.append(entry)
+        if self.logger:
+            self.logger.info(json.dumps(entry, ensure_ascii=False))
+
+    # el comando encolo una respuesta de voz
+    def queued(self, trace):
+        with self.lock:
+            trace.utterances += 1
+
+    # empezo a sonar una respuesta del comando
+    def audible(self, trace):
+        with self.lock:
+            if trace.first_audio is not None:
+                return
+            trace.first_audio = time.monotonic()
+            ready = trace.released
+        if ready:
+            self.finish(trace)
+
+    # el comando termino de ejecutarse; se cierra ya si no hay respuesta que esperar
+    def release(self, trace):
+        with self.lock:
+            trace.released = True
+            ready = trace.first_audio is not None or trace.utterances == 0
+        if ready:
+            self.finish(trace)
+
+    # cierra el comando: el total va desde que la frase estuvo lista hasta la primera respuesta audible
+    def finish(self, trace):
+        with self.lock:
+            if trace.finished:
+                return
+            trace.finished = True
+        end = trace.first_audio or time.monotonic()
+        if trace.first_audio is not None:
+            trace.add("speech_wait", max(0.0, (trace.first_audio - trace.last) * 1000))
+        total = (end - trace.start) * 1000
+        for stage, ms in trace.spans:
+            self.record(stage, ms)
+        self.record("total", total)
+        entry = {
+            "id": trace.id,
+            "start": trace.wall_start,
+            "command": trace.command,
+            "intent": trace.intent,
+            "spans": {stage: round(ms, 2) for stage, ms in trace.spans},
+            "total_ms": round(total, 2),
+        }
+        with self.lock:
+            self.recent.append(entry)
+        if self.logger:
+            self.logger.info(json.dumps(entry, ensure_ascii=False))
+
+    def summary(self):
+        with self.lock:
+            return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    # tabla de texto para el panel de metricas
+    def format_summary(self):
+        lines = [f"{'etapa':<16}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}"]
+        for stage, stats in sorted(self.summary().items()):
+            lines.append(f"{stage:<16}{stats['count']:>6}{stats['p50']:>9.1f}{stats['p95']:>9.1f}{stats['p99']:>9.1f}")
+        return "\n".join(lines)
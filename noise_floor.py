@@ -0,0 +1,103 @@
+import array
+import math
+import time
+from collections import deque
+
+try:
+    import numpy as np
+except ImportError:  # sin NumPy la energia de cada trama se calcula en Python puro (mas lento, mismo resultado)
+    np = None
+
+# muestras con signo en todos los anchos, como las interpreta audioop.rms (el umbral de energy_threshold)
+SAMPLE_TYPES = {1: "i1", 2: "<i2", 4: "<i4"}
+ARRAY_TYPES = {1: "b", 2: "h", 4: "i"}
+
+
+# energia RMS de cada trama de frame_samples muestras, en la misma escala que audioop.rms (energy_threshold)
+def frame_energies(buffer, width, frame_samples):
+    if np is None:
+        step = frame_samples * width
+        return [_rms(buffer[i:i + step], width) for i in range(0, len(buffer) - step + 1, step)] \
+            or ([_rms(buffer, width)] if buffer else [])
+    samples = np.frombuffer(buffer, dtype=SAMPLE_TYPES[width])  # vista sobre los bytes, sin copiarlos
+    frames = len(samples) // frame_samples
+    if frames == 0:
+        frames, frame_samples = 1, len(samples)
+        if frame_samples == 0:
+            return []
+    blocks = samples[:frames * frame_samples].reshape(frames, frame_samples).astype(np.float32)
+    return np.sqrt(np.einsum("ij,ij->i", blocks, blocks) / frame_samples)
+
+
+# energia RMS de un bloque entero (ej: un bloque del microfono), en la escala de audioop.rms
+def rms(buffer, width):
+    if np is None:
+        return _rms(buffer, width)
+    samples = np.frombuffer(buffer, dtype=SAMPLE_TYPES[width], count=len(buffer) // width).astype(np.float32)
+    return float(np.sqrt(np.dot(samples, samples) / len(samples))) if len(samples) else 0.0
+
+
+# RMS de un bloque sin NumPy ni audioop (que ya no existe desde Python 3.13)
+def _rms(block, width):
+    samples = array.array(ARRAY_TYPES[width], block[:len(block) - len(block) % width])
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples)) if samples else 0.0
+
+
+# piso de ruido del ambiente estimado de forma continua con el audio que ya se captura
+# guarda la energia de las tramas de los ultimos window segundos y toma un percentil bajo
+# la captura le pasa el audio de entre frases y las "frases" que no terminan (ruido que subio)
+# el umbral de voz del reconocedor se mueve con el piso (floor * ratio), sin ventanas de calibracion
+class NoiseFloor:
+    def __init__(self, recognizer, frame_ms=20, window=10.0, percentile=15, ratio=2.0,
+                 min_threshold=50, max_threshold=4000, update_interval=0.5, report_change=0.15,
+                 on_adapt=None, history=100):
+        self.recognizer = recognizer
+        self.frame_ms = frame_ms
+        self.percentile = percentile
+        self.ratio = ratio  # cuanto debe superar la voz al ruido
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.update_interval = update_interval
+        self.report_change = report_change  # cambio relativo del umbral que se anota en el historial
+        self.on_adapt = on_adapt  # on_adapt(floor, threshold) cuando el umbral cambia de forma notable
+        self.energies = deque(maxlen=int(window * 1000 / frame_ms))
+        self.history = deque(maxlen=history)  # [(hora, piso, umbral)]
+        self.floor = None
+        self.threshold = None
+        self.reported = None
+        self.updates = 0
+        self._next_update = 0.0
+
+    # olvida lo medido (ej: se cambio o reabrio el microfono)
+    def reset(self):
+        self.energies.clear()
+        self.floor = None
+        self._next_update = 0.0
+
+    # agrega un bloque de audio crudo; actualiza el umbral como mucho cada update_interval segundos
+    def feed(self, buffer, width, rate):
+        self.energies.extend(frame_energies(buffer, width, max(1, rate * self.frame_ms // 1000)))
+        now = time.monotonic()
+        if now >= self._next_update and self.energies:
+            self._next_update = now + self.update_interval
+            self._update()
+
+    # agrega una frase completa ya capturada (modo de un microfono por comando)
+    def feed_audio(self, audio):
+        self.feed(audio.frame_data, audio.sample_width, audio.sample_rate)
+
+    def _update(self):
+        if np is not None:
+            floor = float(np.percentile(np.fromiter(self.energies, np.float32, len(self.energies)), self.percentile))
+        else:
+            ordered = sorted(self.energies)
+            floor = float(ordered[int((len(ordered) - 1) * self.percentile / 100)])
+        self.floor = floor
+        self.threshold = min(self.max_threshold, max(self.min_threshold, floor * self.ratio))
+        self.recognizer.energy_threshold = self.threshold
+        self.updates += 1
+        if self.reported is None or abs(self.threshold - self.reported) > self.reported * self.report_change:
+            self.reported = self.threshold
+            self.history.append((time.time(), floor, self.threshold))
+            if self.on_adapt:
+                self.on_adapt(floor, self.threshold)
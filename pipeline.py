@@ -0,0 +1,166 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# bucle del asistente como tuberia asyncio: captura -> reconocimiento -> enrutado -> ejecucion
+# (la voz es la ultima etapa: el voice_worker consume la SpeechQueue en su propio hilo)
+# las etapas se conectan con colas acotadas, asi una etapa lenta frena a las anteriores en vez de acumular audio
+class CommandPipeline:
+    def __init__(self, assistant, output_widget, page, queue_size=2):
+        self.assistant = assistant
+        self.output_widget = output_widget
+        self.page = page
+        self.queue_size = queue_size
+        self.loop = None
+        self.stop_event = None
+        # un hilo por etapa bloqueante: cada etapa conserva el orden y no compite consigo misma
+        self.capture_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="captura")
+        self.recognize_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="reconocimiento")
+        self.execute_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ejecucion")
+        self.started_at = None
+        self.finished_at = None
+        self.commands = 0
+        self.errors = 0
+        self.error_delay = 1
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        self.stop_event = asyncio.Event()
+        self.started_at = time.monotonic()
+        audio_queue = asyncio.Queue(self.queue_size)
+        text_queue = asyncio.Queue(self.queue_size)
+        route_queue = asyncio.Queue(self.queue_size)
+        stages = [
+            asyncio.create_task(self._capture_stage(audio_queue)),
+            asyncio.create_task(self._recognize_stage(audio_queue, text_queue)),
+            asyncio.create_task(self._route_stage(text_queue, route_queue)),
+            asyncio.create_task(self._execute_stage(route_queue)),
+        ]
+        stopper = asyncio.create_task(self.stop_event.wait())
+        # termina cuando se pide parar o cuando la ultima etapa vacia todo (fin del audio grabado)
+        await asyncio.wait([stopper, stages[-1]], return_when=asyncio.FIRST_COMPLETED)
+        for task in stages + [stopper]:
+            task.cancel()
+        await asyncio.gather(*stages, stopper, return_exceptions=True)
+        self.finished_at = time.monotonic()
+        for executor in (self.capture_executor, self.recognize_executor, self.execute_executor):
+            executor.shutdown(wait=False)
+
+    # se puede llamar desde cualquier hilo
+    def stop(self):
+        if self.loop and self.stop_event:
+            self.loop.call_soon_threadsafe(self.stop_event.set)
+
+    def stats(self):
+        end = self.finished_at or time.monotonic()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "commands": self.commands,
+            "seconds": elapsed,
+            "commands_per_minute": self.commands * 60 / elapsed if elapsed else 0.0,
+        }
+
+    async def _capture_stage(self, out_queue):
+        while True:
+            # en captura continua el stream sigue abierto: el timeout corto solo hace volver al hilo para poder cerrar
+            # con un microfono por comando se espera sin limite; reabrirlo cada 0.5 s cortaria el inicio de las frases
+            timeout = None if self.assistant.capture_mode == "per_command" else 0.5
+            audio = await self._guarded(self.capture_executor, self.assistant.capture_audio, timeout)
+            if audio is None and self.assistant.capture_mode == "replay":
+                await out_queue.put(None)  # no queda audio grabado: se cierra la tuberia
+                return
+            if audio is not None:
+                # la generacion dice a que pregunta pendiente podria responder la frase
+                await out_queue.put((audio, self.assistant.metrics.begin(),  # el reloj del comando empieza con la frase lista
+                                     self.assistant.reply_generation))
+
+    async def _recognize_stage(self, in_queue, out_queue):
+        while True:
+            item = await in_queue.get()
+            if item is None:
+                await out_queue.put(None)
+                return
+            audio, trace, generation = item
+            trace.mark("wait_recognize")
+            command = await self._guarded(self.recognize_executor, self.assistant.recognize_audio, audio)
+            trace.mark("recognize")
+            if command:
+                await out_queue.put((command, trace, generation))
+
+    async def _route_stage(self, in_queue, out_queue):
+        while True:
+            item = await in_queue.get()
+            if item is None:
+                await out_queue.put(None)
+                return
+            command, trace, generation = item
+            if self._take_reply(command, generation):
+                continue
+            route = self.assistant.router.route(command)
+            trace.mark("route")
+            if await self._put_routed(in_queue, out_queue, (command, route, trace)):
+                await out_queue.put(None)  # el fin del audio llego mientras se esperaba lugar
+                return
+
+    # True si la frase ya no es un comando: se dijo antes de la pregunta pendiente o era su respuesta
+    def _take_reply(self, command, generation):
+        if self.assistant.awaiting_reply.is_set() and generation != self.assistant.reply_generation:
+            # se dijo antes de la pregunta: no es la respuesta y el comando ya quedo atras
+            self.assistant.log_message(f"Descartado (dicho antes de la pregunta): {command}", self.output_widget)
+            return True
+        return self.assistant.deliver_reply(command)  # era la respuesta a una confirmacion pendiente
+
+    # pone un comando en la cola de ejecucion; si esta llena, la ejecucion puede estar esperando una respuesta
+    # (ej: confirmar una eliminacion) que viene detras en la tuberia: mientras tanto se siguen leyendo frases
+    # para entregarsela, si no la pregunta solo terminaria por timeout. Devuelve True si llego el fin del audio
+    async def _put_routed(self, in_queue, out_queue, item):
+        ended = False
+        while True:
+            try:
+                out_queue.put_nowait(item)
+                return ended
+            except asyncio.QueueFull:
+                pass
+            if not ended and self.assistant.awaiting_reply.is_set() and not in_queue.empty():
+                waiting = in_queue.get_nowait()
+                if waiting is None:
+                    ended = True
+                elif not self._take_reply(waiting[0], waiting[2]):  # la pregunta termino justo antes
+                    self.assistant.log_message(f"Descartado (la pregunta ya terminó): {waiting[0]}", self.output_widget)
+                continue
+            await asyncio.sleep(0.05)
+
+    async def _execute_stage(self, in_queue):
+        while True:
+            item = await in_queue.get()
+            if item is None:
+                return
+            command, route, trace = item
+            trace.mark("wait_execute")
+            trace.command = command
+            trace.intent = route.name if route else None
+            await self._guarded(self.execute_executor, self.assistant.handle_command,
+                                command, route, self.output_widget, self.page, trace)
+            self.assistant.metrics.release(trace)
+            self.commands += 1
+
+    # ejecuta una llamada bloqueante en su hilo; si falla devuelve None y, ante errores seguidos, espera cada vez mas
+    async def _guarded(self, executor, function, *args):
+        try:
+            result = await self.loop.run_in_executor(executor, function, *args)
+            self.errors = 0
+            self.error_delay = 1
+            return result
+        except Exception as e:
+            self.errors += 1
+            print(f"Error en la tuberia del asistente ({self.errors}/5): {e}")
+            if self.errors >= 5:
+                print("Demasiados errores consecutivos, esperando más tiempo...")
+                self.error_delay = min(self.error_delay * 2, 10)
+                self.errors = 0
+            try:
+                await asyncio.wait_for(self.stop_event.wait(), self.error_delay) # espera interrumpible
+            except asyncio.TimeoutError:
+                pass
+            return None
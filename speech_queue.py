@@ -0,0 +1,116 @@
+import heapq
+import itertools
+import threading
+import time
+from queue import Empty
+
+PRIORITY_URGENT = 0  # confirmaciones y errores: pasan delante de todo
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2  # lecturas largas (listados, ayuda): se agrupan y se pueden cancelar
+
+
+# un mensaje para el TTS; count es cuantos mensajes originales representa tras agruparlos
+class Utterance:
+    def __init__(self, text, priority=PRIORITY_NORMAL, category=None, seq=0, trace=None):
+        self.text = text
+        self.priority = priority
+        self.category = category
+        self.seq = seq
+        self.count = 1
+        self.timestamp = time.time()
+        self.trace = trace  # CommandTrace del comando que lo genero, para medir la espera en la cola
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+# cola de prioridad de mensajes de voz con agrupacion y cancelacion por categoria
+class SpeechQueue:
+    def __init__(self, max_merged_chars=400):
+        self.max_merged_chars = max_merged_chars
+        self.heap = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def put(self, text, priority=PRIORITY_NORMAL, category=None, trace=None):
+        with self.condition:
+            if text is None:  # señal de parada para el hilo de voz
+                self.stopped = True
+            else:
+                heapq.heappush(self.heap, Utterance(text, priority, category, next(self.counter), trace))
+                self.enqueued += 1
+            self.condition.notify()
+
+    # saca el siguiente mensaje; los de baja prioridad consecutivos de la misma categoria se juntan en uno
+    # devuelve None si se pidio parar y lanza queue.Empty si se agota el timeout
+    def get(self, timeout=None):
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.heap or self.stopped, timeout):
+                raise Empty
+            if not self.heap:
+                return None
+            utterance = heapq.heappop(self.heap)
+            if utterance.priority == PRIORITY_LOW:
+                self._merge_following(utterance)
+            return utterance
+
+    # devuelve a la cola un mensaje que no llego a sonar; conserva su turno y su conteo
+    def requeue(self, utterance):
+        with self.condition:
+            heapq.heappush(self.heap, utterance)
+            self.condition.notify()
+
+    # elimina los mensajes pendientes de esas categorias; devuelve cuantos se descartaron
+    def cancel(self, *categories):
+        with self.condition:
+            kept = [u for u in self.heap if u.category not in categories]
+            dropped = sum(u.count for u in self.heap) - sum(u.count for u in kept)
+            if dropped:
+                heapq.heapify(kept)
+                self.heap = kept
+                self.dropped += dropped
+            return dropped
+
+    # vacia la cola (ej: el usuario interrumpio al asistente); devuelve cuantos mensajes se descartaron
+    def clear(self):
+        with self.condition:
+            dropped = sum(u.count for u in self.heap)
+            self.heap = []
+            self.dropped += dropped
+            return dropped
+
+    def empty(self):
+        with self.condition:
+            return not self.heap
+
+    def stats(self):
+        with self.condition:
+            return {
+                "depth": sum(u.count for u in self.heap),
+                "enqueued": self.enqueued,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "oldest_age": time.time() - min(u.timestamp for u in self.heap) if self.heap else 0.0,
+            }
+
+    def _merge_following(self, utterance):
+        parts = [utterance.text]
+        length = len(utterance.text)
+        next_seq = utterance.seq + 1
+        while self.heap:
+            following = self.heap[0]
+            # solo se agrupa lo que se encolo justo despues y pertenece a la misma lectura
+            if (following.priority != PRIORITY_LOW or following.category != utterance.category
+                    or following.seq != next_seq or length + len(following.text) > self.max_merged_chars):
+                break
+            heapq.heappop(self.heap)
+            parts.append(following.text)
+            length += len(following.text) + 2
+            utterance.count += following.count
+            self.coalesced += following.count
+            next_seq += 1
+        utterance.text = ". ".join(parts)
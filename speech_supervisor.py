@@ -0,0 +1,169 @@
+import threading
+import time
+
+
+# vigila el hilo de voz: si se cae o se cuelga, lo reemplaza por uno nuevo con un motor recien creado
+# cada hilo tiene un numero de generacion; un hilo reemplazado que despierte tarde ya no toca la cola
+# el mensaje que se estaba procesando se devuelve a la cola si aun no habia empezado a sonar
+# y se da por terminado si ya sonaba (repetirlo lo diria dos veces)
+class SpeechSupervisor:
+    def __init__(self, assistant, check_interval=1.0, hang_grace=15.0, seconds_per_char=0.15,
+                 max_backoff=30.0, stable_after=60.0):
+        self.assistant = assistant
+        self.check_interval = check_interval
+        self.hang_grace = hang_grace  # margen sobre la duracion esperada de una frase (o del arranque del motor)
+        self.seconds_per_char = seconds_per_char  # duracion esperada al hablar: ~150 palabras por minuto
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after  # segundos sin fallar para que el siguiente reinicio sea inmediato
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.thread = None
+        self.current = None  # mensaje que tiene el hilo de voz
+        self.speaking_since = None  # cuando empezo a sonar current
+        self.heartbeat = None
+        self.started_at = None
+        self.worker_started_at = None
+        self.backoff = 0.0
+        self.restarts = 0
+        self.crashes = 0
+        self.hangs = 0
+        self.requeued = 0
+        self.abandoned = 0
+        self.last_error = None
+        self.stopped = False
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self.generation = 1
+        self._spawn()
+        threading.Thread(target=self._watch, daemon=True).start()
+        return self
+
+    # el hilo de voz recibio la señal de parada: no se vuelve a levantar
+    def stop(self):
+        self.stopped = True
+
+    # llamadas desde el hilo de voz; generation identifica al hilo que llama
+    def alive(self, generation):
+        return not self.stopped and generation == self.generation
+
+    def beat(self, generation):
+        if generation == self.generation:
+            self.heartbeat = time.monotonic()
+
+    # el hilo toma un mensaje; False si ya fue reemplazado (debe devolverlo a la cola y salir)
+    def begin(self, generation, utterance):
+        with self.lock:
+            if generation != self.generation:
+                return False
+            self.current = utterance
+            self.speaking_since = None
+            return True
+
+    def speaking(self, generation):
+        with self.lock:
+            if generation == self.generation:
+                self.speaking_since = time.monotonic()
+
+    # el hilo termino el mensaje; False si el supervisor ya lo dio por perdido
+    def finish(self, generation):
+        with self.lock:
+            if generation != self.generation:
+                return False
+            self.current = None
+            self.speaking_since = None
+            self.heartbeat = time.monotonic()
+            return True
+
+    def failed(self, generation, error):
+        if generation == self.generation:
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    # estado para monitoreo y alertas
+    def health(self):
+        now = time.monotonic()
+        with self.lock:
+            return {
+                "alive": bool(self.thread and self.thread.is_alive()),
+                "uptime": now - self.started_at if self.started_at else 0.0,
+                "worker_uptime": now - self.worker_started_at if self.worker_started_at else 0.0,
+                "restarts": self.restarts,
+                "crashes": self.crashes,
+                "hangs": self.hangs,
+                "requeued": self.requeued,
+                "abandoned": self.abandoned,
+                "speaking_for": now - self.speaking_since if self.speaking_since else 0.0,
+                "heartbeat_age": now - self.heartbeat if self.heartbeat else 0.0,
+                "last_error": self.last_error,
+            }
+
+    def _spawn(self):
+        with self.lock:
+            generation = self.generation
+            self.heartbeat = self.worker_started_at = time.monotonic()
+            self.thread = threading.Thread(target=self.assistant.voice_worker, args=(generation,),
+                                           name=f"voz-{generation}", daemon=True)
+        self.thread.start()
+
+    def _watch(self):
+        while not self.stopped:
+            time.sleep(self.check_interval)
+            if self.stopped:
+                break
+            problem = self._check()
+            if problem:
+                self._restart(problem)
+
+    # "caido" si el hilo termino, "colgado" si una frase o el motor tardan mucho mas de lo esperado
+    def _check(self):
+        now = time.monotonic()
+        with self.lock:
+            if not self.thread.is_alive():
+                return "caido"
+            if self.speaking_since is not None:
+                expected = len(self.current.text) * self.seconds_per_char if self.current else 0.0
+                if now - self.speaking_since > expected + self.hang_grace:
+                    return "colgado"
+            elif now - self.heartbeat > self.hang_grace:
+                return "colgado"
+        return None
+
+    def _restart(self, problem):
+        assistant = self.assistant
+        with self.lock:
+            if self.stopped:
+                return
+            lost = self.current
+            was_speaking = self.speaking_since is not None
+            self.generation += 1  # desde aqui el hilo viejo ya no puede terminar ni tomar mensajes
+            self.current = None
+            self.speaking_since = None
+            if problem == "caido":
+                self.crashes += 1
+            else:
+                self.hangs += 1
+            self.restarts += 1
+            stable = time.monotonic() - self.worker_started_at > self.stable_after
+        if lost is not None:
+            if was_speaking:
+                self.abandoned += lost.count
+                assistant._mark_utterance_done(lost.count)
+            else:
+                self.requeued += 1
+                assistant.voice_queue.requeue(lost)
+        with assistant.speech_done:
+            assistant.is_speaking = False
+            assistant.speech_done.notify_all()
+        if problem == "colgado":
+            try:
+                if assistant.tts_engine:
+                    assistant.tts_engine.stop()  # por si el motor viejo todavia responde
+            except Exception:
+                pass
+        self.backoff = 0.0 if stable else min(self.max_backoff, max(1.0, self.backoff * 2))
+        assistant.log_message(f"⚠️ Voz {problem}, reiniciando el motor (reinicio {self.restarts}"
+                              f"{f', en {self.backoff:.0f} s' if self.backoff else ''})")
+        if self.backoff:
+            time.sleep(self.backoff)  # un motor que falla al arrancar no se relanza en bucle
+        if not self.stopped:
+            self._spawn()
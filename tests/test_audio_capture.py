@@ -0,0 +1,82 @@
+import array
+
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from audio_capture import ContinuousCapture
+
+CHUNK = 1024
+RATE = 16000
+
+
+def chunk(amplitude):
+    return array.array("h", [amplitude if i % 2 else -amplitude for i in range(CHUNK)]).tobytes()
+
+
+class FakeRecognizer:
+    energy_threshold = 300
+    pause_threshold = 0.3
+    phrase_threshold = 0.1
+
+
+class FakeStream:
+    def __init__(self, capture, buffers):
+        self.capture = capture
+        self.buffers = list(buffers)
+
+    def read(self, size):
+        if not self.buffers:
+            self.capture.running = False
+            return b""
+        return self.buffers.pop(0)
+
+
+class FakeSource:
+    CHUNK = CHUNK
+    SAMPLE_WIDTH = 2
+    SAMPLE_RATE = RATE
+
+
+class RecordingFloor:
+    def __init__(self):
+        self.fed = []
+
+    def feed(self, buffer, width, rate):
+        self.fed.append(buffer)
+
+
+def run(capture, buffers):
+    source = FakeSource()
+    source.stream = FakeStream(capture, buffers)
+    capture.running = True
+    capture._segment(source)
+
+
+def test_noise_floor_is_fed_only_between_phrases():
+    floor = RecordingFloor()
+    capture = ContinuousCapture(FakeRecognizer(), noise_floor=floor)
+    quiet, loud = chunk(50), chunk(5000)
+    run(capture, [quiet] * 3 + [loud] * 6 + [quiet] * 8 + [quiet] * 2)
+    assert capture.utterances.qsize() == 1
+    assert loud not in floor.fed
+    assert len(floor.fed) == 3 + 5  # antes de la frase y despues de la pausa que la cierra (5 bloques)
+
+
+def test_never_ending_phrase_is_measured_as_noise():
+    floor = RecordingFloor()
+    capture = ContinuousCapture(FakeRecognizer(), noise_floor=floor, max_phrase_seconds=1)
+    run(capture, [chunk(5000)] * 20)
+    assert any(len(buffer) > len(chunk(0)) for buffer in floor.fed)
+
+
+def test_step_in_noise_raises_the_threshold_without_emitting_it():
+    from noise_floor import NoiseFloor
+    recognizer = FakeRecognizer()
+    floor = NoiseFloor(recognizer, window=1.0, update_interval=0)
+    capture = ContinuousCapture(recognizer, noise_floor=floor, max_phrase_seconds=2)
+    run(capture, [chunk(100)] * 20 + [chunk(1000)] * 40)
+    assert capture.utterances.empty()  # el ruido no llega al reconocedor como frase
+    assert recognizer.energy_threshold > 1000
+    run(capture, [chunk(1000)] * 10 + [chunk(8000)] * 6 + [chunk(1000)] * 8)
+    assert capture.utterances.qsize() == 1  # la voz sobre el ruido nuevo se sigue detectando
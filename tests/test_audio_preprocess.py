@@ -0,0 +1,40 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+sr = pytest.importorskip("speech_recognition")
+
+from audio_preprocess import AudioPreprocessor
+
+RATE = 44100
+
+
+def test_end_of_phrase_does_not_wrap_into_the_start():
+    samples = np.zeros(RATE, dtype=np.float32)
+    t = np.arange(RATE // 10) / RATE
+    samples[-len(t):] = 20000 * np.sin(2 * np.pi * 1000 * t)  # termina de golpe en plena voz
+    output = AudioPreprocessor()._filter_and_resample(samples, RATE, 16000)
+    assert len(output) == 16000
+    assert np.max(np.abs(output[:800])) < 20  # primeros 50 ms: silencio como en la entrada
+    assert np.max(np.abs(output[-1600:])) > 10000
+
+
+def test_highpass_removes_hum_and_keeps_voice():
+    t = np.arange(RATE) / RATE
+    hum = 8000 * np.sin(2 * np.pi * 50 * t)
+    voice = 4000 * np.sin(2 * np.pi * 440 * t)
+    output = AudioPreprocessor()._filter_and_resample((hum + voice).astype(np.float32), RATE, 16000)
+    middle = output[4000:12000]
+    reference = 4000 * np.sin(2 * np.pi * 440 * np.arange(4000, 12000) / 16000)
+    assert np.sqrt(np.mean((middle - reference) ** 2)) < 200
+
+
+def test_process_trims_resamples_and_normalizes():
+    quiet = np.zeros(RATE // 2, dtype="<i2")
+    voice = (6000 * np.sin(2 * np.pi * 300 * np.arange(RATE // 2) / RATE)).astype("<i2")
+    audio = sr.AudioData(np.concatenate([quiet, voice, quiet]).tobytes(), RATE, 2)
+    processed = AudioPreprocessor().process(audio)
+    assert processed.sample_rate == 16000
+    duration = len(processed.frame_data) / 2 / 16000
+    assert 0.5 < duration < 0.9  # la voz mas 150 ms de margen a cada lado
+    peak = np.max(np.abs(np.frombuffer(processed.frame_data, dtype="<i2")))
+    assert peak == pytest.approx(0.9 * 32767, rel=0.02)
@@ -0,0 +1,89 @@
+import os
+import time
+
+import pytest
+
+import desktop_index
+from desktop_index import DesktopIndex
+
+
+@pytest.fixture
+def desktop(tmp_path):
+    root = tmp_path / "Escritorio"
+    (root / "trabajo" / "2024").mkdir(parents=True)
+    (root / "fotos").mkdir()
+    (root / "trabajo" / "informe_ventas.pdf").write_bytes(b"x")
+    (root / "trabajo" / "2024" / "presupuesto.xlsx").write_bytes(b"x")
+    (root / "fotos" / "playa.jpg").write_bytes(b"x")
+    return root
+
+
+def build(root, tmp_path):
+    index = DesktopIndex(str(root), path=str(tmp_path / "indice" / "escritorio.sqlite3"), watch=False)
+    index.start()
+    assert index.ready.wait(10)
+    return index
+
+
+def test_search_finds_nested_entries(desktop, tmp_path):
+    index = build(desktop, tmp_path)
+    try:
+        results = index.search("presupuesto")
+        assert [os.path.basename(result.path) for result in results] == ["presupuesto.xlsx"]
+        assert results[0].depth == 2
+        folder = index.search("fotos")[0]
+        assert folder.is_dir and folder.depth == 0
+        assert index.search("zzz") == []
+        assert index.stats()["entries"] == 6
+    finally:
+        index.stop()
+
+
+def test_best_match_survives_the_candidate_limit(desktop, tmp_path, monkeypatch):
+    for i in range(30):  # coincidencias parciales que llenan el limite de candidatos
+        (desktop / f"informe_{i:02}.txt").write_bytes(b"x")
+    monkeypatch.setattr(desktop_index, "MAX_MATCHES", 5)
+    index = build(desktop, tmp_path)
+    try:
+        if not index.fts:
+            pytest.skip("SQLite sin FTS5")
+        names = [os.path.basename(result.path) for result in index.search("informe ventas", limit=3)]
+        assert "informe_ventas.pdf" in names
+    finally:
+        index.stop()
+
+
+def test_refresh_only_rereads_changed_folders(desktop, tmp_path):
+    index = build(desktop, tmp_path)
+    try:
+        conn = index._connect()
+        (desktop / "fotos" / "montaña.jpg").write_bytes(b"x")
+        os.remove(desktop / "trabajo" / "informe_ventas.pdf")
+        os.utime(desktop / "fotos", ns=(0, os.stat(desktop / "fotos").st_mtime_ns + 10 ** 9))
+        os.utime(desktop / "trabajo", ns=(0, os.stat(desktop / "trabajo").st_mtime_ns + 10 ** 9))
+        skipped = index.directories_skipped
+        index._refresh_tree(conn, index.root)
+        assert index.directories_skipped - skipped == 2  # Escritorio y trabajo/2024 no cambiaron
+        assert [os.path.basename(result.path) for result in index.search("montaña")] == ["montaña.jpg"]
+        assert index.search("ventas") == []
+    finally:
+        index.stop()
+
+
+def test_restart_is_ready_before_the_refresh(desktop, tmp_path, monkeypatch):
+    build(desktop, tmp_path).stop()
+    started = []
+    monkeypatch.setattr(DesktopIndex, "_refresh_tree", lambda self, conn, top, force=False: started.append(top) or time.sleep(1))
+    index = DesktopIndex(str(desktop), path=str(tmp_path / "indice" / "escritorio.sqlite3"), watch=False).start()
+    try:
+        assert index.ready.wait(0.5) and started  # busca en lo guardado mientras repasa el arbol
+        assert [os.path.basename(result.path) for result in index.search("playa")] == ["playa.jpg"]
+    finally:
+        index.stop()
+
+
+def test_interrupted_build_is_not_marked_ready(desktop, tmp_path):
+    index = DesktopIndex(str(desktop), path=str(tmp_path / "indice" / "escritorio.sqlite3"), watch=False)
+    index._run()  # sin start(): running es False y el recorrido se corta enseguida
+    assert not index.ready.is_set()
+    assert index._connect().execute("SELECT COUNT(*) FROM builds").fetchone()[0] == 0
@@ -0,0 +1,69 @@
+import threading
+
+from file_index import FileIndex, QueryMatcher
+
+
+def test_exact_name_and_stem_score_one():
+    index = FileIndex(["informe.pdf", "informe final.docx", "notas.txt"])
+    assert index.search("informe punto pdf")[0] == ("informe.pdf", 1.0)
+    assert index.search("notas")[0] == ("notas.txt", 1.0)
+
+
+def test_accents_and_phonetics():
+    index = FileIndex(["canción.mp3", "presupuesto.xlsx"])
+    assert index.search("cancion")[0][0] == "canción.mp3"
+    assert index.search("presupuestos")[0][0] == "presupuesto.xlsx"
+
+
+def test_common_postings_fallback_when_selective_hits_miss():
+    # "5" solo aparece suelto en dos nombres ajenos; las capturas solo comparten trigramas comunes
+    names = [f"captura_{i}.png" for i in range(50000, 60000) if "55555" not in str(i)]
+    names += [f"otra_{i}.jpg" for i in range(5000)]
+    names += ["foto 5 playa.jpg", "nota 5.txt"]
+    results = FileIndex(names).search("captura_5", limit=5)
+    assert len(results) == 5
+    assert all(name.startswith("captura_5") for name, _ in results)
+
+
+def test_only_common_postings():
+    names = [f"documento_{i}.pdf" for i in range(2000)]
+    results = FileIndex(names).search("pdf", limit=3)
+    assert len(results) == 3
+
+
+def test_remove_hides_name():
+    index = FileIndex(["a_borrar.txt", "queda.txt"])
+    index.remove("a_borrar.txt")
+    assert all(name != "a_borrar.txt" for name, _ in index.search("a borrar"))
+
+
+def test_search_while_another_thread_mutates():
+    index = FileIndex([f"reporte_{i}.pdf" for i in range(3000)])
+    stop = threading.Event()
+    errors = []
+
+    def mutate():
+        i = 0
+        while not stop.is_set():
+            index.add(f"reporte_nuevo_{i}.pdf")
+            index.remove(f"reporte_nuevo_{i - 5}.pdf")
+            i += 1
+
+    thread = threading.Thread(target=mutate)
+    thread.start()
+    try:
+        for _ in range(300):
+            try:
+                index.search("reporte")
+            except RuntimeError as e:  # "Set changed size during iteration"
+                errors.append(e)
+    finally:
+        stop.set()
+        thread.join()
+    assert not errors
+
+
+def test_query_matcher_matches_index_scoring():
+    matcher = QueryMatcher("informe")
+    assert matcher.score("informe.pdf") == 1.0
+    assert matcher.score("zzz.bin") == 0.0
@@ -0,0 +1,136 @@
+import errno
+import os
+import threading
+
+import pytest
+
+import file_jobs
+from file_jobs import FileJobRunner
+
+
+class FakeCache:
+    def __init__(self):
+        self.calls = []
+
+    def remove_entry(self, folder, name):
+        self.calls.append(("remove", folder, name))
+
+    def add_entry(self, folder, name):
+        self.calls.append(("add", folder, name))
+
+    def invalidate(self, folder):
+        self.calls.append(("invalidate", folder))
+
+
+def submit_and_wait(runner, kind, *args):
+    done = threading.Event()
+    submit = runner.submit_move if kind == "move" else runner.submit_trash
+    job = submit(*args, on_finished=lambda job: done.set())
+    assert done.wait(5)
+    return job
+
+
+@pytest.fixture
+def tree(tmp_path):
+    source = tmp_path / "origen"
+    destination = tmp_path / "destino"
+    source.mkdir()
+    destination.mkdir()
+    (source / "a.txt").write_bytes(b"a" * 3000)
+    (source / "carpeta").mkdir()
+    (source / "carpeta" / "b.txt").write_bytes(b"b" * 10)
+    return source, destination
+
+
+def test_move_on_same_device_renames_and_updates_cache(tree):
+    source, destination = tree
+    cache = FakeCache()
+    runner = FileJobRunner(cache)
+    job = submit_and_wait(runner, "move", [str(source / "a.txt")], str(destination))
+    assert job.status == "done"
+    assert (destination / "a.txt").exists() and not (source / "a.txt").exists()
+    assert ("remove", str(source), "a.txt") in cache.calls
+    assert ("add", str(destination), "a.txt") in cache.calls
+
+
+def cross_device(src, dst):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+
+def test_move_across_devices_copies_then_deletes(tree, monkeypatch):
+    source, destination = tree
+    monkeypatch.setattr(file_jobs.os, "rename", cross_device)
+    runner = FileJobRunner(chunk_size=1024)
+    job = submit_and_wait(runner, "move", [str(source / "a.txt"), str(source / "carpeta")], str(destination))
+    assert job.status == "done"
+    assert (destination / "a.txt").read_bytes() == b"a" * 3000
+    assert (destination / "carpeta" / "b.txt").read_bytes() == b"b" * 10
+    assert not (source / "a.txt").exists() and not (source / "carpeta").exists()
+    assert job.done_bytes == job.total_bytes == 3010
+
+
+def test_move_does_not_copy_on_other_rename_errors(tree, monkeypatch):
+    source, destination = tree
+
+    def denied(src, dst):
+        raise PermissionError(errno.EACCES, "Permission denied")
+
+    monkeypatch.setattr(file_jobs.os, "rename", denied)
+    cache = FakeCache()
+    runner = FileJobRunner(cache)
+    job = submit_and_wait(runner, "move", [str(source / "a.txt")], str(destination))
+    assert job.status == "failed"
+    assert isinstance(job.error, PermissionError)
+    assert (source / "a.txt").exists() and not (destination / "a.txt").exists()
+    assert ("invalidate", str(source)) in cache.calls
+
+
+def test_move_refuses_to_overwrite(tree):
+    source, destination = tree
+    (destination / "a.txt").write_bytes(b"otro")
+    runner = FileJobRunner()
+    job = submit_and_wait(runner, "move", [str(source / "a.txt")], str(destination))
+    assert job.status == "failed"
+    assert (destination / "a.txt").read_bytes() == b"otro"
+
+
+def test_cancelled_copy_removes_partial_target(tree, monkeypatch):
+    source, destination = tree
+    monkeypatch.setattr(file_jobs.os, "rename", cross_device)
+    done = threading.Event()
+    runner = FileJobRunner(chunk_size=1000, progress_interval=0)
+    job = runner.submit_move([str(source / "a.txt")], str(destination),
+                             on_progress=lambda job: job.done_bytes and job.cancel(),
+                             on_finished=lambda job: done.set())
+    assert done.wait(5)
+    assert job.status == "cancelled"
+    assert (source / "a.txt").exists() and not (destination / "a.txt").exists()
+
+
+def test_trash_sends_one_batch(tree, monkeypatch):
+    source, _ = tree
+    calls = []
+    monkeypatch.setattr(file_jobs.send2trash, "send2trash", lambda paths: calls.append(paths))
+    cache = FakeCache()
+    runner = FileJobRunner(cache, trash_batch=500)
+    paths = [str(source / "a.txt"), str(source / "carpeta")]
+    job = submit_and_wait(runner, "trash", paths)
+    assert job.status == "done"
+    assert calls == [paths]
+    assert job.completed == paths
+    assert ("remove", str(source), "carpeta") in cache.calls
+
+
+def test_busy_covers_paths_inside_an_active_job(tree):
+    source, destination = tree
+    runner = FileJobRunner()
+    release = threading.Event()
+    runner.executor.submit(release.wait)  # ocupa los dos hilos para que el trabajo quede pendiente
+    runner.executor.submit(release.wait)
+    job = runner.submit_move([str(source / "carpeta")], str(destination))
+    try:
+        assert runner.busy(os.path.join(str(source), "carpeta", "b.txt"))
+        assert not runner.busy(str(source / "a.txt"))
+        assert runner.cancel() == [job]
+    finally:
+        release.set()
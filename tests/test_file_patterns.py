@@ -0,0 +1,120 @@
+import os
+from datetime import datetime
+
+from command_handlers import CommandHandlers, parse_file_pattern, select_files
+from directory_cache import DirectoryEntry, DirectorySnapshot
+
+NOW = datetime(2024, 5, 15, 12, 0)  # miercoles
+
+
+def test_parse_extensions_and_groups():
+    extensions, since, until, description = parse_file_pattern("png", NOW)
+    assert extensions == {"png"} and since is None and until is None
+    assert description == "archivos png"
+    extensions, _, _, _ = parse_file_pattern("imágenes", NOW)
+    assert {"png", "jpg"} <= extensions
+
+
+def test_parse_periods():
+    extensions, since, until, description = parse_file_pattern("imágenes de esta semana", NOW)
+    assert "png" in extensions
+    assert since == datetime(2024, 5, 13).timestamp() and until is None
+    assert description == "archivos imágenes de esta semana"
+    extensions, since, until, _ = parse_file_pattern("archivos de ayer", NOW)
+    assert extensions is None
+    assert (since, until) == (datetime(2024, 5, 14).timestamp(), datetime(2024, 5, 15).timestamp())
+
+
+def test_parse_rejects_what_is_not_a_filter():
+    assert parse_file_pattern("apuntes de historia", NOW) is None
+    assert parse_file_pattern("los", NOW) is None
+
+
+def snapshot_of(tmp_path, files):
+    entries = {}
+    for name, mtime in files.items():
+        path = tmp_path / name
+        path.write_bytes(b"x")
+        os.utime(path, (mtime, mtime))
+        entries[name] = DirectoryEntry(name, False)
+    (tmp_path / "fotos").mkdir()
+    entries["fotos"] = DirectoryEntry("fotos", True)
+    return DirectorySnapshot(str(tmp_path), entries, 0.0)
+
+
+def test_select_files_by_extension_and_date(tmp_path):
+    monday = datetime(2024, 5, 13, 9).timestamp()
+    last_week = datetime(2024, 5, 8, 9).timestamp()
+    snapshot = snapshot_of(tmp_path, {"a.png": monday, "b.PNG": last_week, "c.pdf": monday})
+    assert sorted(select_files(snapshot, {"png"})) == ["a.png", "b.PNG"]
+    assert select_files(snapshot, {"png"}, since=datetime(2024, 5, 13).timestamp()) == ["a.png"]
+    assert select_files(snapshot, None, until=datetime(2024, 5, 13).timestamp()) == ["b.PNG"]
+    assert "fotos" not in select_files(snapshot)
+
+
+class FakeCache:
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def get(self, path):
+        return self.snapshot
+
+
+class FakeAssistant:
+    def __init__(self, snapshot):
+        self.current_directory = snapshot.path
+        self.directory_cache = FakeCache(snapshot)
+        self.logged = []
+        self.spoken = []
+
+    def log_message(self, message, output_widget=None):
+        self.logged.append(message)
+
+    def speak(self, text, priority=None):
+        self.spoken.append(text)
+
+    def recognize_reply(self):
+        raise AssertionError("no deberia preguntar")
+
+
+def test_delete_refuses_a_weak_match(tmp_path):
+    snapshot = snapshot_of(tmp_path, {"presupuesto_2024.xlsx": 0, "notas.txt": 0})
+    handlers = CommandHandlers(FakeAssistant(snapshot))
+    files = snapshot.names()
+    assert handlers.resolve_file("presupuestos", files, None)  # para otros comandos basta el parecido
+    assert handlers.resolve_file("presupuesto viejo", files, None, min_score=0.7) is None
+    assert handlers.resolve_file("presupuesto viejo", files, None) == "presupuesto_2024.xlsx"
+
+
+def test_bulk_delete_falls_back_to_a_single_item(tmp_path):
+    snapshot = snapshot_of(tmp_path, {"apuntes.txt": 0})
+    assistant = FakeAssistant(snapshot)
+    handlers = CommandHandlers(assistant)
+    calls = []
+    handlers.handle_delete_command = lambda *args: calls.append(args)
+    handlers.handle_bulk_delete_command("apuntes", str(tmp_path), None, snapshot.names())
+    assert calls and calls[0][0] == "apuntes"
+
+
+def test_parse_rejects_names_that_look_like_extensions():
+    assert parse_file_pattern("notas", NOW) is None
+    assert parse_file_pattern("fotos de juan", NOW) is None
+    assert parse_file_pattern("datos", NOW) is None
+    assert parse_file_pattern("pdf de juan", NOW) is None
+    extensions, _, _, _ = parse_file_pattern("jpg y png", NOW)
+    assert extensions == {"jpg", "png"}
+
+
+def test_bulk_commands_with_a_name_act_on_one_item(tmp_path):
+    snapshot = snapshot_of(tmp_path, {"notas.txt": 0, "datos.csv": 0})
+    (tmp_path / "respaldo").mkdir()
+    snapshot.entries["respaldo"] = DirectoryEntry("respaldo", True)
+    handlers = CommandHandlers(FakeAssistant(snapshot))
+    deleted, moved = [], []
+    handlers.handle_delete_command = lambda *args: deleted.append(args[0])
+    handlers.handle_move_command = lambda *args: moved.append(args[:2])
+    for pattern in ("notas", "fotos de juan"):
+        handlers.handle_bulk_delete_command(pattern, str(tmp_path), None, snapshot.names())
+    handlers.handle_bulk_move_command("datos", "respaldo", str(tmp_path), None, snapshot.names())
+    assert deleted == ["notas", "fotos de juan"]
+    assert moved == [("datos", "respaldo")]
@@ -0,0 +1,60 @@
+from intent_router import IntentRouter
+
+router = IntentRouter()
+
+
+def test_no_match():
+    assert router.route("hola que tal") is None
+
+
+def test_longest_keyword_wins_at_same_position():
+    route = router.route("entrar a la carpeta fotos")
+    assert route.name == "enter"
+    assert route.get("target") == "fotos"
+
+
+def test_slots():
+    route = router.route("mover informe punto pdf a documentos")
+    assert route.name == "move"
+    assert route.get("target") == "informe punto pdf"
+    assert route.get("destination") == "documentos"
+
+    route = router.route("renombrar notas como apuntes")
+    assert (route.name, route.get("target"), route.get("new_name")) == ("rename", "notas", "apuntes")
+
+
+def test_missing_slots_mark_route_incomplete():
+    route = router.route("crear archivo")
+    assert route.name == "create_file"
+    assert not route.complete
+
+
+def test_create_file_with_type():
+    route = router.route("crear archivo de texto llamado notas")
+    assert route.get("file_type") == "texto"
+    assert route.get("new_name") == "notas"
+
+
+def test_start_and_stop_are_always_active():
+    assert router.route("iniciar").intent.always_active
+    assert router.route("por favor parar").name == "stop"
+
+
+def test_match_closed_only_accepts_fillers():
+    assert router.match_closed("listar archivos").name == "list"
+    assert router.match_closed("¿dónde estoy?").name == "location"
+    assert router.match_closed("listar archivos de la carpeta fotos") is None
+    assert router.match_closed("mover") is None
+
+
+def test_bulk_delete_without_todos():
+    for text in ("borrar las imágenes de esta semana", "eliminar los pdf de ayer", "borrar todos los png"):
+        route = router.route(text)
+        assert route.name == "delete_many", text
+    assert router.route("borrar las imágenes de esta semana").get("pattern") == "imágenes de esta semana"
+    assert router.route("eliminar informe").name == "delete"
+
+
+def test_bulk_move_without_todos():
+    route = router.route("mover los pdf a facturas")
+    assert (route.name, route.get("pattern"), route.get("destination")) == ("move_many", "pdf", "facturas")
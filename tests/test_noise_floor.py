@@ -0,0 +1,55 @@
+import array
+import math
+
+import pytest
+
+import noise_floor
+from noise_floor import NoiseFloor, frame_energies
+
+
+class FakeRecognizer:
+    energy_threshold = 300
+
+
+def tone(amplitude, samples):
+    return array.array("h", [amplitude if i % 2 else -amplitude for i in range(samples)]).tobytes()
+
+
+def test_energies_match_rms_per_frame():
+    buffer = tone(1000, 320) + tone(100, 320)
+    energies = frame_energies(buffer, 2, 320)
+    assert [round(float(energy)) for energy in energies] == [1000, 100]
+
+
+def test_width_one_is_signed_like_audioop():
+    buffer = bytes([0x80, 0x7F] * 10)  # -128 y 127 con signo
+    assert round(float(frame_energies(buffer, 1, 20)[0])) == 128
+    assert float(frame_energies(bytes(20), 1, 20)[0]) == 0.0
+
+
+@pytest.mark.parametrize("width", [1, 2, 4])
+def test_pure_python_fallback_agrees_with_numpy(width, monkeypatch):
+    buffer = bytes((i * 37) % 256 for i in range(width * 400))
+    expected = [float(energy) for energy in frame_energies(buffer, width, 100)]
+    monkeypatch.setattr(noise_floor, "np", None)
+    fallback = frame_energies(buffer, width, 100)
+    assert len(fallback) == len(expected)
+    assert all(math.isclose(a, b, rel_tol=1e-4) for a, b in zip(fallback, expected))
+
+
+def test_threshold_follows_the_quiet_frames():
+    recognizer = FakeRecognizer()
+    floor = NoiseFloor(recognizer, update_interval=0)
+    floor.feed(tone(200, 16000 * 2) + tone(3000, 16000 // 5), 2, 16000)  # ruido con un poco de voz
+    assert floor.floor == pytest.approx(200, rel=0.01)
+    assert recognizer.energy_threshold == pytest.approx(400, rel=0.01)
+
+
+@pytest.mark.parametrize("width", [1, 2, 4])
+def test_block_rms_matches_frame_energies(width, monkeypatch):
+    buffer = bytes((i * 53) % 256 for i in range(width * 1024))
+    expected = float(frame_energies(buffer, width, 1024)[0])
+    assert noise_floor.rms(buffer, width) == pytest.approx(expected, rel=1e-4)
+    monkeypatch.setattr(noise_floor, "np", None)
+    assert noise_floor.rms(buffer, width) == pytest.approx(expected, rel=1e-4)
+    assert noise_floor.rms(b"", width) == 0.0
@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+from queue import Queue, Empty
+
+from pipeline import CommandPipeline
+
+
+class FakeTrace:
+    command = intent = None
+
+    def mark(self, stage):
+        pass
+
+
+class FakeMetrics:
+    def begin(self):
+        return FakeTrace()
+
+    def release(self, trace):
+        pass
+
+
+class FakeRouter:
+    def route(self, command):
+        return None
+
+
+# asistente minimo con la misma logica de preguntas que VoiceAssistant.recognize_reply/deliver_reply
+class FakeAssistant:
+    capture_mode = "replay"
+
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+        self.metrics = FakeMetrics()
+        self.router = FakeRouter()
+        self.awaiting_reply = threading.Event()
+        self.reply_generation = 0
+        self.reply_queue = Queue()
+        self.executed = []
+        self.reply = None
+        self.reply_seconds = None
+
+    def capture_audio(self, timeout=None):
+        if not self.phrases:
+            return None
+        phrase = self.phrases.pop(0)
+        if phrase == "sí":
+            self.awaiting_reply.wait(5)  # la respuesta se dice despues de la pregunta
+        return phrase
+
+    def recognize_audio(self, audio):
+        return audio
+
+    def handle_command(self, command, route, output_widget, page, trace):
+        self.executed.append(command)
+        if command == "borrar informe":
+            time.sleep(0.3)  # mientras tanto las frases siguientes llenan las colas
+            started = time.monotonic()
+            self.reply = self.recognize_reply(timeout=3)
+            self.reply_seconds = time.monotonic() - started
+
+    def recognize_reply(self, timeout):
+        self.reply_generation += 1
+        self.awaiting_reply.set()
+        try:
+            return self.reply_queue.get(timeout=timeout)
+        except Empty:
+            return ""
+        finally:
+            self.awaiting_reply.clear()
+
+    def deliver_reply(self, command):
+        if not self.awaiting_reply.is_set():
+            return False
+        self.awaiting_reply.clear()
+        self.reply_queue.put(command)
+        return True
+
+    def log_message(self, message, output_widget=None):
+        pass
+
+
+def test_reply_reaches_a_confirmation_while_the_queues_are_full():
+    fillers = [f"abrir carpeta {i}" for i in range(8)]  # mas frases de las que caben en las colas acotadas
+    assistant = FakeAssistant(["borrar informe"] + fillers + ["sí"])
+    asyncio.run(asyncio.wait_for(CommandPipeline(assistant, None, None).run(), 10))
+    assert assistant.reply == "sí"
+    assert assistant.reply_seconds < 2
+    assert "sí" not in assistant.executed
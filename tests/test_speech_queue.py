@@ -0,0 +1,61 @@
+from queue import Empty
+
+import pytest
+
+from speech_queue import SpeechQueue, PRIORITY_URGENT, PRIORITY_NORMAL, PRIORITY_LOW
+
+
+def test_priority_then_fifo():
+    queue = SpeechQueue()
+    queue.put("normal 1")
+    queue.put("urgente", PRIORITY_URGENT)
+    queue.put("normal 2")
+    assert [queue.get(0).text for _ in range(3)] == ["urgente", "normal 1", "normal 2"]
+
+
+def test_consecutive_low_priority_of_same_category_coalesce():
+    queue = SpeechQueue()
+    for name in ("a", "b", "c"):
+        queue.put(name, PRIORITY_LOW, "listing")
+    queue.put("ayuda", PRIORITY_LOW, "help")
+    merged = queue.get(0)
+    assert merged.text == "a. b. c"
+    assert merged.count == 3
+    assert queue.get(0).text == "ayuda"
+    assert queue.stats()["coalesced"] == 2
+
+
+def test_coalescing_respects_max_chars():
+    queue = SpeechQueue(max_merged_chars=5)
+    queue.put("uno", PRIORITY_LOW, "listing")
+    queue.put("dos", PRIORITY_LOW, "listing")
+    assert queue.get(0).text == "uno"
+
+
+def test_cancel_by_category_and_clear():
+    queue = SpeechQueue()
+    queue.put("listado", PRIORITY_LOW, "listing")
+    queue.put("respuesta", PRIORITY_NORMAL)
+    assert queue.cancel("listing") == 1
+    assert queue.get(0).text == "respuesta"
+    queue.put("x")
+    queue.put("y")
+    assert queue.clear() == 2
+    assert queue.empty()
+
+
+def test_requeue_keeps_turn():
+    queue = SpeechQueue()
+    queue.put("primero")
+    queue.put("segundo")
+    first = queue.get(0)
+    queue.requeue(first)
+    assert queue.get(0) is first
+
+
+def test_timeout_and_stop():
+    queue = SpeechQueue()
+    with pytest.raises(Empty):
+        queue.get(0.01)
+    queue.put(None)
+    assert queue.get(0.01) is None
@@ -0,0 +1,67 @@
+import threading
+
+from ui_updates import UpdateScheduler
+from voice_assistant import VoiceAssistant
+
+
+class RecordingPage:
+    def __init__(self):
+        self.controls = []
+        self.updates = []
+        self.sent = threading.Event()
+
+    def update(self, *controls):
+        self.updates.append((threading.current_thread(), controls))
+        self.sent.set()
+
+
+def test_urgent_and_end_of_command_flushes_run_on_the_scheduler_thread():
+    page = RecordingPage()
+    ui = UpdateScheduler(page, interval=10)  # un cuadro largo: solo lo urgente puede salir antes
+    try:
+        ui.begin_command("listar")
+        ui.request("panel")
+        ui.end_command()
+        assert page.sent.wait(2)
+        page.sent.clear()
+        ui.flush("estado")
+        assert page.sent.wait(2)
+        assert [controls for _, controls in page.updates] == [("panel",), ("estado",)]
+        assert all(thread is ui.thread for thread, _ in page.updates)
+        assert ui.stats()["commands"][0]["flushes"] == 1  # el envio se cuenta al comando que lo pidio
+    finally:
+        ui.stop()
+
+
+class LogPanel:
+    def __init__(self):
+        self.controls = []
+
+
+# solo lo que usa log_message con el panel de filas
+class LogState:
+    log_message = VoiceAssistant.log_message
+
+    def __init__(self, ui):
+        self.ui = ui
+        self.log = []
+        self.file_logger = None
+        self.log_row_factory = lambda text: text
+        self.log_rows = 2
+
+
+def test_log_rows_change_before_the_update_is_requested():
+    seen = []
+
+    class CheckingScheduler:
+        page_lock = threading.Lock()
+
+        def request(self, panel):
+            seen.append(list(panel.controls))
+
+    panel = LogPanel()
+    state = LogState(CheckingScheduler())
+    for message in ("uno", "dos", "tres"):
+        state.log_message(message, panel)
+    assert [len(rows) for rows in seen] == [1, 2, 2]
+    assert seen[-1][-1].endswith("tres")
@@ -0,0 +1,31 @@
+import threading
+import time
+
+from voice_assistant import VoiceAssistant
+
+
+# solo el estado que usa wait_for_speech_to_finish
+class SpeechState:
+    wait_for_speech_to_finish = VoiceAssistant.wait_for_speech_to_finish
+
+    def __init__(self):
+        self.speaking_lock = threading.Lock()
+        self.speech_done = threading.Condition(self.speaking_lock)
+        self.is_speaking = False
+        self.pending_utterances = 1
+        self.speech_generation = 0
+
+
+def test_waiter_sees_a_drain_even_if_more_speech_is_queued_before_it_wakes():
+    state = SpeechState()
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(state.wait_for_speech_to_finish(2)))
+    waiter.start()
+    time.sleep(0.1)  # ya esta esperando
+    with state.speech_done:  # y no puede despertar hasta que se suelte el lock
+        state.pending_utterances = 0  # lo mismo que _mark_utterance_done, sin volver a tomar el lock
+        state.speech_generation += 1
+        state.speech_done.notify_all()
+        state.pending_utterances = 1  # otro mensaje encolado antes de que despierte
+    waiter.join(3)
+    assert waited == [True]
@@ -0,0 +1,84 @@
+import pytest
+
+pytest.importorskip("speech_recognition")
+
+from wake_word import WakeWordGate
+
+
+class FakeSpotStream:
+    # cada bloque es el texto que "se oye" en el
+    def __init__(self):
+        self.words = []
+
+    def feed(self, data):
+        self.words += data.decode().split()
+        return list(self.words)
+
+    def finish(self):
+        return self.words
+
+
+class FakeSpotter:
+    def start_stream(self, sample_rate, sample_width):
+        return FakeSpotStream()
+
+
+class FakeFullStream:
+    started = 0
+
+    def __init__(self):
+        FakeFullStream.started += 1
+        self.chunks = []
+
+    def feed(self, data):
+        self.chunks.append(data.decode())
+        return " ".join(self.chunks)
+
+    def finish(self):
+        return " ".join(self.chunks)
+
+
+def full_factory(rate, width):
+    return FakeFullStream()
+
+
+def run(gate, chunks, passthrough=None):
+    stream = gate.stream(16000, 2, full_factory, passthrough)
+    for chunk in chunks:
+        stream.feed(chunk.encode())
+    return stream.finish()
+
+
+@pytest.fixture
+def gate():
+    FakeFullStream.started = 0
+    return WakeWordGate(FakeSpotter(), "asistente", direct_words=["parar"])
+
+
+def test_phrase_without_wake_word_never_reaches_full_recognition(gate):
+    assert run(gate, ["[unk]", "[unk] [unk]"]) is None
+    assert FakeFullStream.started == 0
+    assert gate.rejected == 1
+
+
+def test_wake_word_starts_full_recognition_from_the_start_of_the_phrase(gate):
+    assert run(gate, ["[unk]", "asistente", "listar archivos"]) == "listar archivos"
+    assert FakeFullStream.started == 1
+    assert gate.accepted == 1 and gate.is_open()
+
+
+def test_open_window_and_passthrough_skip_the_spotter(gate):
+    gate.open()
+    assert run(gate, ["volver"]) == "volver"
+    gate.close()
+    assert run(gate, ["sí"], passthrough=lambda: True) == "sí"
+    assert gate.phrases == 0
+
+
+def test_direct_word_and_lone_wake_word(gate):
+    woke = []
+    gate.on_wake = lambda: woke.append(True)
+    assert run(gate, ["parar"]) == "parar"
+    assert FakeFullStream.started == 0
+    assert run(gate, ["asistente"]) is None
+    assert woke == [True] and gate.is_open()
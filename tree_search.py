@@ -0,0 +1,142 @@
+import heapq
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from file_index import QueryMatcher, MIN_SCORE
+
+
+# un resultado de busqueda: ruta completa, puntaje y si es carpeta
+class SearchResult:
+    __slots__ = ("path", "score", "is_dir", "depth")
+
+    def __init__(self, path, score, is_dir, depth):
+        self.path = path
+        self.score = score
+        self.is_dir = is_dir
+        self.depth = depth
+
+    def __lt__(self, other):
+        return (self.score, -self.depth) < (other.score, -other.depth)
+
+
+# busqueda recursiva por nombre: cada carpeta se lee con os.scandir en un hilo del grupo
+# las coincidencias se avisan a medida que aparecen y se para en cuanto hay suficientes buenas
+class TreeSearch:
+    def __init__(self, root, query, on_result=None, on_finished=None, max_workers=8,
+                 limit=10, enough=5, good_score=0.9, max_seconds=15.0, skip_hidden=True):
+        self.root = root
+        self.matcher = QueryMatcher(query)
+        self.query = query
+        self.on_result = on_result
+        self.on_finished = on_finished
+        self.limit = limit
+        self.enough = enough  # resultados buenos que bastan para terminar antes
+        self.good_score = good_score
+        self.max_seconds = max_seconds
+        self.skip_hidden = skip_hidden
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="buscar")
+        self.lock = threading.Lock()
+        self.heap = []  # los mejores limit resultados (min-heap)
+        self.good = 0
+        self.pending = 0  # carpetas encoladas o en lectura
+        self.directories = 0
+        self.entries = 0
+        self.stop_event = threading.Event()
+        self.done = threading.Event()
+        self.stopped_early = False
+        self.cancelled = False
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.monotonic()
+        self._submit(self.root, 0)
+        return self
+
+    def cancel(self):
+        self.cancelled = True
+        self.stop_event.set()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+    # resultados ordenados de mejor a peor (los menos profundos primero si empatan)
+    def results(self):
+        with self.lock:
+            return sorted(self.heap, reverse=True)
+
+    def _submit(self, path, depth):
+        with self.lock:
+            self.pending += 1
+        try:
+            self.executor.submit(self._scan, path, depth)
+        except RuntimeError:  # el grupo ya se cerro
+            self._finish_one()
+
+    def _scan(self, path, depth):
+        try:
+            if self.stop_event.is_set():
+                return
+            if time.monotonic() - self.started_at > self.max_seconds:
+                self.stop_event.set()
+                return
+            subdirs = []
+            found = []
+            seen = 0
+            try:
+                with os.scandir(path) as iterator:
+                    for entry in iterator:
+                        seen += 1
+                        name = entry.name
+                        if self.skip_hidden and (name.startswith(".") or name.startswith("$")):
+                            continue
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)  # sin seguir enlaces: evita ciclos
+                        except OSError:
+                            is_dir = False
+                        if is_dir:
+                            subdirs.append(entry.path)
+                        score = self.matcher.score(name)
+                        if score >= MIN_SCORE:
+                            found.append(SearchResult(entry.path, score, is_dir, depth))
+            except OSError:
+                return  # sin permisos o borrada mientras se buscaba
+            with self.lock:
+                self.directories += 1
+                self.entries += seen
+                new = []
+                for result in found:
+                    if len(self.heap) < self.limit:
+                        heapq.heappush(self.heap, result)
+                    elif self.heap[0] < result:
+                        heapq.heapreplace(self.heap, result)
+                    else:
+                        continue
+                    new.append(result)
+                    if result.score >= self.good_score:
+                        self.good += 1
+                if self.good >= self.enough:
+                    self.stopped_early = True
+                    self.stop_event.set()
+            if self.on_result:
+                for result in new:
+                    self.on_result(result)
+            if not self.stop_event.is_set():
+                for subdir in subdirs:
+                    self._submit(subdir, depth + 1)
+        except Exception as e:
+            print(f"Error buscando en {path}: {e}")
+        finally:
+            self._finish_one()
+
+    def _finish_one(self):
+        with self.lock:
+            self.pending -= 1
+            finished = self.pending == 0
+        if finished and not self.done.is_set():
+            self.finished_at = time.monotonic()
+            self.done.set()
+            self.executor.shutdown(wait=False)
+            if self.on_finished:
+                self.on_finished(self)
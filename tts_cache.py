@@ -0,0 +1,144 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.asistente_voz', 'tts_cache')
+
+
+# cache de frases sintetizadas: WAV en disco y en memoria, ambos LRU con limite de tamaño
+# la clave incluye voz, velocidad y volumen para no reproducir audio con otra configuracion
+class PhraseCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_disk_bytes=256 * 1024 * 1024,
+                 max_memory_bytes=32 * 1024 * 1024, render_after_misses=2):
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.max_memory_bytes = max_memory_bytes
+        self.render_after_misses = render_after_misses  # frases dinamicas: se guardan cuando se repiten
+        self.settings = ("", 0, 0.0)  # (voz, velocidad, volumen) del motor TTS
+        self.lock = threading.Lock()
+        self.memory = OrderedDict()  # clave -> bytes del WAV
+        self.memory_bytes = 0
+        self.disk = OrderedDict()  # clave -> tamaño, del menos al mas usado
+        self.disk_bytes = 0
+        self.pending = OrderedDict()  # frases por renderizar cuando el motor este libre
+        self.misses = {}
+        self.hits = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_disk_index()
+
+    def key(self, text):
+        voice, rate, volume = self.settings
+        return hashlib.sha1(f"{voice}|{rate}|{volume}|{text}".encode("utf-8")).hexdigest()
+
+    def path_for(self, text):
+        return os.path.join(self.directory, self.key(text) + ".wav")
+
+    # devuelve los bytes del WAV o None si la frase no esta en cache
+    def get(self, text):
+        key = self.key(text)
+        with self.lock:
+            audio = self.memory.get(key)
+            if audio is not None:
+                self.memory.move_to_end(key)
+                self.disk.move_to_end(key)
+                self.hits += 1
+                return audio
+            if key not in self.disk:
+                return None
+        path = os.path.join(self.directory, key + ".wav")
+        try:
+            with open(path, "rb") as wav:
+                audio = wav.read()
+            os.utime(path)
+        except OSError:
+            with self.lock:
+                self._forget_disk(key)
+            return None
+        with self.lock:
+            self.disk.move_to_end(key)
+            self._remember(key, audio)
+            self.hits += 1
+        return audio
+
+    # registra un fallo; las frases que se repiten se agendan para renderizar
+    def note_miss(self, text):
+        with self.lock:
+            count = self.misses.get(text, 0) + 1
+            self.misses[text] = count
+            if count >= self.render_after_misses:
+                self.pending[text] = True
+                del self.misses[text]
+            elif len(self.misses) > 1000:
+                self.misses.clear()
+
+    # agenda frases fijas (ayuda, avisos) para tenerlas listas antes de usarlas
+    def warm(self, texts):
+        with self.lock:
+            for text in texts:
+                if text.strip() and self.key(text) not in self.disk:
+                    self.pending[text] = True
+
+    def next_pending(self):
+        with self.lock:
+            while self.pending:
+                text, _ = self.pending.popitem(last=False)
+                if self.key(text) not in self.disk:
+                    return text
+        return None
+
+    # incorpora un WAV recien renderizado en path_for(text)
+    def add_rendered(self, text):
+        key = self.key(text)
+        path = os.path.join(self.directory, key + ".wav")
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return False
+        if size <= 44:  # solo la cabecera: el motor no genero audio
+            os.remove(path)
+            return False
+        with self.lock:
+            self._forget_disk(key)
+            self.disk[key] = size
+            self.disk_bytes += size
+            self._evict_disk()
+        return True
+
+    def _load_disk_index(self):
+        entries = []
+        with os.scandir(self.directory) as iterator:
+            for entry in iterator:
+                if entry.name.endswith(".wav"):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, entry.name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_bytes += size
+        self._evict_disk()
+
+    def _remember(self, key, audio):
+        if len(audio) > self.max_memory_bytes:
+            return
+        self.memory[key] = audio
+        self.memory_bytes += len(audio)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, old = self.memory.popitem(last=False)
+            self.memory_bytes -= len(old)
+
+    def _forget_disk(self, key):
+        size = self.disk.pop(key, None)
+        if size is not None:
+            self.disk_bytes -= size
+        audio = self.memory.pop(key, None)
+        if audio is not None:
+            self.memory_bytes -= len(audio)
+
+    def _evict_disk(self):
+        while self.disk_bytes > self.max_disk_bytes and self.disk:
+            key = next(iter(self.disk))
+            self._forget_disk(key)
+            try:
+                os.remove(os.path.join(self.directory, key + ".wav"))
+            except OSError:
+                pass
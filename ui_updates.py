@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+
+
+# agrupa las llamadas a page.update(): los controles se marcan como sucios y un solo hilo
+# los envia como maximo una vez por intervalo (un cuadro a 60 fps por defecto)
+# quien cambia un control desde otro hilo lo hace dentro de page_lock, asi no se serializa a medio cambiar
+class UpdateScheduler:
+    def __init__(self, page, interval=1 / 60, history=50):
+        self.page = page
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.dirty = []  # controles pendientes; vacio + full_update significa actualizar toda la pagina
+        self.full_update = False
+        self.urgent = False  # enviar sin esperar a que termine el cuadro
+        self.pending = threading.Event()
+        self.page_lock = threading.Lock()  # se tiene mientras page.update() lee los controles
+        self.last_flush = 0.0
+        self.running = True
+        # metricas
+        self.requests = 0
+        self.flushes = 0
+        self.controls_sent = 0  # aproximacion del tamaño de lo enviado: controles, no bytes
+        self.commands = deque(maxlen=history)  # por comando: solicitudes, envios y controles enviados
+        self._command = None
+        self._dirty_command = None  # comando que marco lo pendiente; a el se le cuenta el envio
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    # marca controles para actualizar; sin argumentos se actualiza la pagina completa
+    def request(self, *controls, urgent=False):
+        with self.lock:
+            self.requests += 1
+            if self._command:
+                self._command["requests"] += 1
+            if not self.dirty and not self.full_update:
+                self._dirty_command = self._command
+            self.urgent = self.urgent or urgent
+            if controls:
+                for control in controls:
+                    if control not in self.dirty:
+                        self.dirty.append(control)
+            else:
+                self.full_update = True
+        self.pending.set()
+
+    # pide enviar ya lo pendiente (cambios de estado que el usuario debe ver sin esperar);
+    # el envio lo hace igual el hilo del planificador, sin esperar al siguiente cuadro
+    def flush(self, *controls):
+        self.request(*controls, urgent=True)
+
+    # agrupa las metricas de las actualizaciones que produce un comando
+    def begin_command(self, name):
+        with self.lock:
+            self._command = {"command": name, "requests": 0, "flushes": 0, "controls": 0}
+            self.commands.append(self._command)
+
+    # lo que dejo pendiente el comando se envia enseguida desde el hilo del planificador
+    def end_command(self):
+        with self.lock:
+            self._command = None
+            if self.dirty or self.full_update:
+                self.urgent = True
+                self.pending.set()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "flushes": self.flushes,
+                "controls_sent": self.controls_sent,
+                "commands": list(self.commands),
+            }
+
+    def stop(self):
+        self.running = False
+        self.pending.set()
+
+    def _run(self):
+        while self.running:
+            self.pending.wait()
+            if not self.running:
+                break
+            wait = self.last_flush + self.interval - time.monotonic()
+            if wait > 0 and not self.urgent:
+                time.sleep(wait)  # junta todo lo que llegue durante el cuadro
+            self._send()
+
+    # solo desde el hilo del planificador
+    def _send(self):
+        with self.lock:
+            full, controls = self.full_update, self.dirty
+            self.full_update, self.dirty, self.urgent = False, [], False
+            self.pending.clear()
+            if not full and not controls:
+                return
+            self.flushes += 1
+            sent = len(controls) if not full else len(getattr(self.page, "controls", ())) or 1
+            self.controls_sent += sent
+            if self._dirty_command:
+                self._dirty_command["flushes"] += 1
+                self._dirty_command["controls"] += sent
+            self.last_flush = time.monotonic()
+        try:
+            with self.page_lock:
+                if full:
+                    self.page.update()
+                else:
+                    self.page.update(*controls)
+        except Exception as e:
+            print(f"Error actualizando la interfaz: {e}")
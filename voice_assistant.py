@@ -1,124 +1,583 @@
 import os
+import json
+import hashlib
 import threading
 import time
+import logging
 from queue import Queue
+from collections import deque
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+from queue import Empty
 from datetime import datetime
-import speech_recognition as sr
-import pyttsx3
 import shutil
-import winsound 
-from command_handlers import CommandHandlers
+try:
+    import winsound
+except ImportError:  # fuera de Windows no hay pitido y el cache de frases no se reproduce (se usa pyttsx3)
+    winsound = None
+from command_handlers import CommandHandlers, HELP_SPEECH
+from intent_router import IntentRouter
+from file_jobs import FileJobRunner
+from tts_cache import PhraseCache
+from speech_queue import SpeechQueue, PRIORITY_NORMAL
+from speech_supervisor import SpeechSupervisor
+from metrics import LatencyMetrics
+# speech_recognition, NumPy (piso de ruido y preprocesado), Vosk, watchdog y SQLite se importan al preparar
+# cada subsistema en segundo plano (warm_up), no al cargar el programa: la ventana aparece antes
+
+
+# interfaz de los motores de reconocimiento: reciben un sr.AudioData y devuelven el texto
+# deben lanzar sr.UnknownValueError si no entienden nada y sr.RequestError si el motor no esta disponible
+class RecognizerBackend:
+    name = "base"
+    supports_streaming = False
+    preferred_rate = None  # frecuencia a la que conviene enviarle el audio; None si no se debe preprocesar
+
+    def recognize(self, audio):
+        raise NotImplementedError
+
+    # los motores con supports_streaming devuelven un objeto con feed(bytes) -> texto parcial y finish() -> texto final
+    def start_stream(self, sample_rate, sample_width):
+        raise NotImplementedError
+
+
+# reconocimiento en linea con el servicio de Google (comportamiento original)
+class GoogleBackend(RecognizerBackend):
+    name = "google"
+    preferred_rate = 16000  # suficiente para voz; a 44.1/48 kHz el FLAC que se sube es casi el triple
+
+    def __init__(self, recognizer, language="es-ES"):
+        self.recognizer = recognizer
+        self.language = language
+
+    def recognize(self, audio):
+        return self.recognizer.recognize_google(audio, language=self.language)
+
+
+# reconocimiento local sin red con Vosk (modelo en español, ej: vosk-model-small-es-0.42)
+class VoskBackend(RecognizerBackend):
+    name = "vosk"
+    supports_streaming = True
+    SAMPLE_RATE = 16000
+    preferred_rate = SAMPLE_RATE
+
+    def __init__(self, model_path="model"):
+        import speech_recognition as sr
+        try:
+            import vosk
+        except ImportError as e:
+            raise sr.RequestError("El motor local necesita el paquete 'vosk' (pip install vosk)") from e
+        if not os.path.isdir(model_path):
+            raise sr.RequestError(f"No se encontró el modelo de Vosk en {model_path}")
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        self.model = vosk.Model(model_path) # se carga una sola vez, es lo mas costoso
+
+    def recognize(self, audio):
+        import speech_recognition as sr
+        rec = self._vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2))
+        text = json.loads(rec.FinalResult()).get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        return text
+
+    def start_stream(self, sample_rate, sample_width):
+        return _VoskStream(self._vosk.KaldiRecognizer(self.model, sample_rate), sample_rate, sample_width)
+
+
+# reconocimiento incremental de una frase con Vosk
+class _VoskStream:
+    def __init__(self, kaldi_recognizer, sample_rate, sample_width):
+        self.rec = kaldi_recognizer
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.segments = []  # segmentos que Vosk ya dio por terminados dentro de la frase
+
+    def feed(self, data):
+        if self.sample_width != 2:
+            import speech_recognition as sr # convierte el ancho sin audioop (ya no existe desde Python 3.13)
+            data = sr.AudioData(data, self.sample_rate, self.sample_width).get_raw_data(convert_width=2) # Vosk espera PCM de 16 bits
+        if self.rec.AcceptWaveform(data):
+            self._add_segment(self.rec.Result())
+            partial = ""
+        else:
+            partial = json.loads(self.rec.PartialResult()).get("partial", "")
+        return " ".join(self.segments + ([partial] if partial else []))
+
+    def finish(self):
+        self._add_segment(self.rec.FinalResult())
+        return " ".join(self.segments)
+
+    def _add_segment(self, result):
+        text = json.loads(result).get("text", "")
+        if text:
+            self.segments.append(text)
+
+
+# motor de pruebas: reproduce grabaciones WAV con su transcripcion conocida
+# el guion es un archivo de texto con lineas "archivo.wav|transcripcion" (rutas relativas al guion)
+# una tercera columna opcional ("|comando_esperado") la usa benchmark.py y aqui se ignora
+class ReplayBackend(RecognizerBackend):
+    name = "replay"
+
+    def __init__(self, script_path):
+        self.entries = []
+        self.transcripts = {}
+        self.position = 0
+        base_dir = os.path.dirname(os.path.abspath(script_path))
+        with open(script_path, encoding="utf-8") as script:
+            for line in script:
+                line = line.strip()
+                if not line or line.startswith("#") or "|" not in line:
+                    continue
+                wav_name, transcript = line.split("|")[:2]
+                self.entries.append((os.path.join(base_dir, wav_name.strip()), transcript.strip()))
+
+    # carga la siguiente grabacion del guion como AudioData; None cuando se acaba
+    def next_audio(self):
+        if self.position >= len(self.entries):
+            return None
+        import speech_recognition as sr
+        wav_path, transcript = self.entries[self.position]
+        self.position += 1
+        with sr.AudioFile(wav_path) as source:
+            audio = sr.Recognizer().record(source)
+        self.transcripts[self._key(audio)] = transcript
+        return audio
+
+    def recognize(self, audio):
+        transcript = self.transcripts.get(self._key(audio))
+        if not transcript:
+            import speech_recognition as sr
+            raise sr.UnknownValueError()
+        return transcript
+
+    @staticmethod
+    def _key(audio):
+        return hashlib.sha1(audio.get_raw_data()).hexdigest()
+
+
+# crea el motor de reconocimiento segun la configuracion ("google", "vosk" o "replay")
+def create_recognizer_backend(name, recognizer, **options):
+    name = (name or "google").lower()
+    if name == "google":
+        return GoogleBackend(recognizer, language=options.get("language", "es-ES"))
+    if name == "vosk":
+        return VoskBackend(options.get("model_path") or os.environ.get("ASISTENTE_MODELO_VOSK", "model"))
+    if name == "replay":
+        return ReplayBackend(options.get("script_path") or os.environ.get("ASISTENTE_GUION_AUDIO", "guion.txt"))
+    raise ValueError(f"Motor de reconocimiento desconocido: {name}")
+
+
+SETTINGS_PATH = os.path.join(os.path.expanduser('~'), '.asistente_voz', 'config.json')
+
+
+# preferencias guardadas entre ejecuciones (ej: la voz elegida)
+def load_settings():
+    try:
+        with open(SETTINGS_PATH, encoding="utf-8") as settings:
+            return json.load(settings)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(settings):
+    try:
+        os.makedirs(os.path.dirname(SETTINGS_PATH), exist_ok=True)
+        with open(SETTINGS_PATH, "w", encoding="utf-8") as output:
+            json.dump(settings, output)
+    except OSError as e:
+        print(f"No se pudieron guardar las preferencias: {e}")
+
+
+# avisos fijos que se repiten a diario; se renderizan a WAV al iniciar junto con la ayuda
+STATIC_PROMPTS = [
+    "Sistema de voz inicializado",
+    "por favor , dime un comando",
+    "No reconozco ese comando. Di 'comandos' para ver opciones disponibles.",
+    "Usa el formato: crear archivo de texto llamado nombre, crear archivo word llamado nombre, crear archivo excel llamado nombre, o crear archivo powerpoint llamado nombre",
+    "Asistente reiniciado. ¡Listo para recibir comandos!",
+    "Deteniéndome. Di 'iniciar' para reactivarme",
+    "Ya estoy activo",
+    "Ya estoy detenido",
+    "Eliminación cancelada",
+    "No se recibió respuesta. Operación cancelada",
+    "Archivo no encontrado",
+    "Archivo o carpeta no encontrada",
+    "Debes especificar qué archivo o carpeta quieres eliminar",
+    "Debes decir: mover archivo a carpeta",
+    "Debes decir: renombrar archivo como nuevo nombre",
+    "Debes especificar el nombre de la carpeta",
+    "No puedo regresar más",
+]
+
 
 class VoiceAssistant:
-    def __init__(self):
+    def __init__(self, capture_mode="continuous", listening_beep=True, recognition_backend=None, streaming=True, tts_cache=True, barge_in=False,
+                 log_capacity=1000, log_file=None, desktop_index=True, metrics_file=None, wake_word=None, wake_window=8.0,
+                 preprocess_audio=True, **backend_options):
+        self.started_at = time.monotonic()  # para medir el tiempo hasta el primer comando
+        self.startup_times = {}  # ms que tardo en prepararse cada subsistema
+        self.first_command_ms = None
         self.assistant_active = True
+        self.barge_in = barge_in  # permite interrumpir al asistente hablando encima (requiere captura continua)
+        self.streaming = streaming  # transcripcion parcial y despacho temprano si el motor lo permite
+        # motor de reconocimiento: parametro o variable de entorno ASISTENTE_RECONOCEDOR (google por defecto)
+        self.recognition_backend_name = recognition_backend or os.environ.get("ASISTENTE_RECONOCEDOR", "google")
+        self.backend_options = backend_options
+        self.capture_mode = capture_mode  # "continuous": stream unico con VAD, "per_command": un microfono por comando, "replay": audio del ReplayBackend
+        self.pipeline = None  # CommandPipeline en ejecucion
+        self.awaiting_reply = threading.Event()  # un manejador espera una respuesta (ej: confirmar eliminacion)
+        self.reply_queue = Queue()
+        self.reply_generation = 0  # sube con cada pregunta; lo capturado antes no cuenta como respuesta
+        self._beep_pending = True  # el pitido suena una vez por cada comando que se espera
+        self.listening_beep = listening_beep
+        self.beep_duration_ms = 200
+        self.audio_capture = None
+        self.capture_lock = threading.Lock()
         self.is_speaking = False
         self.speaking_lock = threading.Lock()
-        self.setup_speech_recognition() 
-        self.voice_queue = Queue()
-        self.log = []
+        self.speech_done = threading.Condition(self.speaking_lock)  # notifica cuando la cola de voz se vacia
+        self.pending_utterances = 0  # mensajes encolados o reproduciendose
+        self.speech_generation = 0  # aumenta cada vez que la cola de voz queda vacia
+        self.ready = threading.Event()  # reconocimiento y cache de directorios listos (ver warm_up)
+        self.recognizer = None
+        self.recognition_backend = None
+        self.noise_floor = None
+        self.mic_lock = threading.Lock()  # Lock para el micrófono
+        self.preprocess_audio = preprocess_audio
+        self.preprocessor = None
+        self.wake_word = wake_word
+        self.wake_window = wake_window
+        self.wake_gate = None
+        self.voice_queue = SpeechQueue() # prioridades, agrupacion de lecturas largas y cancelacion
+        self.metrics = LatencyMetrics(log_file=metrics_file) # latencia por etapa de cada comando (JSON lines opcional)
+        self.trace_local = threading.local()  # comando que se esta ejecutando en este hilo
+        self.log = deque(maxlen=log_capacity) # ultimos mensajes en memoria, los viejos se descartan solos
+        self.log_rows = 100  # filas visibles en el panel de logs
+        self.log_row_factory = None  # la interfaz indica como crear una fila del panel (ej: ft.Text)
+        self.ui = None  # UpdateScheduler de la interfaz; sin el se llama page.update() directamente
+        self.file_logger = None
+        if log_file:
+            # copia completa en archivos rotativos de 1 MB
+            self.file_logger = logging.getLogger("asistente")
+            self.file_logger.setLevel(logging.INFO)
+            self.file_logger.propagate = False
+            handler = RotatingFileHandler(log_file, maxBytes=1024 * 1024, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self.file_logger.addHandler(handler)
         self.tts_engine = None
-        self.current_directory = os.path.join(os.path.expanduser('~'), 'Desktop')  # Directorio actual
+        self.phrase_cache = None
+        if tts_cache:
+            try:
+                self.phrase_cache = PhraseCache() # frases ya sintetizadas, se reproducen sin pasar por pyttsx3
+            except OSError as e:
+                print(f"No se pudo crear el cache de frases: {e}")
+        self.root_directory = os.path.join(os.path.expanduser('~'), 'Desktop')  # no se sale de esta carpeta
+        self.current_directory = self.root_directory  # Directorio actual
+        self.search = None  # TreeSearch de la ultima busqueda
+        self.search_results = []  # rutas de la ultima busqueda, para "ir al resultado N"
+        self.use_desktop_index = desktop_index
+        self.desktop_index = None
+        self.directory_cache = None
+        self.file_jobs = None
         self.assistant_thread = None
+        self.router = IntentRouter() # tabla de comandos compilada una sola vez
+        self.handlers = CommandHandlers(self)
         self.setup_voice_worker()
+        self.warm_up()
+    
+    def play_listening_beep(self, blocking=False):
+        #Reproduce un pitido para indicar que está empezando a escuchar (en segundo plano por defecto)
+        if not self.listening_beep:
+            return
+        if self.audio_capture and self.audio_capture.running:
+            self.audio_capture.mute_for(self.beep_duration_ms / 1000) # evita que el pitido se tome como voz
+        beep_thread = threading.Thread(target=self._beep, daemon=True)
+        beep_thread.start()
+        if blocking:
+            beep_thread.join()
     
-    def play_listening_beep(self):
-        #Reproduce un pitido para indicar que está empezando a escuchar"""
+    def _beep(self):
+        if winsound is None:
+            return
+        started = time.monotonic()
         try:
             # Un solo pitido claro para indicar "¡AHORA HABLA!"
-            winsound.Beep(1200, 1000)  # Pitido agudo y claro
+            winsound.Beep(1200, self.beep_duration_ms)  # Pitido agudo y claro
+            self.metrics.record("beep", (time.monotonic() - started) * 1000)
         except Exception as e:
             print(f"No se pudo reproducir el pitido: {e}")
             
     # inicializacion hilo voz sintetica
+    # el supervisor levanta el hilo de voz y lo reemplaza si se cae o se cuelga
     def setup_voice_worker(self):
-        self.voice_thread = threading.Thread(target=self.voice_worker, daemon=True)
-        self.voice_thread.start()
-        time.sleep(0.1)
-        self.speak("Sistema de voz inicializado")
+        self.speech = SpeechSupervisor(self)
+        self.speech.start()
+        self.speak("Sistema de voz inicializado") # queda en la cola hasta que el motor este listo
+    
+    # prepara en paralelo lo que necesita el primer comando: reconocimiento, microfono y cache de directorios
+    # (el motor de voz se prepara en su propio hilo); ready se activa cuando se pueden atender comandos
+    def warm_up(self):
+        def timed(name, function):
+            started = time.monotonic()
+            try:
+                function()
+            except Exception as e:
+                print(f"Error preparando {name}: {e}")
+            self.startup_times[name] = (time.monotonic() - started) * 1000
+        
+        def recognition():
+            timed("reconocimiento", self.setup_speech_recognition)
+            threading.Thread(target=timed, args=("micrófono", self._ensure_capture), daemon=True).start()
+        
+        workers = [
+            threading.Thread(target=recognition, daemon=True),
+            threading.Thread(target=timed, args=("directorio", self.setup_directories), daemon=True),
+        ]
+        if self.use_desktop_index:
+            threading.Thread(target=timed, args=("índice", self.setup_desktop_index), daemon=True).start()
+        for worker in workers:
+            worker.start()
+        
+        def wait_ready():
+            for worker in workers:
+                worker.join()
+            self.ready.set() # aunque algo haya fallado: los errores se ven al usarlo, como antes
+        threading.Thread(target=wait_ready, daemon=True).start()
+    
+    # cache de directorios (al dia con watchdog), trabajos de archivos y foto del directorio actual
+    def setup_directories(self):
+        from directory_cache import DirectoryCache
+        self.directory_cache = DirectoryCache() # fotos de los directorios visitados
+        self.file_jobs = FileJobRunner(self.directory_cache) # mover y eliminar en segundo plano, cancelables
+        if os.path.isdir(self.current_directory):
+            self.handlers.get_index(self.current_directory)
+    
+    # indice en disco de todo el Escritorio; se construye en segundo plano sin retrasar el primer comando
+    def setup_desktop_index(self):
+        import sqlite3
+        from desktop_index import DesktopIndex
+        try:
+            self.desktop_index = DesktopIndex(self.root_directory).start()
+        except (OSError, sqlite3.Error) as e:
+            print(f"No se pudo abrir el indice del Escritorio: {e}")
     
     # inicializacion motor TTS y adicion al hilo voice_worker
-    def setup_tts_in_thread(self): 
+    # fresh: tras un reinicio se crea un motor nuevo (pyttsx3.init() devolveria el mismo, quizas colgado)
+    def setup_tts_in_thread(self, fresh=False): 
+        started = time.monotonic()
         try:    
-            self.tts_engine = pyttsx3.init()
-            voices = self.tts_engine.getProperty('voices')
+            import pyttsx3 # se importa al usarlo: cargar el driver de voz es lo mas lento del arranque
+            self.tts_engine = pyttsx3.Engine() if fresh else pyttsx3.init()
+            
+            # la voz elegida se recuerda entre ejecuciones para no recorrer todas las voces instaladas
+            settings = load_settings()
+            voice_id = settings.get("voice_id")
+            if voice_id:
+                try:
+                    self.tts_engine.setProperty('voice', voice_id)
+                except Exception:
+                    voice_id = None
             
             # encontrar voz en español
-            if voices:
-                for voice in voices:
-                    if any(term in voice.name.lower() for term in ['spanish', 'es_', 'mexico', 'spain']):
-                        self.tts_engine.setProperty('voice', voice.id)
-                        break
+            if not voice_id:
+                voices = self.tts_engine.getProperty('voices')
+                if voices:
+                    for voice in voices:
+                        if any(term in voice.name.lower() for term in ['spanish', 'es_', 'mexico', 'spain']):
+                            self.tts_engine.setProperty('voice', voice.id)
+                            settings["voice_id"] = voice.id
+                            save_settings(settings)
+                            break
             
             #configuracion de las propiedades
             self.tts_engine.setProperty('rate', 150)
             self.tts_engine.setProperty('volume', 1.0)
             
+            if self.phrase_cache:
+                self.phrase_cache.settings = (self.tts_engine.getProperty('voice'), 150, 1.0)
+                self.phrase_cache.warm(STATIC_PROMPTS + [HELP_SPEECH]) # se renderizan cuando el motor esta libre
+            
         except Exception as e:
             print(f"Error inicializando TTS: {e}")
             self.tts_engine = None
+        self.startup_times.setdefault("voz", (time.monotonic() - started) * 1000)
     
     #Parámetros para speechRecognition
+    #incluye el preprocesado y la palabra de activacion, que dependen del motor elegido
     def setup_speech_recognition(self):
+        import speech_recognition as sr
+        from noise_floor import NoiseFloor
         
         self.recognizer = sr.Recognizer()
-        self.mic_lock = threading.Lock()  # Lock para el micrófono
         
         # Configurar parámetros del reconocedor
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
+        self.recognizer.energy_threshold = 300 # valor inicial hasta la primera medicion del ruido
+        self.recognizer.dynamic_energy_threshold = False # el umbral lo mueve NoiseFloor
+        self.noise_floor = NoiseFloor(self.recognizer, on_adapt=lambda floor, threshold: self.metrics.note(
+            "noise_floor", floor=round(floor, 1), threshold=round(threshold, 1)))
         self.recognizer.pause_threshold = 0.5
         self.recognizer.operation_timeout = None
+        
+        try:
+            self.recognition_backend = create_recognizer_backend(self.recognition_backend_name, self.recognizer, **self.backend_options)
+        except (sr.RequestError, OSError) as e:
+            # si el motor local no esta disponible se usa el de Google
+            print(f"No se pudo iniciar el motor '{self.recognition_backend_name}': {e}. Usando Google")
+            self.recognition_backend = GoogleBackend(self.recognizer)
+        if self.preprocess_audio:
+            self.preprocessor = self.setup_preprocessor()
+        if self.wake_word:
+            self.wake_gate = self.setup_wake_word(self.wake_word, self.wake_window)
     
     #procesa la cola de los mensajes
-    def voice_worker(self):
-        self.setup_tts_in_thread()
+    def voice_worker(self, generation=1):
+        supervisor = self.speech
+        self.setup_tts_in_thread(fresh=generation > 1)
+        failures = 0  # errores seguidos del motor; varios seguidos hacen que el supervisor lo recree
         
         try:
-            while True:
-                message_data = self.voice_queue.get(timeout=20)
+            while supervisor.alive(generation):
+                supervisor.beat(generation)
+                rendering = self.tts_engine and self.phrase_cache and self.phrase_cache.pending
+                try:
+                    utterance = self.voice_queue.get(timeout=0.05 if rendering else 1)
+                except Empty:
+                    if rendering:
+                        self._render_next_phrase() # cola vacia: se aprovecha para pre-renderizar una frase
+                    continue
                 
-                if message_data is None:
+                if utterance is None:
+                    supervisor.stop()
                     break
                 
-                text = message_data.get('text', '') if isinstance(message_data, dict) else str(message_data)
+                if not supervisor.begin(generation, utterance):
+                    self.voice_queue.requeue(utterance) # este hilo ya fue reemplazado: el mensaje es del nuevo
+                    return
+                
+                text = utterance.text # puede ser la union de varios mensajes de una misma lectura
                 
                 if self.tts_engine and text:
                     try:
                         with self.speaking_lock:
                             self.is_speaking = True
                         
-                        self.tts_engine.say(text)
-                        self.tts_engine.runAndWait()
+                        if utterance.trace:
+                            self.metrics.audible(utterance.trace) # primera respuesta audible del comando
+                        supervisor.speaking(generation)
+                        started = time.monotonic()
+                        self._say(text)
+                        self.metrics.record("speak", (time.monotonic() - started) * 1000)
+                        failures = 0
                         time.sleep(0.2)
                         
                     except Exception as e:
                         print(f"Error reproduciendo mensaje: {e}")
+                        supervisor.failed(generation, e)
+                        failures += 1
                     finally:
-                        with self.speaking_lock:
-                            self.is_speaking = False
+                        if supervisor.alive(generation):
+                            with self.speaking_lock:
+                                self.is_speaking = False
                 
-                self.voice_queue.task_done()
+                if not supervisor.finish(generation):
+                    return # el supervisor ya lo dio por perdido y levanto otro hilo
+                self._mark_utterance_done(utterance.count)
+                if failures >= 3:
+                    raise RuntimeError("el motor de voz falla en cada mensaje")
                 
         except Exception as e:
             print(f"Error en voice_worker: {e}")
+            supervisor.failed(generation, e)
         finally:
-            with self.speaking_lock:
-                self.is_speaking = False
+            if generation == supervisor.generation:
+                with self.speech_done:
+                    self.is_speaking = False
+                    self.speech_done.notify_all()
     
-    #añade un mensaje a la cola
-    def speak(self, text):
-       if text.strip():
-            self.voice_queue.put({'text': text, 'timestamp': time.time()})
+    #reproduce el WAV del cache si existe; si no, sintetiza con pyttsx3
+    def _say(self, text):
+        audio = self.phrase_cache.get(text) if self.phrase_cache else None
+        if audio is not None and winsound:
+            winsound.PlaySound(audio, winsound.SND_MEMORY)
+            return
+        self.tts_engine.say(text)
+        self.tts_engine.runAndWait()
+        if self.phrase_cache:
+            self.phrase_cache.note_miss(text)
     
-    #espera a que el asistente pare de hablar
-    def wait_for_speech_to_finish(self):
-        while True:
-            with self.speaking_lock:
-                if not self.is_speaking and self.voice_queue.empty():
-                    break
-          
-  
+    #renderiza a WAV la siguiente frase pendiente del cache (solo desde el hilo de voz)
+    def _render_next_phrase(self):
+        text = self.phrase_cache.next_pending()
+        if not text:
+            return
+        try:
+            self.tts_engine.save_to_file(text, self.phrase_cache.path_for(text))
+            self.tts_engine.runAndWait()
+            self.phrase_cache.add_rendered(text)
+        except Exception as e:
+            print(f"Error renderizando frase: {e}")
+    
+    #descuenta mensajes terminados o cancelados y despierta a quien espera si la cola quedo vacia
+    def _mark_utterance_done(self, count=1):
+        with self.speech_done:
+            self.pending_utterances = max(0, self.pending_utterances - count)
+            if self.pending_utterances == 0:
+                self.speech_generation += 1
+                self.speech_done.notify_all()
+    
+    #añade un mensaje a la cola; category agrupa lecturas largas que se pueden cancelar (ej: "listing")
+    def speak(self, text, priority=PRIORITY_NORMAL, category=None):
+        if text.strip():
+            with self.speech_done:
+                self.pending_utterances += 1  # se cuenta antes de encolar para que nadie vea la cola vacia por error
+            trace = getattr(self.trace_local, "trace", None)
+            if trace:
+                self.metrics.queued(trace)
+            self.voice_queue.put(text, priority, category, trace)
+    
+    #descarta las lecturas pendientes de esas categorias
+    def cancel_speech(self, *categories):
+        dropped = self.voice_queue.cancel(*categories)
+        if dropped:
+            self._mark_utterance_done(dropped)
+        return dropped
+    
+    #corta lo que se esta diciendo y vacia la cola (el usuario hablo encima del asistente)
+    def interrupt_speech(self):
+        dropped = self.voice_queue.clear()
+        if dropped:
+            self._mark_utterance_done(dropped)
+        try:
+            if winsound:
+                winsound.PlaySound(None, 0) # detiene un WAV del cache de frases
+            if self.tts_engine:
+                self.tts_engine.stop()
+        except Exception as e:
+            print(f"No se pudo interrumpir la voz: {e}")
+    
+    #estado de la cola de voz para monitoreo: profundidad, descartados, agrupados
+    def speech_stats(self):
+        return self.voice_queue.stats()
+    
+    #salud del sistema de voz para alertas: tiempo activo, reinicios, edad del mensaje mas viejo en cola
+    def speech_health(self):
+        health = self.speech.health()
+        health.update(self.voice_queue.stats())
+        health["pending"] = self.pending_utterances
+        return health
+    
+    #espera sin consumir CPU a que el asistente pare de hablar; devuelve False si se agota el timeout
+    #alcanza con que la cola se haya vaciado una vez: si al despertar ya se encolo otro mensaje no se espera tambien ese
+    def wait_for_speech_to_finish(self, timeout=None):
+        with self.speech_done:
+            start = self.speech_generation
+            return self.speech_done.wait_for(
+                lambda: self.speech_generation != start or (not self.is_speaking and self.pending_utterances == 0),
+                timeout
+            )
 
     #añadir mensaje de log 
     def log_message(self, message, output_widget=None):
@@ -126,125 +585,303 @@ class VoiceAssistant:
         timestamp = datetime.now().strftime("%H:%M:%S")
         formatted_message = f"[{timestamp}] {message}"
         self.log.append(formatted_message)
+        if self.file_logger:
+            self.file_logger.info(formatted_message)
         
-        if output_widget:
-            output_widget.value = "\n".join(self.log[-20:])
+        if output_widget is None:
+            return
+        # el cambio se hace antes de pedir el envio y sin que el planificador este serializando el panel
+        with self.ui.page_lock if self.ui else nullcontext():
+            if self.log_row_factory and hasattr(output_widget, "controls"):
+                # panel de filas: se agrega una y se quita la mas vieja, sin reenviar todo el texto
+                rows = output_widget.controls
+                rows.append(self.log_row_factory(formatted_message))
+                if len(rows) > self.log_rows:
+                    del rows[0]
+            else:
+                output_widget.value = "\n".join(list(self.log)[-20:])
+        if self.ui:
+            self.ui.request(output_widget)
             
     #obtener los archivos del directorio en el que se esta ubicado
     def get_current_files(self):
         try:
-            files = os.listdir(self.current_directory) #obtiene los archivos y carpetas del directorio actual
+            files = self.directory_cache.get(self.current_directory).names() #obtiene los archivos y carpetas del directorio actual (sin tocar el disco si ya esta en cache)
             return files, self.current_directory #devuelve los archivos encontrados y el directorio de donde los extrajo
         except Exception:
             return [], ""   #controla el error que se genera en caso de no encontrar nada
 
+    #inicia la captura continua la primera vez; devuelve False si hay que usar un microfono por comando
+    def _ensure_capture(self):
+        if self.capture_mode != "continuous":
+            return False
+        with self.capture_lock: # la preparacion del arranque y la tuberia pueden llegar a la vez
+            return self._start_capture()
+    
+    def _start_capture(self):
+        if self.audio_capture is None:
+            from audio_capture import ContinuousCapture
+            streaming = self.streaming and self.recognition_backend.supports_streaming
+            stream_factory = self.recognition_backend.start_stream if streaming else None
+            if stream_factory and self.wake_gate:
+                # el detector escucha los bloques crudos; el motor completo solo recibe las frases con la palabra
+                stream_factory = lambda rate, width: self.wake_gate.stream(
+                    rate, width, self.recognition_backend.start_stream, passthrough=self.awaiting_reply.is_set)
+            self.audio_capture = ContinuousCapture(
+                self.recognizer,
+                is_muted=lambda: self.is_speaking or self.pending_utterances > 0, # no escuchar la voz sintetica
+                stream_factory=stream_factory,
+                early_match=self.match_closed_command if streaming and not self.wake_gate else None,
+                barge_in=self.barge_in,
+                on_barge_in=self.interrupt_speech,
+                noise_floor=self.noise_floor
+            )
+        if self.audio_capture.running:
+            return True
+        if self.audio_capture.start(calibration=0): # el piso de ruido se mide con el audio que va llegando
+            return True
+        print("No se pudo abrir la captura continua, usando un micrófono por comando")
+        self.capture_mode = "per_command"
+        return False
+
+    #devuelve el comando si el texto parcial es exactamente un comando cerrado (sin argumentos)
+    def match_closed_command(self, partial):
+        route = self.router.match_closed(partial)
+        return route.text if route else None
+
+    #preprocesado de cada frase antes del reconocimiento (solo si el motor indica su frecuencia preferida)
+    def setup_preprocessor(self):
+        import audio_preprocess
+        rate = self.recognition_backend.preferred_rate
+        if not rate:
+            return None
+        if not audio_preprocess.AVAILABLE:
+            print("Sin NumPy el audio se envia al reconocimiento sin preprocesar")
+            return None
+        return audio_preprocess.AudioPreprocessor(
+            target_rate=rate,
+            threshold=lambda: self.recognizer.energy_threshold, # el mismo umbral de voz que sigue al ruido
+            on_processed=lambda before, after, ms: self.metrics.record("preprocess", ms)
+        )
+    
+    #modo palabra de activacion: un detector local decide que frases llegan al reconocimiento completo
+    #iniciar/parar y sus sinonimos se detectan localmente sin decir la palabra de activacion
+    def setup_wake_word(self, wake_word, window):
+        import speech_recognition as sr
+        from wake_word import VoskKeywordSpotter, WakeWordGate
+        direct_words = [keyword for intent in self.router.intents if intent.always_active
+                        for keyword in intent.keywords if " " not in keyword]
+        try:
+            spotter = VoskKeywordSpotter(
+                wake_word.lower().split() + direct_words,
+                model=getattr(self.recognition_backend, "model", None), # reutiliza el modelo si el motor ya es Vosk
+                model_path=self.backend_options.get("model_path") or os.environ.get("ASISTENTE_MODELO_VOSK", "model")
+            )
+        except (sr.RequestError, OSError) as e:
+            print(f"No se pudo activar la palabra '{wake_word}': {e}. Se escuchan todas las frases")
+            return None
+        return WakeWordGate(
+            spotter, wake_word, direct_words, window,
+            on_wake=self.play_listening_beep,
+            on_spot=lambda ms: self.metrics.record("wake_spot", ms)
+        )
+    
+    #escucha una frase abriendo un microfono nuevo (modo anterior)
+    def _listen_once(self, timeout=None):
+        if self._beep_pending:
+            self._beep_pending = False
+            self.play_listening_beep(blocking=True)
+
+        import speech_recognition as sr
+        mic = sr.Microphone() # Crear nuevo micrófono para cada uso (evita problemas de estados)
+            
+        with mic as source:
+            # Escuchar con timeout
+            audio = self.recognizer.listen(source, timeout=timeout or 0, phrase_time_limit=0)
+        self.noise_floor.feed_audio(audio) # silencios y pausas de la frase ajustan el umbral de la siguiente
+        return audio
+
+    #captura la siguiente frase: AudioData, texto (modo streaming) o None si no hubo nada antes del timeout
+    def capture_audio(self, timeout=None):
+        import speech_recognition as sr
+        self.ready.wait() # la tuberia arranca antes de que el reconocimiento termine de prepararse
+        if self.capture_mode == "replay":
+            return self.recognition_backend.next_audio() # grabaciones del guion, sin microfono
+        
+        if not (self.barge_in and self._ensure_capture()):
+            if not self.wait_for_speech_to_finish(timeout): # evita que capte la voz sintetica como comando
+                return None
+        
+        try:
+            if self._ensure_capture():
+                if self._beep_pending and self.audio_capture.is_idle() and self.pending_utterances == 0:
+                    self._beep_pending = False
+                    self.play_listening_beep() # no bloquea; el siguiente comando puede estar ya grabado
+                audio = self.audio_capture.get_utterance(timeout) # la siguiente frase ya segmentada por el hilo de captura
+            else:
+                audio = self._listen_once(timeout)
+        except sr.WaitTimeoutError:
+            return None
+        # las confirmaciones no necesitan la palabra de activacion; el texto en streaming ya paso por la compuerta
+        if self.wake_gate and not self.awaiting_reply.is_set() and not isinstance(audio, str):
+            audio = self.wake_gate.filter(audio)
+        if audio is not None:
+            self._beep_pending = True
+        return audio
+
+    #convierte la frase capturada en texto
+    def transcribe(self, audio):
+        if audio is None:
+            return ""
+        if isinstance(audio, str): # en modo streaming la frase llega ya transcrita
+            return audio.lower().strip() or "sin comando"
+        if self.preprocessor:
+            audio = self.preprocessor.process(audio) # sin silencios ni zumbido y a la frecuencia del motor
+        # Reconocer fuera del contexto del micrófono
+        return self.recognition_backend.recognize(audio).lower().strip()
+
     #funcion para el reconocimiento de comandos
     def recognize_speech(self):
-        
-        self.wait_for_speech_to_finish() # evita que capte la voz sintetica como comando
+        return self._recognition_guard(lambda: self.transcribe(self.capture_audio()))
 
+    #reconoce una frase ya capturada (etapa de reconocimiento de la tuberia)
+    def recognize_audio(self, audio):
+        return self._recognition_guard(lambda: self.transcribe(audio))
+
+    #respuesta a una pregunta de un manejador (confirmaciones); con la tuberia activa llega desde ella
+    def recognize_reply(self, timeout=15):
+        if self.pipeline is None:
+            return self.recognize_speech()
+        self.reply_generation += 1 # las frases que ya estan en la tuberia quedan de una generacion anterior
+        if self.audio_capture:
+            self.audio_capture.clear() # y las que aun esperan en la captura continua se descartan
+        while not self.reply_queue.empty():
+            self.reply_queue.get_nowait()
+        self.awaiting_reply.set()
         try:
-            
-            self.play_listening_beep()
+            return self.reply_queue.get(timeout=timeout)
+        except Empty:
+            return ""
+        finally:
+            self.awaiting_reply.clear()
 
-            mic = sr.Microphone() # Crear nuevo micrófono para cada uso (evita problemas de estados)
-                
-            with mic as source:
-                # Ajustar para ruido ambiente solo ocasionalmente
-                if not hasattr(self, '_ambient_adjusted') or not self._ambient_adjusted:
-                    try:
-                        self.recognizer.adjust_for_ambient_noise(source, duration=0.2)
-                        self._ambient_adjusted = True
-                    except Exception:
-                        # Si falla el ajuste, continuar sin él
-                        pass
-                
-                # Escuchar con timeout
-                audio = self.recognizer.listen(source, timeout=0, phrase_time_limit=0)
-                
-            # Reconocer fuera del contexto del micrófono
-            command = self.recognizer.recognize_google(audio, language="es-ES").lower().strip()
-            return command
+    #entrega el texto a un manejador que espera respuesta; devuelve False si nadie la esperaba
+    def deliver_reply(self, command):
+        if not self.awaiting_reply.is_set():
+            return False
+        self.awaiting_reply.clear()
+        self.reply_queue.put(command)
+        return True
+
+    #traduce los errores del reconocimiento a "sin comando" o "" como siempre
+    def _recognition_guard(self, step):
+        import speech_recognition as sr
+        try:
+            return step()
                 
         except (sr.WaitTimeoutError, sr.UnknownValueError): # maneja error si no se habla
             return "sin comando"
         except sr.RequestError as e:# maneja error en caso de que no se entienda el comando
             print(f"Error con el servicio de reconocimiento: {e}")
-            self._reset_ambient_flag()
+            self.noise_floor.reset()
             return ""
         except (OSError, AttributeError) as e: #maneja error en caso de que sea algo de hardware
             print(f"Error de audio: {e}")
-            self._reset_ambient_flag()
+            self.noise_floor.reset()
             return ""
         except Exception as e: #maneja errores genericos
             print(f"Error inesperado en reconocimiento: {e}")
-            self._reset_ambient_flag()
+            self.noise_floor.reset()
             return ""
-        finally:
-            # Limpiar referencias
-                mic = None
     
-    #resetear el ajuste de la flag del sonido ambiente
-    def _reset_ambient_flag(self):
+    #met para ejecutar los comandos
+    def execute_command(self, cmd, output_widget, page, route=None):
+        if self.ui:
+            self.ui.begin_command(cmd) # metricas de actualizaciones de la interfaz por comando
         try:
-            self._ambient_adjusted = False
-        except:
-            pass
+            self.log_message(f"Comando: {cmd}", output_widget) # agrega el comando a los logs
+            
+            files, current_dir = self.get_current_files() # obtiene los archivos del directorio actual 
+            if not current_dir:
+                self.speak("No puedo acceder al directorio actual")
+                return
+            
+            route = route or self.router.route(cmd) # una sola pasada sobre el texto
+            if route and route.name != "no_command":
+                self.cancel_speech("listing", "help") # un comando nuevo corta las lecturas que quedaban pendientes
+            self.dispatch(route, files, current_dir, output_widget)
+        finally:
+            trace = getattr(self.trace_local, "trace", None)
+            if trace:
+                trace.mark("execute")
+            if self.ui:
+                self.ui.end_command()
+            else:
+                page.update()
+            if trace:
+                trace.mark("ui")
     
+    #pide actualizar la interfaz; con urgent los cambios se envian sin esperar al siguiente cuadro
+    def update_ui(self, page, *controls, urgent=False):
+        if self.ui is None:
+            page.update()
+        elif urgent:
+            self.ui.flush(*controls)
+        else:
+            self.ui.request(*controls)
     
-    #met para ejecutar los comandos
-    def execute_command(self, cmd, output_widget, page):
-        
-        self.log_message(f"Comando: {cmd}", output_widget) # agrega el comando a los logs
+    #ejecuta el metodo del manejador que corresponde al comando enrutado
+    def dispatch(self, route, files, current_dir, output_widget):
+        handlers = self.handlers
+        name = route.name if route else None
         
-        files, current_dir = self.get_current_files() # obtiene los archivos del directorio actual 
-        if not current_dir:
-            self.speak("No puedo acceder al directorio actual")
-            return
-        
-        handlers = CommandHandlers(self)
-        # procesa los comandos detectando la palabra clave y ejecutando el metodo correspondiente
-        
-        if "sin comando" in cmd:
-            handlers.speak("por favor , dime un comando")
-        elif "eliminar" in cmd or "borrar" in cmd:
-            handlers.handle_delete_command(cmd, files, current_dir, output_widget)
-        elif "mover" in cmd:
-            handlers.handle_move_command(cmd, files, current_dir, output_widget)
-        elif "renombrar" in cmd:
-            handlers.handle_rename_command(cmd, files, current_dir, output_widget)
-        elif any(phrase in cmd for phrase in ["listar", "mostrar", "qué archivos"]):
+        if name == "no_command":
+            self.speak("por favor , dime un comando")
+        elif name == "delete":
+            handlers.handle_delete_command(route.get("target"), files, current_dir, output_widget)
+        elif name == "delete_many":
+            handlers.handle_bulk_delete_command(route.get("pattern"), current_dir, output_widget, files)
+        elif name == "move_many":
+            handlers.handle_bulk_move_command(route.get("pattern"), route.get("destination"), current_dir, output_widget, files)
+        elif name == "move":
+            handlers.handle_move_command(route.get("target"), route.get("destination"), files, current_dir, output_widget)
+        elif name == "rename":
+            handlers.handle_rename_command(route.get("target"), route.get("new_name"), files, current_dir, output_widget)
+        elif name == "cancel":
+            handlers.handle_cancel_command(route.get("target"), output_widget)
+        elif name == "search":
+            handlers.handle_search_command(route.get("target"), output_widget)
+        elif name == "go_to_result":
+            handlers.handle_go_to_result_command(route.get("target"), output_widget)
+        elif name == "list":
             handlers.handle_list_command(files, current_dir, output_widget)
-        elif "entrar a" in cmd or "ir a" in cmd or "entrar" in cmd:
-            handlers.handle_enter_folder_command(cmd, files, output_widget)
-        elif "volver" in cmd or "salir" in cmd or "regresar" in cmd:
+        elif name == "enter":
+            handlers.handle_enter_folder_command(route.get("target"), files, output_widget)
+        elif name == "go_back":
             handlers.handle_go_back_command(output_widget)
-        elif "dónde estoy" in cmd or "ubicación" in cmd:
+        elif name == "location":
             handlers.handle_location_command(output_widget)
-        elif "comandos" in cmd or "ayuda" in cmd:
+        elif name == "help":
             handlers.handle_help_command(output_widget)
-        elif "crear carpeta" in cmd:
-            handlers.handle_create_folder_command(cmd, current_dir, output_widget)
-        elif "crear archivo" in cmd:
+        elif name == "create_folder":
+            handlers.handle_create_folder_command(route.get("target"), current_dir, output_widget)
+        elif name == "create_file" and route.complete:
+            handlers.handle_create_file_with_type_command(route.get("file_type"), route.get("new_name"), current_dir, output_widget)
+        elif name == "create_file":
             # Solo permitir el formato específico con tipo
-            if any(type_word in cmd for type_word in ["archivo de texto" , "texto", "word", "excel", "powerpoint", "power point", "presentación", "presentacion"]) and "llamado" in cmd:
-                handlers.handle_create_file_with_type_command(cmd, current_dir, output_widget)
-            else:
-                self.speak("Usa el formato: crear archivo de texto llamado nombre, crear archivo word llamado nombre, crear archivo excel llamado nombre, o crear archivo powerpoint llamado nombre")
-            
+            self.speak("Usa el formato: crear archivo de texto llamado nombre, crear archivo word llamado nombre, crear archivo excel llamado nombre, o crear archivo powerpoint llamado nombre")
         else:
             self.speak("No reconozco ese comando. Di 'comandos' para ver opciones disponibles.")
-        
-        page.update()
     
     def start_assistant(self, output_widget, page):
         if not self.assistant_active:
             self.assistant_active = True
             self.log_message("🟢 Asistente reiniciado", output_widget)
             self.speak("Asistente reiniciado. ¡Listo para recibir comandos!")
-            page.update()
-            
+            self.update_ui(page, urgent=True)
             
+            if self.assistant_thread and self.assistant_thread.is_alive():
+                return # la tuberia sigue escuchando (atiende "iniciar" aun detenido)
             self.assistant_thread = threading.Thread(
                 target=self.assistant_loop,
                 args=(output_widget, page),
@@ -255,57 +892,53 @@ class VoiceAssistant:
     #funcion para parar el asistente
     def stop_assistant(self, output_widget, page):
         self.assistant_active = False
+        if self.wake_gate:
+            self.wake_gate.close() # detenido, lo que se diga despues ya no pasa sin la palabra de activacion
+        self.cancel_speech("listing", "help")
         self.log_message("🛑 Asistente detenido", output_widget)
         self.speak("Deteniéndome. Di 'iniciar' para reactivarme")
-        page.update()
+        self.update_ui(page, urgent=True)
+    
+    #atiende un comando reconocido: iniciar/parar siempre, el resto solo si esta activo
+    def handle_command(self, command, route, output_widget, page, trace=None):
+        if self.first_command_ms is None:
+            self.report_first_command(output_widget)
+        self.trace_local.trace = trace # las respuestas que encole el comando quedan asociadas a sus tiempos
+        try:
+            self._handle_command(command, route, output_widget, page)
+        finally:
+            self.trace_local.trace = None
+    
+    def _handle_command(self, command, route, output_widget, page):
+        # Comandos que funcionan siempre
+        if route and route.name == "start":
+            if not self.assistant_active:
+                self.start_assistant(output_widget, page)
+            else:
+                self.speak("Ya estoy activo")
+        elif route and route.name == "stop":
+            if self.assistant_active:
+                self.stop_assistant(output_widget, page)
+            else:
+                self.speak("Ya estoy detenido")
+        # Solo procesa otros comandos si está activo
+        elif self.assistant_active:
+            self.execute_command(command, output_widget, page, route)
+        # Si está detenido, ignora silenciosamente otros comandos
     
-    #funcion principaal para escuchar siempre los comandos de voz
+    #informa cuanto tardo el arranque hasta aceptar el primer comando
+    def report_first_command(self, output_widget):
+        self.first_command_ms = (time.monotonic() - self.started_at) * 1000
+        self.metrics.record("first_command", self.first_command_ms)
+        details = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.startup_times.items())
+        self.log_message(f"⏱️ Primer comando a los {self.first_command_ms / 1000:.1f} s del inicio ({details})", output_widget)
+    
+    #funcion principal para escuchar siempre los comandos de voz: corre la tuberia asyncio en este hilo
     def assistant_loop(self, output_widget, page):
-        consecutive_errors = 0
-        max_errors = 5
-        error_delay = 1
-        
-        while True:  # Siempre escucha
-            try:
-                command = self.recognize_speech()
-                consecutive_errors = 0  # reinicia el numero de errores
-                error_delay = 1  # reinicia el delay
-                
-                if not command:
-                    continue
-                
-                # Comandos que funcionan siempre
-                if any(word in command for word in ["iniciar", "empezar", "activar"]):
-                    if not self.assistant_active:
-                        self.start_assistant(output_widget, page)
-                    else:
-                        self.speak("Ya estoy activo")
-                    continue
-                elif any(word in command for word in ["parar", "detener", "terminar"]):
-                    if self.assistant_active:
-                        self.stop_assistant(output_widget, page)
-                    else:
-                        self.speak("Ya estoy detenido")
-                    continue
-                
-                # Solo procesa otros comandos si está activo
-                if self.assistant_active:
-                    self.execute_command(command, output_widget, page)
-                # Si está detenido, ignora silenciosamente otros comandos
-                
-            except Exception as e:
-                consecutive_errors += 1
-                print(f"Error en assistant_loop ({consecutive_errors}/{max_errors}): {e}")
-                
-                if consecutive_errors >= max_errors:
-                    print("Demasiados errores consecutivos, esperando más tiempo...")
-                    error_delay = min(error_delay * 2, 10)  # Incrementar delay exponencialmente
-                    consecutive_errors = 0
-                
-                time.sleep(error_delay)
-                continue
-            
-            time.sleep(0.3)  # Delay más corto para mejor respuesta
-            
-
-    
\ No newline at end of file
+        import asyncio
+        from pipeline import CommandPipeline
+        self.pipeline = CommandPipeline(self, output_widget, page)
+        try:
+            asyncio.run(self.pipeline.run())
+        finally:
+            self.pipeline = None
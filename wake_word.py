@@ -0,0 +1,211 @@
+import json
+import os
+import time
+import speech_recognition as sr
+
+
+# detector local de palabras clave con Vosk y una gramatica cerrada: solo conoce las palabras dadas
+# y marca todo lo demas como "[unk]", por eso es mucho mas liviano que el reconocimiento completo
+class VoskKeywordSpotter:
+    SAMPLE_RATE = 16000
+
+    def __init__(self, words, model=None, model_path="model"):
+        try:
+            import vosk
+        except ImportError as e:
+            raise sr.RequestError("La palabra de activacion necesita el paquete 'vosk' (pip install vosk)") from e
+        vosk.SetLogLevel(-1)
+        self._vosk = vosk
+        if model is None:
+            if not os.path.isdir(model_path):
+                raise sr.RequestError(f"No se encontró el modelo de Vosk en {model_path}")
+            model = vosk.Model(model_path)
+        self.model = model
+        self.grammar = json.dumps(sorted(set(words)) + ["[unk]"], ensure_ascii=False)
+
+    # palabras reconocidas en la frase con su inicio y fin en segundos: [(palabra, inicio, fin)]
+    def spot(self, audio):
+        rec = self._vosk.KaldiRecognizer(self.model, self.SAMPLE_RATE, self.grammar)
+        rec.SetWords(True)
+        rec.AcceptWaveform(audio.get_raw_data(convert_rate=self.SAMPLE_RATE, convert_width=2))
+        result = json.loads(rec.FinalResult())
+        return [(word["word"], word["start"], word["end"]) for word in result.get("result", [])]
+
+    # deteccion sobre el audio crudo mientras se graba la frase (modo streaming)
+    def start_stream(self, sample_rate, sample_width):
+        rec = self._vosk.KaldiRecognizer(self.model, sample_rate, self.grammar)
+        return _SpotStream(rec, sample_rate, sample_width)
+
+
+# palabras clave oidas en una frase que se recibe por bloques
+class _SpotStream:
+    def __init__(self, kaldi_recognizer, sample_rate, sample_width):
+        self.rec = kaldi_recognizer
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.words = []  # palabras de los segmentos que Vosk ya cerro
+
+    # devuelve las palabras oidas hasta ahora (las del segmento en curso pueden cambiar)
+    def feed(self, data):
+        if self.sample_width != 2:  # Vosk espera PCM de 16 bits
+            data = sr.AudioData(data, self.sample_rate, self.sample_width).get_raw_data(convert_width=2)
+        if self.rec.AcceptWaveform(data):
+            self.words += json.loads(self.rec.Result()).get("text", "").split()
+            return list(self.words)
+        return self.words + json.loads(self.rec.PartialResult()).get("partial", "").split()
+
+    def finish(self):
+        self.words += json.loads(self.rec.FinalResult()).get("text", "").split()
+        return self.words
+
+
+# compuerta delante del reconocimiento: solo deja pasar lo que se dice despues de la palabra de activacion
+# tras activarse queda abierta window segundos (cada frase que pasa la extiende) para seguir conversando
+# las palabras directas (ej: "iniciar", "parar") se reconocen localmente aunque no se diga la palabra de activacion
+class WakeWordGate:
+    def __init__(self, spotter, wake_word="asistente", direct_words=(), window=8.0, on_wake=None, on_spot=None):
+        self.spotter = spotter
+        self.wake = wake_word.lower().split()
+        self.direct_words = {word.lower() for word in direct_words}
+        self.window = window
+        self.on_wake = on_wake  # se dijo solo la palabra de activacion: avisar que se escucha
+        self.on_spot = on_spot  # on_spot(ms) con lo que tardo el detector en cada frase
+        self.open_until = 0.0
+        self.phrases = 0
+        self.accepted = 0
+        self.direct = 0
+        self.rejected = 0
+
+    def is_open(self):
+        return time.monotonic() < self.open_until
+
+    def open(self):
+        self.open_until = time.monotonic() + self.window
+
+    def close(self):
+        self.open_until = 0.0
+
+    def stats(self):
+        return {"phrases": self.phrases, "accepted": self.accepted, "direct": self.direct, "rejected": self.rejected}
+
+    # reconocimiento en streaming detras de la compuerta: el detector escucha cada bloque crudo y el motor
+    # completo (stream_factory) solo empieza si aparece la palabra de activacion; devuelve un objeto con
+    # feed(bytes) -> parcial y finish() -> texto ya filtrado o None si la frase no era para el asistente
+    # con passthrough() verdadero (ej: se espera una confirmacion) la frase va directo al motor
+    def stream(self, sample_rate, sample_width, stream_factory, passthrough=None):
+        if self.is_open() or (passthrough and passthrough()):
+            if self.is_open():
+                self.open()
+            return stream_factory(sample_rate, sample_width)
+        self.phrases += 1
+        return _GatedStream(self, self.spotter.start_stream(sample_rate, sample_width),
+                            lambda: stream_factory(sample_rate, sample_width))
+
+    # devuelve lo que debe reconocerse: el audio que sigue a la palabra de activacion, el texto de una
+    # palabra directa o None si la frase no era para el asistente
+    def filter(self, audio):
+        if audio is None:
+            return None
+        if self.is_open():
+            self.open()
+            return audio
+        self.phrases += 1
+        if isinstance(audio, str):  # modo streaming: la frase ya llega transcrita
+            return self._filter_text(audio)
+        started = time.monotonic()
+        words = self.spotter.spot(audio)
+        if self.on_spot:
+            self.on_spot((time.monotonic() - started) * 1000)
+        return self._decide([word for word, _, _ in words], lambda index: self._audio_after(audio, words[index][2]))
+
+    def _filter_text(self, text):
+        words = text.lower().split()
+        return self._decide(words, lambda index: " ".join(words[index + 1:]))
+
+    # rest(indice) devuelve lo que sigue a la ultima palabra de activacion
+    def _decide(self, words, rest):
+        heard = [word for word in words if word != "[unk]"]
+        if len(heard) == 1 and len(words) == 1 and heard[0] in self.direct_words:
+            self.direct += 1
+            return heard[0]
+        index = self._find_wake(words)
+        if index is None:
+            self.rejected += 1
+            return None
+        return self._wake(rest(index) if index + 1 < len(words) else None)
+
+    # indice de la ultima palabra de la primera aparicion de la palabra de activacion, o None
+    def _find_wake(self, words):
+        size = len(self.wake)
+        for index in range(len(words) - size + 1):
+            if words[index:index + size] == self.wake:
+                return index + size - 1
+        return None
+
+    # se dijo la palabra de activacion: abre la ventana; sin comando detras se avisa que se escucha
+    def _wake(self, command):
+        self.accepted += 1
+        self.open()
+        if not command:
+            if self.on_wake:
+                self.on_wake()
+            return None
+        return command
+
+    # el audio que sigue al instante end (segundos), para reconocer solo el comando
+    @staticmethod
+    def _audio_after(audio, end):
+        offset = int(end * audio.sample_rate) * audio.sample_width
+        return sr.AudioData(audio.frame_data[offset:], audio.sample_rate, audio.sample_width)
+
+
+# una frase en streaming mientras la compuerta esta cerrada: los bloques pasan primero por el detector
+# al oir la palabra de activacion se crea el motor completo y se le da la frase desde el inicio
+# (su texto se corta despues de la palabra); si no aparece, el motor completo nunca recibe la frase
+class _GatedStream:
+    def __init__(self, gate, spot_stream, start_full):
+        self.gate = gate
+        self.spot_stream = spot_stream
+        self.start_full = start_full
+        self.chunks = []  # bloques guardados hasta saber si la frase es para el asistente
+        self.full = None
+        self.spot_ms = 0.0
+
+    def feed(self, data):
+        if self.full is not None:
+            return self.full.feed(data)
+        self.chunks.append(data)
+        started = time.monotonic()
+        words = self.spot_stream.feed(data)
+        self.spot_ms += (time.monotonic() - started) * 1000
+        if self.gate._find_wake(words) is None:
+            return ""
+        return self._start_full()
+
+    def finish(self):
+        if self.full is None:
+            started = time.monotonic()
+            words = self.spot_stream.finish()
+            self.spot_ms += (time.monotonic() - started) * 1000
+            index = self.gate._find_wake(words)
+            if index is None or index + 1 == len(words):
+                self._report()
+                return self.gate._decide(words, lambda index: None)  # palabra directa, solo la de activacion o nada
+            self._start_full()  # la palabra aparecio recien en el resultado final y hay algo despues
+        self._report()
+        words = self.full.finish().lower().split()
+        index = self.gate._find_wake(words)
+        # el detector ya la oyo; si el motor completo la transcribio distinto se conserva todo el texto
+        return self.gate._wake(" ".join(words[index + 1:] if index is not None else words))
+
+    def _start_full(self):
+        self.full = self.start_full()
+        partial = ""
+        for chunk in self.chunks:
+            partial = self.full.feed(chunk)
+        self.chunks = []
+        return partial
+
+    def _report(self):
+        if self.gate.on_spot:
+            self.gate.on_spot(self.spot_ms)